@@ -18,7 +18,10 @@ app = FastAPI(
 @app.post("/process")
 async def process_file(
     file: UploadFile = File(...),
-    config_path: Optional[str] = None
+    config_path: Optional[str] = None,
+    formats: Optional[str] = None,
+    incremental: Optional[bool] = None,
+    as_of: Optional[str] = None
 ):
     """
     处理上传的到货计划Excel文件
@@ -26,6 +29,9 @@ async def process_file(
     Args:
         file: 上传的Excel文件
         config_path: 可选的配置文件路径
+        formats: 可选的最终文件输出格式，逗号分隔（xlsx/parquet/arrow/csv），默认读取配置
+        incremental: 可选，是否增量处理（按上传的文件名区分计划），默认读取配置
+        as_of: 可选的处理日期（YYYY-MM-DD），默认为当天
     
     Returns:
         处理结果，包含生成的文件路径
@@ -41,7 +47,10 @@ async def process_file(
         result = process_delivery_plan(
             str(temp_input),
             output_dir=temp_dir,
-            config_path=config_path
+            config_path=config_path,
+            output_formats=formats,
+            incremental=incremental,
+            as_of=as_of
         )
         
         if not result['success']:
@@ -53,6 +62,8 @@ async def process_file(
         
         final_files = {}
         for key, file_path in result['data'].items():
+            if not file_path:
+                continue
             src_path = Path(file_path)
             if src_path.exists():
                 dest_path = output_dir / src_path.name
@@ -62,7 +73,8 @@ async def process_file(
         return {
             "success": True,
             "message": "文件处理成功",
-            "files": final_files
+            "files": final_files,
+            "metrics": result.get('metrics', {})
         }
 
 @app.get("/download/{filename}")
@@ -283,11 +283,13 @@ class DeliveryPlanProcessorGUI:
             )
             
             if result['success']:
+                preprocessed_file = result['data']['preprocessed_file']
+                transformed_file = result['data']['transformed_file']
                 message = (
                     f"处理成功！\n\n"
                     f"输出文件位置：\n"
-                    f"1. 预处理文件：{Path(result['data']['preprocessed_file']).name}\n"
-                    f"2. 转换后文件：{Path(result['data']['transformed_file']).name}\n"
+                    f"1. 预处理文件：{Path(preprocessed_file).name if preprocessed_file else '(命中缓存，未重新生成)'}\n"
+                    f"2. 转换后文件：{Path(transformed_file).name if transformed_file else '(未保存)'}\n"
                     f"3. 最终文件：{Path(result['data']['final_file']).name}\n\n"
                     f"所有文件已保存在{'选定的输出目录' if self.output_dir else '原始文件夹'}中。"
                 )
@@ -1,17 +1,34 @@
 import logging
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
 from pathlib import Path
-from typing import Dict, Union, Tuple, Any
+from typing import Dict, Union, Tuple, Any, Optional, List
 import yaml
-from src.preprocessor.excel_preprocessor import ExcelPreprocessor
+from src.preprocessor import create_preprocessor
 from src.transformer.delivery_plan_transformer import DeliveryPlanTransformer
+from src.transformer.incremental import IncrementalProcessor
+from src.transformer.backfill import backfill_frames
+from src.core.exceptions import ConfigurationError
 from src.merger.sku_merger import SKUMerger
-from src.utils.excel_utils import setup_logging
+from src.utils.excel_utils import setup_logging, uses_today
 from src.utils.feishu_utils import FeishuSheetDownloader
+from src.utils.result_cache import ResultCache
+from src.utils.sheet_sidecar import SheetSidecar
+from src.utils.metrics import PipelineMetrics
+from src.utils.table_writer import resolve_formats
 
 def process_delivery_plan(
     input_source: Union[str, Dict] = None,
     output_dir: str = None,
-    config_path: str = None
+    config_path: str = None,
+    keep_intermediate: bool = None,
+    use_cache: bool = None,
+    output_formats: Union[str, List[str]] = None,
+    incremental: bool = None,
+    as_of: Union[str, date] = None
 ) -> Dict[str, Union[bool, str, Dict[str, str]]]:
     """
     处理到货计划的主函数
@@ -20,85 +37,144 @@ def process_delivery_plan(
         input_source: 输入来源，可以是Excel文件路径(str)或飞书配置(Dict)
         output_dir: 输出目录路径（可选）
         config_path: 配置文件路径（可选）
+        keep_intermediate: 是否保存转换阶段的中间文件（调试用），
+            默认读取配置 output.keep_intermediate
+        use_cache: 是否使用结果缓存，默认读取配置 cache.enabled
+        output_formats: 最终文件的输出格式（xlsx/parquet/arrow/csv），列表或逗号分隔的字符串，
+            默认读取配置 output.formats
+        incremental: 是否增量处理（只重新计算与上次运行相比有变化的SKU），
+            默认读取配置 incremental.enabled；保存中间文件时不使用
+        as_of: 处理日期（day1，dt列为其前一天），date或 YYYY-MM-DD 字符串，默认为当天；
+            openpyxl预处理后端计算公式时TODAY()也使用该日期
     
     Returns:
         Dict: {
             'success': bool,
             'message': str,
             'data': {
-                'preprocessed_file': str,
-                'transformed_file': str,
-                'final_file': str
+                'preprocessed_file': Optional[str],  # 命中工作表缓存、跳过预处理时为None
+                'transformed_file': Optional[str],  # 未保存中间文件时为None
+                'final_file': str,  # 第一个输出格式的文件
+                'final_file_<格式>': str  # 其他输出格式的文件，如 final_file_parquet
+            },
+            'metrics': {
+                'stages': {阶段名: {'wall_seconds', 'cpu_seconds', 'peak_memory_bytes', 'peak_rss_bytes',
+                                 'rows_in', 'rows_out', 'sku_count', 'bytes_written'}},
+                'total': {'wall_seconds', 'cpu_seconds', 'peak_rss_bytes'}
             }
         }
     """
     # 设置日志
     setup_logging()
     logger = logging.getLogger(__name__)
+    metrics = None
     
     try:
         # 加载配置
-        if config_path:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f)
-        else:
-            config_path = Path(__file__).parent / 'config' / 'config.yaml'
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f)
+        config = _load_config(config_path)
+        as_of = _resolve_as_of(as_of)
+        
+        metrics = PipelineMetrics(
+            track_memory=(config.get('metrics') or {}).get('track_memory', False)
+        )
         
         # 设置输出目录
         output_dir = Path(output_dir) if output_dir else Path(config['output']['directory'])
         output_dir.mkdir(parents=True, exist_ok=True)
         
+        if keep_intermediate is None:
+            keep_intermediate = config['output'].get('keep_intermediate', False)
+        if use_cache is None:
+            use_cache = (config.get('cache') or {}).get('enabled', False)
+        if output_formats is None:
+            output_formats = config['output'].get('formats', ['xlsx'])
+        output_formats = resolve_formats(output_formats)
+        if incremental is None:
+            incremental = (config.get('incremental') or {}).get('enabled', False)
+        incremental = incremental and not keep_intermediate
+        
         # 根据输入来源获取数据
-        if isinstance(input_source, str):
-            # 使用本地Excel文件
-            input_file = Path(input_source)
-            if not input_file.exists():
-                raise FileNotFoundError(f"输入文件不存在: {input_source}")
-            initial_file = input_file
-        else:
-            # 从飞书获取数据
-            logger.info("从飞书获取数据...")
-            downloader = FeishuSheetDownloader(
-                app_id=config['feishu']['app_id'],
-                app_secret=config['feishu']['app_secret']
+        initial_file, plan_id = _fetch_input(input_source, config, metrics)
+        
+        # 相同输入、配置和日期的结果直接从缓存返回
+        cache = None
+        if use_cache:
+            cache = ResultCache.from_config(config)
+            cache_key = cache.make_key(
+                initial_file,
+                config,
+                as_of=as_of.isoformat(),
+                keep_intermediate=bool(keep_intermediate),
+                output_formats=output_formats
             )
-            
-            # 构建sheet URLs
-            sheet_urls = []
-            spreadsheet_token = config['feishu']['spreadsheet_token']
-            sheet_config = config['feishu']['sheets']
-            url = f"https://fr1r3d1ckr.feishu.cn/sheets/{spreadsheet_token}"
-            sheet_urls.append(url)
-            
-            # 下载并保存为Excel文件
-            initial_file = Path(downloader.download_sheets(sheet_urls, sheet_config))
-            logger.info(f"飞书数据已保存到: {initial_file}")
+            with metrics.stage('cache_lookup'):
+                cached = cache.get(cache_key)
+                data = _restore_cached_files(cached, output_dir) if cached else None
+            if cached:
+                logger.info(f"命中结果缓存: {cache_key}")
+                return {
+                    'success': True,
+                    'message': '处理成功（缓存）',
+                    'data': data,
+                    'metrics': metrics.to_dict()
+                }
+        
+        transformer = DeliveryPlanTransformer()
         
         # 1. 预处理阶段 - 处理Excel公式和格式
-        preprocessor = ExcelPreprocessor()
-        preprocessed_file = preprocessor.process(initial_file)
-        logger.info(f"预处理完成: {preprocessed_file}")
+        preprocessed_file, sheets_file, source_key = _preprocess(initial_file, config, transformer, as_of, metrics)
         
-        # 2. 转换阶段 - 转换数据格式
-        transformer = DeliveryPlanTransformer()
-        transformed_file = transformer.transform(preprocessed_file)
-        logger.info(f"转换完成: {transformed_file}")
+        # 2. 转换阶段 - 转换数据格式，结果直接在内存中交给合并阶段
+        merger = SKUMerger(formats=output_formats)
+        with metrics.stage('transform') as stage:
+            if incremental:
+                # 增量处理同时完成合并，合并阶段只保存结果
+                transformed_file = None
+                processor = IncrementalProcessor.from_config(transformer, merger, config)
+                merged_df = processor.process(sheets_file, plan_id, {'date': config.get('date')}, source_key, as_of)
+                stage.rows_in = processor.rows_in
+                stage.rows_out = stage.sku_count = len(merged_df)
+            elif keep_intermediate:
+                transformed_file = transformer.transform(sheets_file, source_key, as_of)
+                stage.add_written_file(transformed_file)
+                logger.info(f"转换完成: {transformed_file}")
+            else:
+                transformed_file = None
+                transformed_df = transformer.transform_dataframe(sheets_file, source_key, as_of)
+                logger.info(f"转换完成: {len(transformed_df)} 条记录")
+            if not incremental:
+                stage.rows_in = transformer.rows_in
+                stage.rows_out = stage.sku_count = transformer.rows_out
         
         # 3. 合并阶段 - 合并SKU数据
-        merger = SKUMerger()
-        final_file = merger.merge(transformed_file)
+        with metrics.stage('merge') as stage:
+            if incremental:
+                final_file = merger.save(merged_df, initial_file)
+            elif keep_intermediate:
+                final_file = merger.merge(transformed_file, initial_file)
+            else:
+                final_file = merger.merge_dataframe(transformed_df, initial_file)
+            for output_file in merger.output_files.values():
+                stage.add_written_file(output_file)
+            stage.rows_in = merger.rows_in
+            stage.rows_out = stage.sku_count = merger.rows_out
         logger.info(f"合并完成: {final_file}")
         
+        data = {
+            'preprocessed_file': str(preprocessed_file) if preprocessed_file else None,
+            'transformed_file': str(transformed_file) if transformed_file else None,
+            'final_file': str(final_file)
+        }
+        for fmt, output_file in list(merger.output_files.items())[1:]:
+            data[f'final_file_{fmt}'] = str(output_file)
+        if cache:
+            cache.put(cache_key, data)
+        
         return {
             'success': True,
             'message': '处理成功',
-            'data': {
-                'preprocessed_file': str(preprocessed_file),
-                'transformed_file': str(transformed_file),
-                'final_file': str(final_file)
-            }
+            'data': data,
+            'metrics': metrics.to_dict()
         }
         
     except Exception as e:
@@ -106,16 +182,329 @@ def process_delivery_plan(
         return {
             'success': False,
             'message': str(e),
-            'data': {}
+            'data': {},
+            'metrics': metrics.to_dict() if metrics else {}
         }
+    
+    finally:
+        if metrics:
+            metrics.close()
+
+def backfill_delivery_plan(
+    input_source: Union[str, Dict] = None,
+    start: Union[str, date] = None,
+    end: Union[str, date] = None,
+    output_dir: str = None,
+    config_path: str = None,
+    output_formats: Union[str, List[str]] = None
+) -> Dict[str, Any]:
+    """
+    为一段处理日期回填最终文件
+    
+    每个处理日期生成一份合并后的最终文件（文件名后缀 合并_YYYYMMDD，与 process_delivery_plan 的结果格式相同）；
+    已合并的汇总表按日期列生成上传格式的多日期回填见 UploadFormatTransformer.backfill。
+    工作簿只预处理和解析一次，数量按整个日期范围累加、合并一次，
+    每个处理日期的day1..day60从中切片得到。公式中的TODAY()只按第一个处理日期计算，
+    工作簿不含TODAY()时结果与逐日调用 process_delivery_plan 一致；
+    含TODAY()时记录警告，此时各日期的结果需逐日调用 process_delivery_plan 生成。
+    
+    Args:
+        input_source: 输入来源，同 process_delivery_plan
+        start: 第一个处理日期，date或 YYYY-MM-DD 字符串，默认为当天
+        end: 最后一个处理日期（包含），默认与start相同
+        output_dir: 输出目录路径（可选）
+        config_path: 配置文件路径（可选）
+        output_formats: 最终文件的输出格式，同 process_delivery_plan
+    
+    Returns:
+        Dict: {
+            'success': bool,
+            'message': str,
+            'data': {
+                'preprocessed_file': Optional[str],
+                'files': {处理日期(YYYY-MM-DD): {'final_file': str, 'final_file_<格式>': str}}
+            },
+            'metrics': 同 process_delivery_plan
+        }
+    """
+    setup_logging()
+    logger = logging.getLogger(__name__)
+    metrics = None
+    
+    try:
+        config = _load_config(config_path)
+        start = _resolve_as_of(start)
+        end = _resolve_as_of(end) if end else start
+        
+        metrics = PipelineMetrics(
+            track_memory=(config.get('metrics') or {}).get('track_memory', False)
+        )
+        output_dir = Path(output_dir) if output_dir else Path(config['output']['directory'])
+        output_dir.mkdir(parents=True, exist_ok=True)
+        if output_formats is None:
+            output_formats = config['output'].get('formats', ['xlsx'])
+        output_formats = resolve_formats(output_formats)
+        
+        initial_file, _ = _fetch_input(input_source, config, metrics)
+        transformer = DeliveryPlanTransformer()
+        merger = SKUMerger(formats=output_formats)
+        
+        # 公式中的TODAY()按第一个处理日期计算，之后的日期与逐日处理的结果可能不同
+        if end > start and uses_today(initial_file):
+            logger.warning(
+                f"工作簿的公式中使用了TODAY()，回填时统一按 {start} 计算，"
+                f"{start + timedelta(days=1)} 之后的结果可能与逐日处理不一致"
+            )
+        preprocessed_file, sheets_file, source_key = _preprocess(initial_file, config, transformer, start, metrics)
+        
+        with metrics.stage('transform') as stage:
+            sheets = transformer.read_sheets(sheets_file, source_key)
+            frames = backfill_frames(transformer, merger, sheets, start, end)
+            stage.rows_in = sum(len(df) for df in sheets.values())
+        
+        files = {}
+        with metrics.stage('merge') as stage:
+            for as_of, merged_df in frames:
+                final_file = merger.save(merged_df, initial_file, f"合并_{as_of:%Y%m%d}")
+                files[as_of.isoformat()] = {'final_file': str(final_file)}
+                for fmt, output_file in merger.output_files.items():
+                    stage.add_written_file(output_file)
+                    if output_file != final_file:
+                        files[as_of.isoformat()][f'final_file_{fmt}'] = str(output_file)
+            stage.rows_out = stage.sku_count = merger.rows_out
+        logger.info(f"回填完成: {start} ~ {end}，共 {len(files)} 个处理日期")
+        
+        return {
+            'success': True,
+            'message': f"回填成功，共{len(files)}个处理日期",
+            'data': {
+                'preprocessed_file': str(preprocessed_file) if preprocessed_file else None,
+                'files': files
+            },
+            'metrics': metrics.to_dict()
+        }
+        
+    except Exception as e:
+        logger.error(f"回填失败: {str(e)}", exc_info=True)
+        return {
+            'success': False,
+            'message': str(e),
+            'data': {},
+            'metrics': metrics.to_dict() if metrics else {}
+        }
+    
+    finally:
+        if metrics:
+            metrics.close()
+
+def _load_config(config_path: str = None) -> Dict:
+    """加载配置文件，默认为 config/config.yaml"""
+    if not config_path:
+        config_path = Path(__file__).parent / 'config' / 'config.yaml'
+    with open(config_path, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f)
+
+def _resolve_as_of(as_of: Union[str, date, None]) -> date:
+    """解析处理日期，默认为当天"""
+    if as_of is None:
+        return date.today()
+    if isinstance(as_of, datetime):
+        return as_of.date()
+    if isinstance(as_of, date):
+        return as_of
+    try:
+        return date.fromisoformat(str(as_of).strip())
+    except ValueError:
+        raise ConfigurationError(f"无效的处理日期: {as_of}，格式应为 YYYY-MM-DD")
+
+def _fetch_input(input_source: Union[str, Dict], config: Dict, metrics: PipelineMetrics) -> Tuple[Path, str]:
+    """
+    获取输入工作簿
+    
+    Returns:
+        (工作簿路径, 计划标识)：本地文件以文件名为标识，飞书以表格token为标识
+    """
+    logger = logging.getLogger(__name__)
+    if isinstance(input_source, str):
+        # 使用本地Excel文件
+        input_file = Path(input_source)
+        if not input_file.exists():
+            raise FileNotFoundError(f"输入文件不存在: {input_source}")
+        return input_file, input_file.stem
+    
+    # 从飞书获取数据
+    logger.info("从飞书获取数据...")
+    downloader = FeishuSheetDownloader(
+        app_id=config['feishu']['app_id'],
+        app_secret=config['feishu']['app_secret']
+    )
+    
+    # 构建sheet URLs
+    sheet_urls = []
+    spreadsheet_token = config['feishu']['spreadsheet_token']
+    sheet_config = config['feishu']['sheets']
+    url = f"https://fr1r3d1ckr.feishu.cn/sheets/{spreadsheet_token}"
+    sheet_urls.append(url)
+    
+    # 下载并保存为Excel文件
+    with metrics.stage('feishu_download') as stage:
+        initial_file = Path(downloader.download_sheets(sheet_urls, sheet_config))
+        stage.add_written_file(initial_file)
+    logger.info(f"飞书数据已保存到: {initial_file}")
+    return initial_file, f"feishu_{spreadsheet_token}"
+
+def _preprocess(
+    initial_file: Path,
+    config: Dict,
+    transformer: DeliveryPlanTransformer,
+    as_of: date,
+    metrics: PipelineMetrics
+) -> Tuple[Optional[Path], Path, Optional[str]]:
+    """
+    预处理阶段
+    
+    预处理后的工作表按源文件内容和预处理相关配置缓存，工作簿的公式使用TODAY()时还按日期区分，
+    只调整其他配置或在其他日期重新处理时跳过预处理和解析。
+    
+    Returns:
+        (预处理后的文件（跳过预处理时为None）, 转换阶段读取的工作簿, 工作表缓存的内容键)
+    """
+    logger = logging.getLogger(__name__)
+    source_key = None
+    if SheetSidecar.from_config(config) is not None:
+        # 只有TODAY()的结果与处理日期有关
+        params = {'as_of': as_of.isoformat()} if uses_today(initial_file) else {}
+        source_key = SheetSidecar.make_key(
+            initial_file,
+            {'excel': config.get('excel'), 'date': config.get('date')},
+            **params
+        )
+    
+    with metrics.stage('preprocess') as stage:
+        if source_key and transformer.has_cached_sheets(initial_file, source_key):
+            logger.info("命中工作表缓存，跳过预处理")
+            return None, initial_file, source_key
+        preprocessor = create_preprocessor(config.get('excel', {}).get('preprocess_backend'), as_of)
+        preprocessed_file = preprocessor.process(initial_file)
+        stage.add_written_file(preprocessed_file)
+        logger.info(f"预处理完成: {preprocessed_file}")
+    return preprocessed_file, preprocessed_file, source_key
+
+def find_input_files(input_dir: Union[str, Path]) -> List[Path]:
+    """
+    查找目录下的到货计划Excel文件
+    
+    Args:
+        input_dir: 输入目录路径
+    
+    Returns:
+        List[Path]: 按文件名排序的xlsx文件列表（忽略Excel临时文件）
+    """
+    input_dir = Path(input_dir)
+    if not input_dir.is_dir():
+        raise FileNotFoundError(f"输入目录不存在: {input_dir}")
+    return sorted(p for p in input_dir.glob('*.xlsx') if not p.name.startswith('~$'))
+
+def process_delivery_plans(
+    input_files: List[Union[str, Path]],
+    output_dir: str = None,
+    config_path: str = None,
+    jobs: int = None,
+    keep_intermediate: bool = None,
+    use_cache: bool = None,
+    output_formats: Union[str, List[str]] = None,
+    incremental: bool = None,
+    as_of: Union[str, date] = None
+) -> Dict[str, Any]:
+    """
+    使用进程池并行处理多个到货计划文件
+    
+    Args:
+        input_files: 输入Excel文件路径列表
+        output_dir: 输出目录路径（可选）
+        config_path: 配置文件路径（可选）
+        jobs: 并行进程数，默认为CPU核数；为1时在当前进程中顺序处理
+        keep_intermediate: 是否保存转换阶段的中间文件
+        use_cache: 是否使用结果缓存
+        output_formats: 最终文件的输出格式
+        incremental: 是否增量处理
+        as_of: 处理日期，默认为当天
+    
+    Returns:
+        Dict: {
+            'success': bool,  # 全部文件处理成功时为True
+            'message': str,
+            'data': {
+                'files': {文件路径: process_delivery_plan的返回结果},
+                'summary': {'total', 'succeeded', 'failed', 'jobs', 'elapsed_seconds'}
+            }
+        }
+    """
+    input_files = [str(f) for f in input_files]
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(input_files) or 1))
+    args = (output_dir, config_path, keep_intermediate, use_cache, output_formats, incremental, as_of)
+    
+    start = time.perf_counter()
+    results = {}
+    if jobs == 1:
+        for input_file in input_files:
+            results[input_file] = process_delivery_plan(input_file, *args)
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = {
+                executor.submit(process_delivery_plan, input_file, *args): input_file
+                for input_file in input_files
+            }
+            for future in as_completed(futures):
+                input_file = futures[future]
+                try:
+                    results[input_file] = future.result()
+                except Exception as e:
+                    # 工作进程异常退出等process_delivery_plan内部无法捕获的错误
+                    results[input_file] = {'success': False, 'message': str(e), 'data': {}}
+    
+    succeeded = sum(1 for result in results.values() if result['success'])
+    summary = {
+        'total': len(input_files),
+        'succeeded': succeeded,
+        'failed': len(input_files) - succeeded,
+        'jobs': jobs,
+        'elapsed_seconds': round(time.perf_counter() - start, 3)
+    }
+    return {
+        'success': summary['failed'] == 0,
+        'message': f"共{summary['total']}个文件，成功{succeeded}个，失败{summary['failed']}个",
+        'data': {
+            'files': {input_file: results[input_file] for input_file in input_files},
+            'summary': summary
+        }
+    }
+
+def _restore_cached_files(cached: Dict[str, Optional[Path]], output_dir: Path) -> Dict[str, Optional[str]]:
+    """将缓存中的结果文件复制到输出目录"""
+    data = {}
+    for name, cached_path in cached.items():
+        if cached_path is None:
+            data[name] = None
+            continue
+        target = output_dir / cached_path.name
+        shutil.copy2(cached_path, target)
+        data[name] = str(target)
+    return data
 
 def lambda_handler(event: Dict, context: Any) -> Dict:
     """AWS Lambda处理函数"""
     input_source = event.get('input_source')
     output_dir = event.get('output_dir')
     config_path = event.get('config_path')
+    keep_intermediate = event.get('keep_intermediate')
+    use_cache = event.get('use_cache')
+    output_formats = event.get('output_formats')
+    incremental = event.get('incremental')
+    as_of = event.get('as_of')
     
-    return process_delivery_plan(input_source, output_dir, config_path)
+    return process_delivery_plan(input_source, output_dir, config_path, keep_intermediate, use_cache,
+                                 output_formats, incremental, as_of)
 
 def local_handler():
     """本地处理函数"""
@@ -123,20 +512,71 @@ def local_handler():
     
     parser = argparse.ArgumentParser(description='处理到货计划')
     parser.add_argument('--input', help='输入文件路径或使用"feishu"从飞书获取数据')
+    parser.add_argument('--input-dir', help='批量处理目录下的所有xlsx文件')
+    parser.add_argument('--jobs', type=int, help='批量处理的并行进程数，默认为CPU核数')
     parser.add_argument('--output', help='输出目录路径')
     parser.add_argument('--config', help='配置文件路径')
+    parser.add_argument('--keep-intermediate', action='store_true', default=None,
+                        help='保存转换阶段的中间文件（调试用）')
+    parser.add_argument('--cache', dest='use_cache', action='store_true', default=None,
+                        help='使用结果缓存，相同输入、配置和日期直接返回上次的结果')
+    parser.add_argument('--no-cache', dest='use_cache', action='store_false', default=None,
+                        help='不使用结果缓存，强制重新处理')
+    parser.add_argument('--formats', dest='output_formats',
+                        help='最终文件的输出格式，逗号分隔，可选xlsx/parquet/arrow/csv，默认读取配置')
+    parser.add_argument('--incremental', action='store_true', default=None,
+                        help='增量处理：只重新计算与上次运行相比有变化的SKU')
+    parser.add_argument('--as-of', help='处理日期（YYYY-MM-DD），默认为当天')
+    parser.add_argument('--backfill-to', help='回填：为 --as-of 到该日期（YYYY-MM-DD）之间的每一天生成最终文件')
     
     args = parser.parse_args()
     
+    if args.input_dir:
+        result = process_delivery_plans(
+            find_input_files(args.input_dir), args.output, args.config, args.jobs,
+            keep_intermediate=args.keep_intermediate,
+            use_cache=args.use_cache,
+            output_formats=args.output_formats,
+            incremental=args.incremental,
+            as_of=args.as_of
+        )
+        for input_file, file_result in result['data']['files'].items():
+            if file_result['success']:
+                print(f"[成功] {input_file} -> {file_result['data']['final_file']}")
+            else:
+                print(f"[失败] {input_file}: {file_result['message']}")
+        summary = result['data']['summary']
+        print(f"{result['message']}，并行进程数: {summary['jobs']}，耗时: {summary['elapsed_seconds']}秒")
+        return
+    
     # 如果指定使用飞书，则传入None作为input_source
     input_source = None if args.input == 'feishu' else args.input
     
-    result = process_delivery_plan(input_source, args.output, args.config)
+    if args.backfill_to:
+        result = backfill_delivery_plan(input_source, args.as_of, args.backfill_to, args.output, args.config,
+                                        output_formats=args.output_formats)
+        if result['success']:
+            for as_of, files in result['data']['files'].items():
+                print(f"[{as_of}] 最终文件: {files['final_file']}")
+        print(result['message'] if result['success'] else f"回填失败: {result['message']}")
+        return
+    
+    result = process_delivery_plan(input_source, args.output, args.config,
+                                   keep_intermediate=args.keep_intermediate,
+                                   use_cache=args.use_cache,
+                                   output_formats=args.output_formats,
+                                   incremental=args.incremental,
+                                   as_of=args.as_of)
     if result['success']:
         print("处理成功！")
-        print(f"预处理文件: {result['data']['preprocessed_file']}")
-        print(f"转换后文件: {result['data']['transformed_file']}")
+        if result['data']['preprocessed_file']:
+            print(f"预处理文件: {result['data']['preprocessed_file']}")
+        if result['data']['transformed_file']:
+            print(f"转换后文件: {result['data']['transformed_file']}")
         print(f"最终文件: {result['data']['final_file']}")
+        for name, file_path in result['data'].items():
+            if name.startswith('final_file_'):
+                print(f"最终文件（{name[len('final_file_'):]}）: {file_path}")
     else:
         print(f"处理失败: {result['message']}")
 
@@ -11,8 +11,12 @@ setup(
         "pandas>=1.3.0",
         "openpyxl>=3.0.7",
         "PyYAML>=5.4.1",
-        "pywin32>=300",
+        "pywin32>=300; sys_platform == 'win32'",
         "python-dotenv>=0.19.0",
     ],
+    extras_require={
+        # 更快的xlsx读取引擎
+        "fast": ["python-calamine>=0.2.0", "pandas>=2.2", "pyarrow>=10.0.0"],
+    },
     python_requires=">=3.8",
 ) 
\ No newline at end of file
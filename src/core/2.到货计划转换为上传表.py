@@ -3,6 +3,7 @@ import openpyxl
 from copy import copy
 import pandas as pd
 import os
+import io
 
 def process_excel_file(input_file_path):
     try:
@@ -13,16 +14,21 @@ def process_excel_file(input_file_path):
         output_file = f"{filename}_{timestamp}.xlsx"
         output_path = os.path.join(os.path.dirname(input_file_path), output_file)
         
+        # 文件只从磁盘读取一次，格式和数据都从内存中的同一份内容解析
+        with open(input_file_path, 'rb') as f:
+            content = f.read()
+
         # 加载原始 Excel 文件以保留所有格式和颜色
-        wb = openpyxl.load_workbook(input_file_path)
+        wb = openpyxl.load_workbook(io.BytesIO(content))
         sheet1_wb = wb['常规产品']
         sheet2_wb = wb['S级产品']
         sheet3_wb = wb['汇总']
 
-        # 重新加载数据表至 DataFrame 中进行处理
-        sheet1 = pd.read_excel(input_file_path, sheet_name='常规产品')
-        sheet2 = pd.read_excel(input_file_path, sheet_name='S级产品')
-        sheet3 = pd.read_excel(input_file_path, sheet_name='汇总')
+        # 加载数据表至 DataFrame 中进行处理（三个工作表共用一次打开的工作簿）
+        with pd.ExcelFile(io.BytesIO(content)) as xls:
+            sheet1 = xls.parse('常规产品')
+            sheet2 = xls.parse('S级产品')
+            sheet3 = xls.parse('汇总')
 
         # 收集所有日期
         all_dates = set()
@@ -284,50 +290,22 @@ def process_excel_file(input_file_path):
 
         # 在处理完数据后添加校验
         def verify_totals(sheet1, sheet2, sheet3_cleaned):
-            # 计算常规产品总和
-            sheet1_total = 0
-            sheet1_sku_totals = {}
-            
-            # 确保数据类型为数值型
-            for idx in range(1, 6):
-                qty_col = f'到货数量-{idx}'
-                if qty_col in sheet1.columns:
-                    # 将数据转换为数值类型
-                    sheet1[qty_col] = pd.to_numeric(sheet1[qty_col], errors='coerce')
-                    # 使用sum()前先填充NA值为0
-                    sheet1_total += sheet1[qty_col].fillna(0).sum()
-                    
-                    # 计算每个SKU的总量
-                    for sku, qty in zip(sheet1['sku编码'], sheet1[qty_col]):
-                        if pd.notna(qty):
-                            if sku not in sheet1_sku_totals:
-                                sheet1_sku_totals[sku] = 0
-                            sheet1_sku_totals[sku] += qty
+            # 计算常规产品总和：到货数量列整体转换为数值，按SKU分组求和
+            qty_cols = [f'到货数量-{idx}' for idx in range(1, 6) if f'到货数量-{idx}' in sheet1.columns]
+            sheet1_qty = sheet1[qty_cols].apply(pd.to_numeric, errors='coerce')
+            sheet1_total = sheet1_qty.sum().sum()
+            sheet1_row_totals = sheet1_qty.sum(axis=1, min_count=1).dropna()
+            sheet1_sku_totals = sheet1_row_totals.groupby(sheet1['sku编码']).sum()
             
-            # 计算S级产品总和
-            sheet2_total = 0
-            sheet2_sku_totals = {}
+            # 计算S级产品总和：每行日期列之和大于0的SKU参与核对
             date_cols = [col for col in sheet2.columns if pd.notna(pd.to_datetime(col, errors='coerce'))]
-            
-            for _, row in sheet2.iterrows():
-                sku = row['sku编码']
-                sku_total = 0
-                for col in date_cols:
-                    # 确保数据为数值类型
-                    qty = pd.to_numeric(row[col], errors='coerce')
-                    if pd.notna(qty):
-                        sku_total += qty
-                        sheet2_total += qty
-                if sku_total > 0:
-                    sheet2_sku_totals[sku] = sku_total
+            sheet2_qty = sheet2[date_cols].apply(pd.to_numeric, errors='coerce').sum(axis=1)
+            sheet2_total = sheet2_qty.sum()
+            sheet2_sku_totals = sheet2_qty[sheet2_qty > 0].groupby(sheet2['sku编码']).sum()
             
             # 获取汇总表总和
-            sheet3_sku_totals = {}
-            for _, row in sheet3_cleaned.iterrows():
-                sku = row['sku编码']
-                total = pd.to_numeric(row['总交货量'], errors='coerce')
-                if pd.notna(total) and total > 0:
-                    sheet3_sku_totals[sku] = total
+            sheet3_qty = pd.to_numeric(sheet3_cleaned['总交货量'], errors='coerce')
+            sheet3_sku_totals = sheet3_qty[sheet3_qty > 0].groupby(sheet3_cleaned['sku编码']).sum()
             
             sheet3_total = sheet3_cleaned['总交货量'].sum()
             
@@ -338,16 +316,19 @@ def process_excel_file(input_file_path):
             print(f"汇总表总和: {sheet3_total:,.0f}")
             
             # 检查不一致的SKU
-            all_skus = set(sheet1_sku_totals.keys()) | set(sheet2_sku_totals.keys())
-            for sku in all_skus:
-                original_total = (sheet1_sku_totals.get(sku, 0) + sheet2_sku_totals.get(sku, 0))
-                summary_total = sheet3_sku_totals.get(sku, 0)
-                if abs(original_total - summary_total) > 0.1:  # 考虑浮点数误差
-                    print(f"\nSKU {sku} 数量不一致:")
-                    print(f"  常规产品数量: {sheet1_sku_totals.get(sku, 0):,.0f}")
-                    print(f"  S级产品数量: {sheet2_sku_totals.get(sku, 0):,.0f}")
-                    print(f"  原表总和: {original_total:,.0f}")
-                    print(f"  汇总表数量: {summary_total:,.0f}")
+            totals = pd.DataFrame({
+                'sheet1': sheet1_sku_totals,
+                'sheet2': sheet2_sku_totals,
+            }).fillna(0)
+            totals['original'] = totals['sheet1'] + totals['sheet2']
+            totals['summary'] = sheet3_sku_totals.reindex(totals.index).fillna(0)
+            mismatched = totals[(totals['original'] - totals['summary']).abs() > 0.1]  # 考虑浮点数误差
+            for row in mismatched.itertuples():
+                print(f"\nSKU {row.Index} 数量不一致:")
+                print(f"  常规产品数量: {row.sheet1:,.0f}")
+                print(f"  S级产品数量: {row.sheet2:,.0f}")
+                print(f"  原表总和: {row.original:,.0f}")
+                print(f"  汇总表数量: {row.summary:,.0f}")
             
             return sheet1_total, sheet2_total, sheet3_total
 
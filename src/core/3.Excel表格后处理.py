@@ -4,14 +4,16 @@ import os
 import openpyxl
 from openpyxl.styles import PatternFill
 
-def format_sku(x):
-    """格式化SKU编码，处理科学计数法的问题"""
-    if pd.isna(x):
-        return ''
-    # 如果是数字（包括科学计数法），转换为整数再转字符串
-    if isinstance(x, (int, float)):
-        return str(int(x))
-    return str(x).strip()
+def format_sku_column(values):
+    """按列格式化文本（dtype=str读取），去除首尾空白，缺失值转换为空字符串"""
+    return values.fillna('').astype(str).str.strip()
+
+def report_scientific_skus(skus):
+    """提示被Excel转换为科学计数法（已丢失位数）的SKU"""
+    damaged = skus[skus.str.match(r'^[+-]?\d+(\.\d+)?[eE][+-]?\d+$')]
+    if not damaged.empty:
+        print(f"\n警告: {len(damaged)} 个SKU为科学计数法，可能已被Excel截断，请在源表中将SKU列设置为文本:")
+        print(', '.join(damaged.unique()[:10]))
 
 def process_excel(input_file):
     try:
@@ -26,7 +28,8 @@ def process_excel(input_file):
         
         # 格式化所有列
         for col in df.columns:
-            df[col] = df[col].apply(format_sku)
+            df[col] = format_sku_column(df[col])
+        report_scientific_skus(df['sku编码'])
         
         # 获取日期列
         date_columns = [col for col in df.columns if str(col).startswith('202')]
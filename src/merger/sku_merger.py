@@ -1,76 +1,159 @@
 import logging
 from pathlib import Path
+import numpy as np
 import pandas as pd
-from src.utils.excel_utils import generate_output_path, format_sku
+from src.utils.excel_utils import generate_output_path
+from src.utils.sheet_schema import SKU_COLUMNS, SUMMARY_SCHEMA
+from src.utils.sku_utils import normalize_categorical_skus
+from src.utils.table_writer import write_table
+from src.utils.workbook_reader import WorkbookReader
 
 class SKUMerger:
-    def __init__(self):
+    def __init__(self, formats=None):
+        """
+        Args:
+            formats: 输出格式（见 table_writer.resolve_formats），为None时使用配置 output.formats
+        """
         self.logger = logging.getLogger(__name__)
+        self.formats = formats
+        # 最近一次合并的输入/输出行数
+        self.rows_in = None
+        self.rows_out = None
+        # 最近一次合并写出的 {格式: 文件路径}
+        self.output_files = {}
         
-    def merge(self, input_file: Path) -> Path:
-        """合并SKU数据"""
+    def merge(self, input_file: Path, source_file: Path = None) -> Path:
+        """
+        合并SKU数据
+        
+        Args:
+            input_file: 转换阶段输出的文件
+            source_file: 用于生成输出文件名的源文件路径，默认为input_file
+        """
         try:
-            # 读取数据，不指定dtype，让pandas自动推断类型
-            df = pd.read_excel(input_file, sheet_name='汇总')
+            # 读取数据，只解析结果表的列，SKU列按文本读取，其他列让pandas自动推断类型
+            with WorkbookReader(input_file) as reader:
+                df = reader.read_sheet('汇总', usecols=SUMMARY_SCHEMA, dtype={col: str for col in SKU_COLUMNS})
+            return self.merge_dataframe(df, source_file or input_file)
+            
+        except Exception as e:
+            self.logger.error(f"合并失败: {str(e)}", exc_info=True)
+            raise
+            
+    def merge_dataframe(self, df: pd.DataFrame, source_file: Path) -> Path:
+        """
+        合并内存中的转换结果并保存最终文件
+        
+        Args:
+            df: 转换阶段输出的DataFrame
+            source_file: 用于生成输出文件名的源文件路径
+            
+        Returns:
+            合并后主格式（第一个输出格式）的文件路径，全部文件见 output_files
+        """
+        return self.save(self.merge_frame(df), source_file)
+        
+    def merge_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        合并重复SKU，不写文件
+        
+        Args:
+            df: 转换阶段输出的DataFrame
+            
+        Returns:
+            按SKU文本排序、每个SKU一行的DataFrame
+        """
+        try:
+            # 表头只解析一次，SKU列统一为sku_no
+            plan = SUMMARY_SCHEMA.resolve(df.columns)
+            if plan.sku is not None and plan.sku != 'sku_no':
+                df = df.rename(columns={plan.sku: 'sku_no'})
             
             # 处理数据
             df = self._format_data(df)
             duplicates = self._find_duplicates(df)
-            merged_df = self._merge_duplicates(df)
-            
-            # 保存结果
-            output_path = generate_output_path(input_file, Path("output"), "合并")
-            self._save_result(merged_df, output_path)
+            merged_df = self._merge_duplicates(df, plan.days)
+            self.rows_in = len(df)
+            self.rows_out = len(merged_df)
             
             self._log_results(df, merged_df, duplicates)
-            return output_path
+            return merged_df
             
         except Exception as e:
             self.logger.error(f"合并失败: {str(e)}", exc_info=True)
             raise
             
+    def save(self, merged_df: pd.DataFrame, source_file: Path, suffix: str = "合并") -> Path:
+        """
+        保存合并结果
+        
+        Args:
+            merged_df: merge_frame 的结果
+            source_file: 用于生成输出文件名的源文件路径
+            suffix: 文件名中的后缀标识
+            
+        Returns:
+            主格式（第一个输出格式）的文件路径，全部文件见 output_files
+        """
+        try:
+            output_path = generate_output_path(source_file, Path("output"), suffix)
+            self.output_files = self._save_result(merged_df, output_path)
+            return next(iter(self.output_files.values()))
+            
+        except Exception as e:
+            self.logger.error(f"保存合并结果失败: {str(e)}", exc_info=True)
+            raise
+            
     def _format_data(self, df):
         """格式化数据"""
-        # 只对SKU相关列应用format_sku
+        # 只对SKU相关列做规范化，并以字典编码（category）参与后续分组
         sku_cols = ['sku_no']
         for col in sku_cols:
             if col in df.columns:
-                df[col] = df[col].apply(format_sku)
+                df[col] = normalize_categorical_skus(df[col], col)
         return df
         
     def _find_duplicates(self, df):
         """找出重复的SKU"""
         return df[df.duplicated(subset=['sku_no'], keep=False)]
         
-    def _merge_duplicates(self, df):
-        """合并重复的SKU"""
-        # 识别需要合并的列
-        date_cols = [col for col in df.columns if col.startswith('day')]
+    def _merge_duplicates(self, df, date_cols):
+        """
+        合并重复的SKU
+        
+        Args:
+            date_cols: 需要求和的 day1..dayN 列
+        """
         sum_cols = date_cols
         first_cols = ['sku_no', 'color', 'size']
         
-        # 构建聚合字典
-        agg_dict = {}
-        for col in df.columns:
-            if col in sum_cols:
-                agg_dict[col] = 'sum'
-            elif col in first_cols:
-                agg_dict[col] = 'first'
-            elif col == 'dt':
-                agg_dict[col] = 'first'
-        
-        # 按SKU分组并合并
-        merged_df = df.groupby('sku_no', as_index=False).agg(agg_dict)
-        
-        # 确保数值列为float类型
-        for col in date_cols:
-            merged_df[col] = pd.to_numeric(merged_df[col], errors='coerce').fillna(0.0)
-            
-        return merged_df
+        # 保留的列：按原列顺序，日期列求和，其他列取第一个非空值
+        keep_cols = [col for col in df.columns if col in sum_cols or col in first_cols or col == 'dt']
+        first_only = [col for col in keep_cols if col not in sum_cols and col != 'sku_no']
+        
+        # 按SKU编码分组，类别按文本排序使结果顺序与按SKU文本分组一致
+        keys = df['sku_no'].cat.reorder_categories(df['sku_no'].cat.categories.sort_values())
+        codes = keys.cat.codes.to_numpy()
+        observed = np.flatnonzero(np.bincount(codes, minlength=len(keys.cat.categories)))
+        
+        merged_df = df[first_only].groupby(keys, observed=True).first().reset_index()
+        
+        # 日期列直接按编码累加，非数值视为0
+        block = df[date_cols]
+        if not all(pd.api.types.is_numeric_dtype(dtype) for dtype in block.dtypes):
+            block = block.apply(pd.to_numeric, errors='coerce')
+        values = block.to_numpy(dtype=float)
+        values = np.where(np.isnan(values), 0.0, values)
+        sums = np.zeros((len(observed), len(date_cols)))
+        for j in range(len(date_cols)):
+            sums[:, j] = np.bincount(codes, weights=values[:, j], minlength=len(keys.cat.categories))[observed]
+        merged_df = pd.concat([merged_df, pd.DataFrame(sums, columns=date_cols)], axis=1)
+        
+        return merged_df[keep_cols]
         
     def _save_result(self, df, output_path):
         """保存结果"""
-        df.to_excel(output_path, index=False, sheet_name='汇总')
+        return write_table(df, output_path, self.formats, sheet_name='汇总')
         
     def _log_results(self, original_df, merged_df, duplicates):
         """记录处理结果"""
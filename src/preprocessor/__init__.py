@@ -0,0 +1,42 @@
+"""Excel预处理器"""
+
+import logging
+from datetime import date
+from typing import Optional
+from src.core.config import config
+from src.core.exceptions import ConfigurationError, ExcelOperationError
+from src.utils.excel_context import COM_AVAILABLE
+from .excel_preprocessor import ExcelPreprocessor
+from .openpyxl_preprocessor import OpenpyxlPreprocessor
+
+PREPROCESS_BACKENDS = ('auto', 'com', 'openpyxl')
+
+def create_preprocessor(backend: Optional[str] = None, today: Optional[date] = None):
+    """
+    创建预处理器
+
+    Args:
+        backend: 预处理后端，auto/com/openpyxl，为None时使用配置 excel.preprocess_backend。
+            auto在Excel COM可用时使用COM，否则使用openpyxl
+        today: openpyxl后端计算公式时TODAY()使用的日期，默认为当天；
+            COM后端由Excel按系统日期计算
+
+    Returns:
+        具有process(input_file)方法的预处理器
+
+    Raises:
+        ConfigurationError: 后端名称无效时抛出
+        ExcelOperationError: 指定COM后端但当前环境不可用时抛出
+    """
+    backend = backend or config.get('excel.preprocess_backend', 'auto')
+    if backend not in PREPROCESS_BACKENDS:
+        raise ConfigurationError(f"无效的预处理后端: {backend}，可选: {', '.join(PREPROCESS_BACKENDS)}")
+
+    if backend == 'com' and not COM_AVAILABLE:
+        raise ExcelOperationError("预处理后端为com，但当前环境不支持Excel COM")
+
+    if backend == 'com' or (backend == 'auto' and COM_AVAILABLE):
+        return ExcelPreprocessor()
+
+    logging.getLogger(__name__).debug("使用openpyxl预处理后端")
+    return OpenpyxlPreprocessor(today)
\ No newline at end of file
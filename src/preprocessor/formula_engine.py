@@ -0,0 +1,1159 @@
+"""公式计算引擎模块
+
+部分工具生成的工作簿不保存公式的计算结果，openpyxl以data_only方式读取时这些单元格为None。
+本模块在进程内计算这类公式，覆盖到货计划中用到的函数：四则运算、SUM/SUMIF(S)、
+VLOOKUP/INDEX/MATCH、IF以及日期函数。
+
+只计算从指定工作表可达的、缺少缓存结果的公式单元格：先从目标工作表出发构建依赖图，
+再按拓扑顺序计算，已有缓存结果的单元格直接使用缓存值。
+"""
+
+import bisect
+import calendar
+import logging
+import math
+import re
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal, ROUND_HALF_UP, ROUND_UP, ROUND_DOWN
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from openpyxl import load_workbook
+from openpyxl.formula import Tokenizer
+from openpyxl.formula.tokenizer import Token
+from openpyxl.utils.cell import range_boundaries
+from openpyxl.utils.datetime import to_excel, from_excel
+
+logger = logging.getLogger(__name__)
+
+ERROR_CODES = ('#NULL!', '#DIV/0!', '#VALUE!', '#REF!', '#NAME?', '#NUM!', '#N/A')
+
+# 中缀运算符的结合优先级（数值越大越先计算）
+_INFIX_PRECEDENCE = {
+    '=': 1, '<>': 1, '<': 1, '>': 1, '<=': 1, '>=': 1,
+    '&': 2,
+    '+': 3, '-': 3,
+    '*': 4, '/': 4,
+    '^': 5,
+}
+_POSTFIX_PRECEDENCE = 6
+_PREFIX_PRECEDENCE = 7
+
+class FormulaError(Exception):
+    """公式计算得到Excel错误值（如 #N/A），作为结果写入单元格"""
+
+    def __init__(self, code: str):
+        super().__init__(code)
+        self.code = code
+
+class UnsupportedFormula(Exception):
+    """公式中包含引擎不支持的语法或函数，对应单元格保持为空"""
+    pass
+
+class CellRange:
+    """单元格区域的值"""
+
+    def __init__(self, rows: List[list]):
+        self.rows = rows
+        self._values = None
+
+    @property
+    def height(self) -> int:
+        return len(self.rows)
+
+    @property
+    def width(self) -> int:
+        return len(self.rows[0]) if self.rows else 0
+
+    def values(self) -> list:
+        """按行展开的所有值"""
+        if self._values is None:
+            self._values = [value for row in self.rows for value in row]
+        return self._values
+
+    def vector(self) -> list:
+        """单行或单列区域的值"""
+        if self.height == 1:
+            return list(self.rows[0])
+        if self.width == 1:
+            return [row[0] for row in self.rows]
+        raise FormulaError('#N/A')
+
+def read_formulas(input_file: Path) -> Dict[str, Dict[Tuple[int, int], str]]:
+    """
+    读取工作簿中所有公式
+
+    Returns:
+        {工作表名: {(行, 列): 公式文本}}
+    """
+    workbook = load_workbook(input_file, read_only=True, data_only=False)
+    try:
+        formulas = {}
+        for ws in workbook.worksheets:
+            sheet_formulas = {}
+            for row in ws.iter_rows():
+                for cell in row:
+                    if cell.data_type != 'f':
+                        continue
+                    value = cell.value
+                    # 数组公式读取为ArrayFormula对象
+                    text = value if isinstance(value, str) else getattr(value, 'text', None)
+                    if text:
+                        sheet_formulas[(cell.row, cell.column)] = text
+            formulas[ws.title] = sheet_formulas
+        return formulas
+    finally:
+        workbook.close()
+
+class FormulaEngine:
+    """
+    计算缺少缓存结果的公式
+
+    Args:
+        workbook: 以data_only方式加载的工作簿，计算结果直接写回该工作簿
+        formulas: read_formulas 的返回值
+        today: TODAY() 使用的日期，默认为当天
+        date_formats: DATEVALUE 解析文本日期时尝试的格式
+    """
+
+    def __init__(
+        self,
+        workbook,
+        formulas: Dict[str, Dict[Tuple[int, int], str]],
+        today: Optional[date] = None,
+        date_formats: Optional[List[str]] = None
+    ):
+        self.workbook = workbook
+        self.formulas = formulas
+        self.today = today or date.today()
+        self.date_formats = date_formats or ['%Y-%m-%d', '%Y/%m/%d']
+        self._grids: Dict[str, List[list]] = {}
+        self._bounds: Dict[str, Tuple[int, int]] = {}
+        self._parsed: Dict[Tuple[str, int, int], tuple] = {}
+        # 不含待计算单元格的区域值不会再变化，可以缓存区域值和查找索引
+        self._ranges: Dict[tuple, CellRange] = {}
+        self._indexes: Dict[tuple, dict] = {}
+        # 缺少缓存结果的公式单元格：{工作表: {列: 有序行号列表}}
+        self._missing: Dict[str, Dict[int, List[int]]] = {}
+        self._find_missing()
+
+    def evaluate(self, sheet_names: List[str]) -> int:
+        """
+        计算从指定工作表可达的缺失公式，并写回工作簿
+
+        Args:
+            sheet_names: 需要得到完整结果的工作表
+
+        Returns:
+            成功计算的单元格数
+        """
+        order = self._evaluation_order(sheet_names)
+        computed = 0
+        unsupported = set()
+        for key in order:
+            sheet, row, col = key
+            try:
+                value = self._evaluate_cell(key)
+            except UnsupportedFormula as e:
+                unsupported.add(str(e))
+                continue
+            self._store(sheet, row, col, value)
+            computed += 1
+
+        for reason in sorted(unsupported):
+            logger.warning(f"公式无法计算，单元格保持为空: {reason}")
+        if computed:
+            logger.info(f"已计算 {computed} 个缺少缓存结果的公式单元格")
+        return computed
+
+    # ---------- 依赖图 ----------
+
+    def _find_missing(self) -> None:
+        for sheet, cells in self.formulas.items():
+            if sheet not in self.workbook.sheetnames:
+                continue
+            grid = self._grid(sheet)
+            columns: Dict[int, List[int]] = {}
+            for row, col in cells:
+                if self._grid_value(grid, row, col) is None:
+                    columns.setdefault(col, []).append(row)
+            for rows in columns.values():
+                rows.sort()
+            if columns:
+                self._missing[sheet] = columns
+
+    def _missing_in(self, ref: tuple):
+        """区域内缺少缓存结果的公式单元格"""
+        _, sheet, min_col, min_row, max_col, max_row = ref
+        for col, rows in self._missing.get(sheet, {}).items():
+            if min_col <= col <= max_col:
+                start = bisect.bisect_left(rows, min_row)
+                end = bisect.bisect_right(rows, max_row)
+                for row in rows[start:end]:
+                    yield (sheet, row, col)
+
+    def _dependencies(self, key: tuple) -> list:
+        try:
+            node = self._parse_cell(key)
+        except UnsupportedFormula:
+            return []
+        deps = []
+        for ref in _collect_refs(node):
+            deps.extend(self._missing_in(ref))
+        return deps
+
+    def _evaluation_order(self, sheet_names: List[str]) -> list:
+        """从目标工作表出发，按依赖关系深度优先得到计算顺序，循环引用的单元格被跳过"""
+        roots = []
+        for sheet in sheet_names:
+            for col, rows in self._missing.get(sheet, {}).items():
+                roots.extend((sheet, row, col) for row in rows)
+
+        state: Dict[tuple, int] = {}  # 1: 访问中, 2: 已完成
+        order = []
+        cyclic = set()
+        for root in roots:
+            if root in state:
+                continue
+            stack = [(root, iter(self._dependencies(root)))]
+            state[root] = 1
+            while stack:
+                key, deps = stack[-1]
+                for dep in deps:
+                    if dep not in state:
+                        state[dep] = 1
+                        stack.append((dep, iter(self._dependencies(dep))))
+                        break
+                    if state[dep] == 1:
+                        cyclic.add(dep)
+                else:
+                    stack.pop()
+                    state[key] = 2
+                    order.append(key)
+
+        if cyclic:
+            logger.warning(f"存在循环引用，以下单元格不计算: {', '.join(f'{s}!{r},{c}' for s, r, c in sorted(cyclic))}")
+        return [key for key in order if key not in cyclic]
+
+    # ---------- 单元格值 ----------
+
+    def _grid(self, sheet: str) -> List[list]:
+        grid = self._grids.get(sheet)
+        if grid is None:
+            grid = [list(row) for row in self.workbook[sheet].iter_rows(values_only=True)]
+            self._grids[sheet] = grid
+        return grid
+
+    @staticmethod
+    def _grid_value(grid: List[list], row: int, col: int):
+        if row <= len(grid):
+            values = grid[row - 1]
+            if col <= len(values):
+                return values[col - 1]
+        return None
+
+    def _store(self, sheet: str, row: int, col: int, value) -> None:
+        if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+            value = int(value)
+        grid = self._grid(sheet)
+        while len(grid) < row:
+            grid.append([])
+        values = grid[row - 1]
+        if len(values) < col:
+            values.extend([None] * (col - len(values)))
+        values[col - 1] = value
+        self.workbook[sheet].cell(row=row, column=col).value = value
+        self._remove_missing(sheet, row, col)
+
+    def _remove_missing(self, sheet: str, row: int, col: int) -> None:
+        rows = self._missing.get(sheet, {}).get(col)
+        if rows:
+            i = bisect.bisect_left(rows, row)
+            if i < len(rows) and rows[i] == row:
+                del rows[i]
+
+    def _read_range(self, ref: tuple) -> CellRange:
+        _, sheet, min_col, min_row, max_col, max_row = ref
+        grid = self._grid(sheet)
+        rows = []
+        for row in range(min_row, max_row + 1):
+            values = grid[row - 1] if row <= len(grid) else []
+            selected = values[min_col - 1:max_col]
+            if len(selected) < max_col - min_col + 1:
+                selected = list(selected) + [None] * (max_col - min_col + 1 - len(selected))
+            rows.append(selected)
+        return CellRange(rows)
+
+    def _cached_range(self, ref: tuple) -> CellRange:
+        values = self._ranges.get(ref)
+        if values is None:
+            values = self._read_range(ref)
+            if next(self._missing_in(ref), None) is None:
+                self._ranges[ref] = values
+        return values
+
+    def value_index(self, node: tuple, first_only: bool) -> Optional[dict]:
+        """
+        区域值到位置的哈希索引，用于精确匹配的SUMIF/COUNTIF和VLOOKUP/MATCH
+
+        Args:
+            node: 区域参数，不是直接引用或区域中仍有待计算单元格时返回None
+            first_only: True时返回 {键: 第一个位置}，否则返回 {键: [所有位置]}
+        """
+        if node[0] != 'ref':
+            return None
+        key = (node, first_only)
+        index = self._indexes.get(key)
+        if index is not None:
+            return index
+        values = self._cached_range(node)
+        if node not in self._ranges:
+            return None
+        # 单列/单行区域按向量位置，其他区域按行展开位置
+        items = values.vector() if first_only else values.values()
+        index = {}
+        for position, value in enumerate(items):
+            for value_key in _index_keys(value, numeric_text=not first_only):
+                if first_only:
+                    index.setdefault(value_key, position)
+                else:
+                    index.setdefault(value_key, []).append(position)
+        self._indexes[key] = index
+        return index
+
+    # ---------- 解析 ----------
+
+    def _parse_cell(self, key: tuple) -> tuple:
+        node = self._parsed.get(key)
+        if node is None:
+            sheet, row, col = key
+            node = _Parser(self.formulas[sheet][(row, col)], sheet, self).parse()
+            self._parsed[key] = node
+        return node
+
+    def sheet_bounds(self, sheet: str) -> Tuple[int, int]:
+        """工作表的最大行、列，用于整行/整列引用"""
+        if sheet not in self.workbook.sheetnames:
+            raise UnsupportedFormula(f"引用了不存在的工作表: {sheet}")
+        bounds = self._bounds.get(sheet)
+        if bounds is None:
+            ws = self.workbook[sheet]
+            bounds = self._bounds[sheet] = (max(ws.max_row, 1), max(ws.max_column, 1))
+        return bounds
+
+    # ---------- 计算 ----------
+
+    def _evaluate_cell(self, key: tuple):
+        node = self._parse_cell(key)
+        try:
+            value = self.eval(node)
+            if isinstance(value, CellRange):
+                value = self._single(value)
+            _raise_if_error(value)
+        except FormulaError as e:
+            return e.code
+        # 引用空单元格的公式在Excel中显示为0
+        return 0 if value is None else value
+
+    def eval(self, node: tuple):
+        kind = node[0]
+        if kind == 'value':
+            return node[1]
+        if kind == 'error':
+            raise FormulaError(node[1])
+        if kind == 'ref':
+            return self._cached_range(node)
+        if kind == 'func':
+            return self._call(node[1], node[2])
+        if kind == 'neg':
+            return -_to_number(self.scalar(node[1]))
+        if kind == 'percent':
+            return _to_number(self.scalar(node[1])) / 100
+        if kind == 'binop':
+            return _binary(node[1], self.scalar(node[2]), self.scalar(node[3]))
+        raise UnsupportedFormula(f"未知节点: {kind}")
+
+    def scalar(self, node: tuple):
+        """计算结果必须为单个值的参数"""
+        value = self.eval(node)
+        if isinstance(value, CellRange):
+            value = self._single(value)
+        _raise_if_error(value)
+        return value
+
+    def range(self, node: tuple) -> CellRange:
+        """计算结果为区域的参数，单个值视为1×1区域"""
+        value = self.eval(node)
+        if isinstance(value, CellRange):
+            return value
+        return CellRange([[value]])
+
+    @staticmethod
+    def _single(value: CellRange):
+        if value.height == 1 and value.width == 1:
+            return value.rows[0][0]
+        raise FormulaError('#VALUE!')
+
+    def _call(self, name: str, args: list):
+        function = _FUNCTIONS.get(name)
+        if function is None:
+            raise UnsupportedFormula(f"不支持的函数 {name}")
+        return function(self, args)
+
+class _Parser:
+    """将公式文本解析为语法树"""
+
+    def __init__(self, formula: str, sheet: str, engine: FormulaEngine):
+        self.formula = formula
+        self.sheet = sheet
+        self.engine = engine
+        try:
+            items = Tokenizer(formula).items
+        except Exception as e:
+            raise UnsupportedFormula(f"{formula}（{e}）")
+        self.tokens = [t for t in items if t.type != Token.WSPACE]
+        self.pos = 0
+
+    def parse(self) -> tuple:
+        if not self.tokens:
+            raise UnsupportedFormula(self.formula)
+        node = self._expression(0)
+        if self.pos != len(self.tokens):
+            raise UnsupportedFormula(self.formula)
+        return node
+
+    def _next(self) -> Token:
+        if self.pos >= len(self.tokens):
+            raise UnsupportedFormula(self.formula)
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def _peek(self) -> Optional[Token]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _expression(self, min_precedence: int) -> tuple:
+        node = self._primary()
+        while True:
+            token = self._peek()
+            if token is None:
+                return node
+            if token.type == Token.OP_POST:
+                if _POSTFIX_PRECEDENCE < min_precedence:
+                    return node
+                self.pos += 1
+                node = ('percent', node)
+            elif token.type == Token.OP_IN and token.value in _INFIX_PRECEDENCE:
+                precedence = _INFIX_PRECEDENCE[token.value]
+                if precedence < min_precedence:
+                    return node
+                self.pos += 1
+                right = self._expression(precedence + 1)
+                node = ('binop', token.value, node, right)
+            elif token.type == Token.OP_IN:
+                # 区域交集、区域联合等运算不支持
+                raise UnsupportedFormula(self.formula)
+            else:
+                return node
+
+    def _primary(self) -> tuple:
+        token = self._next()
+        if token.type == Token.OPERAND:
+            return self._operand(token)
+        if token.type == Token.FUNC and token.subtype == Token.OPEN:
+            return self._function(token.value[:-1].upper())
+        if token.type == Token.PAREN and token.subtype == Token.OPEN:
+            node = self._expression(0)
+            closing = self._next()
+            if closing.type != Token.PAREN:
+                raise UnsupportedFormula(self.formula)
+            return node
+        if token.type == Token.OP_PRE:
+            operand = self._expression(_PREFIX_PRECEDENCE)
+            return ('neg', operand) if token.value == '-' else operand
+        raise UnsupportedFormula(self.formula)
+
+    def _function(self, name: str) -> tuple:
+        if name.startswith('_XLFN.'):
+            name = name[len('_XLFN.'):]
+        args = []
+        token = self._peek()
+        if token is not None and token.type == Token.FUNC and token.subtype == Token.CLOSE:
+            self.pos += 1
+            return ('func', name, args)
+        while True:
+            token = self._peek()
+            if token is not None and (token.type == Token.SEP or
+                                      (token.type == Token.FUNC and token.subtype == Token.CLOSE)):
+                args.append(('value', None))
+            else:
+                args.append(self._expression(0))
+            token = self._next()
+            if token.type == Token.FUNC and token.subtype == Token.CLOSE:
+                return ('func', name, args)
+            if token.type != Token.SEP or token.subtype != Token.ARG:
+                raise UnsupportedFormula(self.formula)
+
+    def _operand(self, token: Token) -> tuple:
+        value = token.value
+        if token.subtype == Token.NUMBER:
+            number = float(value)
+            return ('value', int(number) if number.is_integer() else number)
+        if token.subtype == Token.TEXT:
+            return ('value', value[1:-1].replace('""', '"'))
+        if token.subtype == Token.LOGICAL:
+            return ('value', value.upper() == 'TRUE')
+        if token.subtype == Token.ERROR:
+            return ('error', value)
+        return self._reference(value)
+
+    def _reference(self, text: str) -> tuple:
+        sheet = self.sheet
+        if '!' in text:
+            sheet, text = text.rsplit('!', 1)
+            if sheet.startswith("'") and sheet.endswith("'"):
+                sheet = sheet[1:-1].replace("''", "'")
+            if sheet.startswith('['):
+                raise UnsupportedFormula(f"{self.formula}（外部工作簿引用）")
+        try:
+            min_col, min_row, max_col, max_row = range_boundaries(text.replace('$', ''))
+        except (ValueError, TypeError):
+            # 定义名称等无法识别的引用
+            raise UnsupportedFormula(f"{self.formula}（无法识别的引用 {text}）")
+        if None in (min_col, min_row, max_col, max_row):
+            sheet_rows, sheet_cols = self.engine.sheet_bounds(sheet)
+            min_col, min_row = min_col or 1, min_row or 1
+            max_col, max_row = max_col or sheet_cols, max_row or sheet_rows
+        return ('ref', sheet, min_col, min_row, max_col, max_row)
+
+def _collect_refs(node: tuple):
+    """语法树中的所有引用"""
+    kind = node[0]
+    if kind == 'ref':
+        yield node
+    elif kind == 'func':
+        for arg in node[2]:
+            yield from _collect_refs(arg)
+    elif kind in ('neg', 'percent'):
+        yield from _collect_refs(node[1])
+    elif kind == 'binop':
+        yield from _collect_refs(node[2])
+        yield from _collect_refs(node[3])
+
+# ---------- 类型转换与运算 ----------
+
+def _is_error(value) -> bool:
+    return isinstance(value, str) and value in ERROR_CODES
+
+def _raise_if_error(value) -> None:
+    if _is_error(value):
+        raise FormulaError(value)
+
+def _to_number(value) -> float:
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, (datetime, date, time, timedelta)):
+        return to_excel(value)
+    if isinstance(value, str):
+        _raise_if_error(value)
+        try:
+            return float(value.strip())
+        except ValueError:
+            raise FormulaError('#VALUE!')
+    raise FormulaError('#VALUE!')
+
+def _to_text(value) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, (datetime, date)):
+        return _to_text(to_excel(value))
+    return str(value)
+
+def _to_bool(value) -> bool:
+    if value is None:
+        return False
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        if value.upper() in ('TRUE', 'FALSE'):
+            return value.upper() == 'TRUE'
+        raise FormulaError('#VALUE!')
+    return _to_number(value) != 0
+
+def _is_numeric(value) -> bool:
+    return isinstance(value, (int, float, datetime, date, time, timedelta)) and not isinstance(value, bool)
+
+def _type_rank(value) -> int:
+    """Excel比较不同类型时的顺序：数字 < 文本 < 逻辑值"""
+    if isinstance(value, bool):
+        return 2
+    if isinstance(value, str):
+        return 1
+    return 0
+
+def _compare(left, right) -> int:
+    # 空单元格按另一侧的类型视为0、空文本或FALSE
+    if left is None:
+        left = '' if isinstance(right, str) else (False if isinstance(right, bool) else 0)
+    if right is None:
+        right = '' if isinstance(left, str) else (False if isinstance(left, bool) else 0)
+    left_rank, right_rank = _type_rank(left), _type_rank(right)
+    if left_rank != right_rank:
+        return -1 if left_rank < right_rank else 1
+    if left_rank == 1:
+        left, right = left.lower(), right.lower()
+    elif left_rank == 0:
+        left, right = _to_number(left), _to_number(right)
+    return (left > right) - (left < right)
+
+def _binary(op: str, left, right):
+    if op == '&':
+        return _to_text(left) + _to_text(right)
+    if op in ('=', '<>', '<', '>', '<=', '>='):
+        result = _compare(left, right)
+        return {
+            '=': result == 0, '<>': result != 0,
+            '<': result < 0, '>': result > 0,
+            '<=': result <= 0, '>=': result >= 0,
+        }[op]
+    left, right = _to_number(left), _to_number(right)
+    if op == '+':
+        return left + right
+    if op == '-':
+        return left - right
+    if op == '*':
+        return left * right
+    if op == '/':
+        if right == 0:
+            raise FormulaError('#DIV/0!')
+        return left / right
+    if op == '^':
+        try:
+            return math.pow(left, right)
+        except (ValueError, OverflowError):
+            raise FormulaError('#NUM!')
+    raise UnsupportedFormula(f"不支持的运算符 {op}")
+
+def _wildcard_pattern(text: str):
+    """将Excel通配符（* ? ~）转换为正则表达式，不含通配符时返回None"""
+    if not re.search(r'(?<!~)[*?]', text):
+        return None
+    pattern = ''
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if char == '~' and i + 1 < len(text):
+            pattern += re.escape(text[i + 1])
+            i += 2
+            continue
+        pattern += '.*' if char == '*' else ('.' if char == '?' else re.escape(char))
+        i += 1
+    return re.compile(pattern, re.IGNORECASE | re.DOTALL)
+
+def _text_equal(value, text: str) -> bool:
+    if not isinstance(value, str):
+        return False
+    pattern = _wildcard_pattern(text)
+    if pattern is not None:
+        return pattern.fullmatch(value) is not None
+    return value.lower() == text.replace('~*', '*').replace('~?', '?').lower()
+
+def _index_keys(value, numeric_text: bool) -> list:
+    """
+    值在哈希索引中的键：文本不区分大小写，数字统一为float
+
+    Args:
+        numeric_text: 数字文本是否同时按数字建立索引（SUMIF等条件匹配的规则）
+    """
+    if value is None:
+        return []
+    if isinstance(value, bool):
+        return [('b', value)]
+    if isinstance(value, str):
+        keys = [('s', value.lower())]
+        if numeric_text:
+            number = _parse_float(value)
+            if number is not None:
+                keys.append(('n', number))
+        return keys
+    if _is_numeric(value):
+        return [('n', float(_to_number(value)))]
+    return []
+
+def _exact_criteria_key(criteria) -> Optional[tuple]:
+    """精确相等且不含通配符的条件对应的索引键，其他条件返回None"""
+    if isinstance(criteria, bool):
+        return None
+    if not isinstance(criteria, str):
+        return ('n', float(_to_number(criteria if criteria is not None else 0)))
+    if criteria.startswith('='):
+        criteria = criteria[1:]
+    elif re.match(r'^(<|>)', criteria):
+        return None
+    if criteria == '' or re.search(r'[*?~]', criteria):
+        return None
+    number = _parse_float(criteria)
+    return ('n', number) if number is not None else ('s', criteria.lower())
+
+def _criteria(criteria):
+    """将SUMIF/COUNTIF条件转换为判断函数"""
+    if not isinstance(criteria, str):
+        if criteria is None:
+            criteria = 0
+        target = _to_number(criteria)
+        return lambda value: _is_numeric(value) and _to_number(value) == target or (
+            isinstance(value, str) and _parse_float(value) == target)
+
+    match = re.match(r'^(<=|>=|<>|<|>|=)?(.*)$', criteria, re.DOTALL)
+    op, operand = match.group(1), match.group(2)
+    number = _parse_float(operand)
+
+    if op in ('<', '>', '<=', '>='):
+        if number is not None:
+            return lambda value: _is_numeric(value) and _binary(op, _to_number(value), number)
+        return lambda value: isinstance(value, str) and _binary(op, value, operand)
+
+    negate = op == '<>'
+    if operand == '':
+        # "=" 匹配空单元格，"<>" 匹配非空单元格，空条件匹配空单元格
+        matches = lambda value: value is None or value == ''
+    elif number is not None:
+        matches = lambda value: (_is_numeric(value) and _to_number(value) == number) or (
+            isinstance(value, str) and _parse_float(value) == number)
+    else:
+        matches = lambda value: _text_equal(value, operand)
+    return (lambda value: not matches(value)) if negate else matches
+
+def _parse_float(text: str) -> Optional[float]:
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return None
+
+# ---------- 函数 ----------
+
+def _numbers(engine: FormulaEngine, args: list) -> list:
+    """汇总函数的数值参数：区域中只取数字，直接参数转换为数字"""
+    numbers = []
+    for arg in args:
+        value = engine.eval(arg)
+        if isinstance(value, CellRange):
+            for item in value.values():
+                _raise_if_error(item)
+                if _is_numeric(item):
+                    numbers.append(_to_number(item))
+        else:
+            numbers.append(_to_number(value))
+    return numbers
+
+def _fn_sum(engine, args):
+    return sum(_numbers(engine, args))
+
+def _fn_average(engine, args):
+    numbers = _numbers(engine, args)
+    if not numbers:
+        raise FormulaError('#DIV/0!')
+    return sum(numbers) / len(numbers)
+
+def _fn_min(engine, args):
+    return min(_numbers(engine, args), default=0)
+
+def _fn_max(engine, args):
+    return max(_numbers(engine, args), default=0)
+
+def _fn_count(engine, args):
+    return len(_numbers(engine, args))
+
+def _fn_counta(engine, args):
+    count = 0
+    for arg in args:
+        value = engine.eval(arg)
+        if isinstance(value, CellRange):
+            count += sum(1 for item in value.values() if item is not None)
+        else:
+            count += 1
+    return count
+
+def _matching_positions(engine, pairs: list) -> Tuple[List[int], int, int]:
+    """
+    按条件区域和条件计算同时满足所有条件的位置（按行展开），所有条件区域形状必须一致
+
+    精确相等的条件通过哈希索引直接取得位置，不逐个比较区域中的值。
+    """
+    positions = None
+    shape = None
+    for range_node, criteria_node in pairs:
+        values = engine.range(range_node)
+        if shape is None:
+            shape = (values.height, values.width)
+        elif shape != (values.height, values.width):
+            raise FormulaError('#VALUE!')
+        criteria = engine.scalar(criteria_node)
+        criteria_key = _exact_criteria_key(criteria)
+        index = engine.value_index(range_node, first_only=False) if criteria_key else None
+        if index is not None:
+            matched = set(index.get(criteria_key, ()))
+        else:
+            predicate = _criteria(criteria)
+            matched = {i for i, value in enumerate(values.values()) if predicate(value)}
+        positions = matched if positions is None else positions & matched
+    return sorted(positions), shape[0], shape[1]
+
+def _sum_positions(values: CellRange, positions: List[int], width: int) -> float:
+    """按条件区域中的位置对求和区域中对应的单元格求和"""
+    total = 0
+    for position in positions:
+        row, col = divmod(position, width)
+        value = values.rows[row][col]
+        _raise_if_error(value)
+        if _is_numeric(value):
+            total += _to_number(value)
+    return total
+
+def _fn_sumif(engine, args):
+    if len(args) not in (2, 3):
+        raise FormulaError('#VALUE!')
+    positions, height, width = _matching_positions(engine, [(args[0], args[1])])
+    if len(args) == 3 and args[2] != ('value', None):
+        # 求和区域以左上角为准，大小与条件区域一致
+        sum_range = engine.range(args[2])
+        if sum_range.height < height or sum_range.width < width:
+            raise FormulaError('#VALUE!')
+    else:
+        sum_range = engine.range(args[0])
+    return _sum_positions(sum_range, positions, width)
+
+def _fn_sumifs(engine, args):
+    if len(args) < 3 or len(args) % 2 == 0:
+        raise FormulaError('#VALUE!')
+    sum_range = engine.range(args[0])
+    positions, height, width = _matching_positions(engine, list(zip(args[1::2], args[2::2])))
+    if (sum_range.height, sum_range.width) != (height, width):
+        raise FormulaError('#VALUE!')
+    return _sum_positions(sum_range, positions, width)
+
+def _fn_countif(engine, args):
+    if len(args) != 2:
+        raise FormulaError('#VALUE!')
+    return len(_matching_positions(engine, [(args[0], args[1])])[0])
+
+def _fn_countifs(engine, args):
+    if not args or len(args) % 2:
+        raise FormulaError('#VALUE!')
+    return len(_matching_positions(engine, list(zip(args[0::2], args[1::2])))[0])
+
+def _fn_if(engine, args):
+    if not 1 <= len(args) <= 3:
+        raise FormulaError('#VALUE!')
+    if _to_bool(engine.scalar(args[0])):
+        return engine.eval(args[1]) if len(args) > 1 else True
+    return engine.eval(args[2]) if len(args) > 2 else False
+
+def _fn_iferror(engine, args):
+    if len(args) != 2:
+        raise FormulaError('#VALUE!')
+    try:
+        return engine.scalar(args[0])
+    except FormulaError:
+        return engine.eval(args[1])
+
+def _fn_ifna(engine, args):
+    if len(args) != 2:
+        raise FormulaError('#VALUE!')
+    try:
+        return engine.scalar(args[0])
+    except FormulaError as e:
+        if e.code != '#N/A':
+            raise
+        return engine.eval(args[1])
+
+def _logical_values(engine, args) -> List[bool]:
+    values = []
+    for arg in args:
+        value = engine.eval(arg)
+        if isinstance(value, CellRange):
+            values.extend(_to_bool(item) for item in value.values()
+                          if isinstance(item, (bool, int, float)))
+        else:
+            values.append(_to_bool(value))
+    if not values:
+        raise FormulaError('#VALUE!')
+    return values
+
+def _fn_and(engine, args):
+    return all(_logical_values(engine, args))
+
+def _fn_or(engine, args):
+    return any(_logical_values(engine, args))
+
+def _fn_not(engine, args):
+    if len(args) != 1:
+        raise FormulaError('#VALUE!')
+    return not _to_bool(engine.scalar(args[0]))
+
+def _round(engine, args, rounding):
+    if len(args) not in (1, 2):
+        raise FormulaError('#VALUE!')
+    number = _to_number(engine.scalar(args[0]))
+    digits = int(_to_number(engine.scalar(args[1]))) if len(args) == 2 else 0
+    # Excel的ROUND为四舍五入（远离0），不是银行家舍入
+    result = Decimal(repr(number)).quantize(Decimal(1).scaleb(-digits), rounding=rounding)
+    return float(result)
+
+def _fn_round(engine, args):
+    return _round(engine, args, ROUND_HALF_UP)
+
+def _fn_roundup(engine, args):
+    return _round(engine, args, ROUND_UP)
+
+def _fn_rounddown(engine, args):
+    return _round(engine, args, ROUND_DOWN)
+
+def _fn_int(engine, args):
+    if len(args) != 1:
+        raise FormulaError('#VALUE!')
+    return math.floor(_to_number(engine.scalar(args[0])))
+
+def _fn_abs(engine, args):
+    if len(args) != 1:
+        raise FormulaError('#VALUE!')
+    return abs(_to_number(engine.scalar(args[0])))
+
+def _fn_concatenate(engine, args):
+    return ''.join(_to_text(engine.scalar(arg)) for arg in args)
+
+def _lookup_equal(value, lookup) -> bool:
+    if isinstance(lookup, str):
+        return _text_equal(value, lookup)
+    if value is None or isinstance(value, str):
+        return False
+    return _type_rank(value) == _type_rank(lookup) and _compare(value, lookup) == 0
+
+def _exact_position(engine, node: tuple, values, lookup) -> Optional[int]:
+    """
+    精确匹配的位置，查找值不含通配符时使用哈希索引
+
+    Args:
+        values: 返回查找向量的函数，只在无法使用索引时调用
+    """
+    if not (isinstance(lookup, str) and re.search(r'[*?~]', lookup)):
+        keys = _index_keys(lookup, numeric_text=False)
+        index = engine.value_index(node, first_only=True) if keys else None
+        if index is not None:
+            return index.get(keys[0])
+    return next((i for i, value in enumerate(values()) if _lookup_equal(value, lookup)), None)
+
+def _approximate_position(values: list, lookup, descending: bool = False) -> Optional[int]:
+    """近似匹配：升序时取不大于查找值的最后一个位置，降序时取不小于查找值的最后一个位置"""
+    position = None
+    for i, value in enumerate(values):
+        if value is None or _type_rank(value) != _type_rank(lookup):
+            continue
+        result = _compare(value, lookup)
+        if (result <= 0) if not descending else (result >= 0):
+            position = i
+        else:
+            break
+    return position
+
+def _fn_vlookup(engine, args):
+    if len(args) not in (3, 4):
+        raise FormulaError('#VALUE!')
+    lookup = engine.scalar(args[0])
+    table = engine.range(args[1])
+    col_index = int(_to_number(engine.scalar(args[2])))
+    approximate = _to_bool(engine.scalar(args[3])) if len(args) == 4 else True
+    if col_index < 1:
+        raise FormulaError('#VALUE!')
+    if col_index > table.width:
+        raise FormulaError('#REF!')
+
+    keys = lambda: [row[0] for row in table.rows]
+    if approximate:
+        position = _approximate_position(keys(), lookup)
+    else:
+        first_column = args[1]
+        if first_column[0] == 'ref':
+            _, sheet, min_col, min_row, _, max_row = first_column
+            first_column = ('ref', sheet, min_col, min_row, min_col, max_row)
+        position = _exact_position(engine, first_column, keys, lookup)
+    if position is None:
+        raise FormulaError('#N/A')
+    return table.rows[position][col_index - 1]
+
+def _fn_match(engine, args):
+    if len(args) not in (2, 3):
+        raise FormulaError('#VALUE!')
+    lookup = engine.scalar(args[0])
+    values = engine.range(args[1]).vector
+    match_type = int(_to_number(engine.scalar(args[2]))) if len(args) == 3 else 1
+    if match_type == 0:
+        position = _exact_position(engine, args[1], values, lookup)
+    else:
+        position = _approximate_position(values(), lookup, descending=match_type < 0)
+    if position is None:
+        raise FormulaError('#N/A')
+    return position + 1
+
+def _fn_index(engine, args):
+    if len(args) not in (2, 3):
+        raise FormulaError('#VALUE!')
+    table = engine.range(args[0])
+    row_num = int(_to_number(engine.scalar(args[1])))
+    col_num = int(_to_number(engine.scalar(args[2]))) if len(args) == 3 and args[2] != ('value', None) else None
+
+    # 单行区域只给一个序号时按列定位
+    if col_num is None:
+        if table.height == 1:
+            row_num, col_num = 1, row_num
+        else:
+            col_num = 1 if table.width == 1 else 0
+    if row_num < 0 or col_num < 0 or row_num > table.height or col_num > table.width:
+        raise FormulaError('#REF!')
+
+    # 序号为0时返回整行或整列
+    rows = table.rows if row_num == 0 else [table.rows[row_num - 1]]
+    if col_num == 0:
+        return CellRange([list(row) for row in rows])
+    return CellRange([[row[col_num - 1]] for row in rows])
+
+def _to_datetime(engine, value) -> datetime:
+    """将日期参数（序列号、日期或文本）转换为datetime"""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    if isinstance(value, str):
+        return _parse_date_text(engine, value)
+    number = _to_number(value)
+    if number < 0:
+        raise FormulaError('#NUM!')
+    return from_excel(number)
+
+def _parse_date_text(engine, text: str) -> datetime:
+    for fmt in engine.date_formats:
+        try:
+            return datetime.strptime(text.strip(), fmt)
+        except ValueError:
+            continue
+    raise FormulaError('#VALUE!')
+
+def _serial(value: datetime):
+    return to_excel(value)
+
+def _date_arg(engine, args, index: int = 0) -> datetime:
+    return _to_datetime(engine, engine.scalar(args[index]))
+
+def _add_months(value: datetime, months: int) -> datetime:
+    month_index = value.year * 12 + value.month - 1 + months
+    year, month = divmod(month_index, 12)
+    day = min(value.day, calendar.monthrange(year, month + 1)[1])
+    return datetime(year, month + 1, day)
+
+def _fn_date(engine, args):
+    if len(args) != 3:
+        raise FormulaError('#VALUE!')
+    year, month, day = (int(_to_number(engine.scalar(arg))) for arg in args)
+    # Excel将0-1899的年份视为1900年之后的偏移
+    if 0 <= year < 1900:
+        year += 1900
+    try:
+        first = _add_months(datetime(year, 1, 1), month - 1)
+        return _serial(first + timedelta(days=day - 1))
+    except (ValueError, OverflowError):
+        raise FormulaError('#NUM!')
+
+def _fn_today(engine, args):
+    return _serial(datetime(engine.today.year, engine.today.month, engine.today.day))
+
+def _fn_year(engine, args):
+    return _date_arg(engine, args).year
+
+def _fn_month(engine, args):
+    return _date_arg(engine, args).month
+
+def _fn_day(engine, args):
+    return _date_arg(engine, args).day
+
+def _fn_weekday(engine, args):
+    value = _date_arg(engine, args)
+    return_type = int(_to_number(engine.scalar(args[1]))) if len(args) > 1 else 1
+    weekday = value.weekday()  # 周一为0
+    if return_type == 1:
+        return (weekday + 1) % 7 + 1
+    if return_type == 2:
+        return weekday + 1
+    if return_type == 3:
+        return weekday
+    raise FormulaError('#NUM!')
+
+def _fn_edate(engine, args):
+    if len(args) != 2:
+        raise FormulaError('#VALUE!')
+    months = int(_to_number(engine.scalar(args[1])))
+    return _serial(_add_months(_date_arg(engine, args), months))
+
+def _fn_eomonth(engine, args):
+    if len(args) != 2:
+        raise FormulaError('#VALUE!')
+    months = int(_to_number(engine.scalar(args[1])))
+    value = _add_months(_date_arg(engine, args).replace(day=1), months)
+    return _serial(value.replace(day=calendar.monthrange(value.year, value.month)[1]))
+
+def _fn_datevalue(engine, args):
+    if len(args) != 1:
+        raise FormulaError('#VALUE!')
+    value = engine.scalar(args[0])
+    if not isinstance(value, str):
+        raise FormulaError('#VALUE!')
+    return _serial(_parse_date_text(engine, value))
+
+def _fn_days(engine, args):
+    if len(args) != 2:
+        raise FormulaError('#VALUE!')
+    return (_date_arg(engine, args, 0) - _date_arg(engine, args, 1)).days
+
+_FUNCTIONS = {
+    'SUM': _fn_sum,
+    'AVERAGE': _fn_average,
+    'MIN': _fn_min,
+    'MAX': _fn_max,
+    'COUNT': _fn_count,
+    'COUNTA': _fn_counta,
+    'SUMIF': _fn_sumif,
+    'SUMIFS': _fn_sumifs,
+    'COUNTIF': _fn_countif,
+    'COUNTIFS': _fn_countifs,
+    'IF': _fn_if,
+    'IFERROR': _fn_iferror,
+    'IFNA': _fn_ifna,
+    'AND': _fn_and,
+    'OR': _fn_or,
+    'NOT': _fn_not,
+    'ROUND': _fn_round,
+    'ROUNDUP': _fn_roundup,
+    'ROUNDDOWN': _fn_rounddown,
+    'INT': _fn_int,
+    'ABS': _fn_abs,
+    'CONCATENATE': _fn_concatenate,
+    'VLOOKUP': _fn_vlookup,
+    'MATCH': _fn_match,
+    'INDEX': _fn_index,
+    'DATE': _fn_date,
+    'TODAY': _fn_today,
+    'YEAR': _fn_year,
+    'MONTH': _fn_month,
+    'DAY': _fn_day,
+    'WEEKDAY': _fn_weekday,
+    'EDATE': _fn_edate,
+    'EOMONTH': _fn_eomonth,
+    'DATEVALUE': _fn_datevalue,
+    'DAYS': _fn_days,
+}
\ No newline at end of file
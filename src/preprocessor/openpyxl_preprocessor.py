@@ -0,0 +1,123 @@
+"""基于openpyxl的Excel预处理模块（不依赖Excel COM）"""
+
+import logging
+from datetime import date
+from pathlib import Path
+from typing import Optional
+from openpyxl import load_workbook
+from src.core.config import config
+from src.core.exceptions import FileOperationError, ExcelOperationError
+from src.utils.excel_utils import generate_output_path
+from src.preprocessor.formula_engine import FormulaEngine, read_formulas
+
+class OpenpyxlPreprocessor:
+    """
+    纯Python实现的Excel预处理器
+
+    与ExcelPreprocessor接口一致：读取公式的缓存结果将公式固化为值，
+    缺少缓存结果的公式由FormulaEngine计算，删除不需要的工作表后另存。
+    无需启动Excel进程，可在Linux上运行。
+    """
+
+    def __init__(self, today: Optional[date] = None):
+        """
+        Args:
+            today: 计算公式时TODAY()使用的日期，默认为当天
+        """
+        self.logger = logging.getLogger(__name__)
+        self.today = today
+
+    def process(self, input_file: Path) -> Path:
+        """
+        预处理Excel文件
+
+        Args:
+            input_file: 输入文件路径
+
+        Returns:
+            处理后的文件路径
+
+        Raises:
+            FileOperationError: 文件操作失败时抛出
+            ExcelOperationError: Excel操作失败时抛出
+        """
+        input_file = Path(input_file)
+        if not input_file.exists():
+            raise FileOperationError(f"输入文件不存在: {input_file}")
+
+        try:
+            # data_only模式下公式单元格读取为Excel保存的缓存结果
+            workbook = load_workbook(input_file, data_only=True)
+
+            # 1. 计算缺少缓存结果的公式
+            if config.get('excel.evaluate_formulas', True):
+                self._evaluate_formulas(input_file, workbook)
+
+            # 2. 删除不需要的工作表
+            self._remove_unused_sheets(workbook)
+
+            # 3. 保存结果
+            output_path = generate_output_path(
+                input_file,
+                Path(config.output_config['directory']),
+                config.output_config['suffixes']['preprocess']
+            )
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            workbook.save(output_path)
+            workbook.close()
+
+            self.logger.info(f"预处理完成，文件已保存至: {output_path}")
+            return output_path
+
+        except Exception as e:
+            self.logger.error(f"预处理失败: {str(e)}", exc_info=True)
+            if isinstance(e, (FileOperationError, ExcelOperationError)):
+                raise
+            raise ExcelOperationError(f"预处理失败: {str(e)}")
+
+    def _evaluate_formulas(self, input_file: Path, workbook) -> None:
+        """
+        计算从保留的工作表可达、但没有缓存结果的公式
+
+        Args:
+            input_file: 输入文件路径，用于读取公式文本
+            workbook: 以data_only方式加载的工作簿
+        """
+        sheets_to_keep = [name for name in config.excel_config['sheets_to_keep']
+                          if name in workbook.sheetnames] or workbook.sheetnames[:1]
+        engine = FormulaEngine(
+            workbook,
+            read_formulas(input_file),
+            date_formats=config.get('date.input_formats'),
+            today=self.today
+        )
+        engine.evaluate(sheets_to_keep)
+
+    def _remove_unused_sheets(self, workbook) -> None:
+        """
+        删除不需要的工作表
+
+        Args:
+            workbook: openpyxl工作簿对象
+
+        Raises:
+            ExcelOperationError: 缺少必需的工作表时抛出
+        """
+        sheets_to_keep = config.excel_config['sheets_to_keep']
+        sheet_names = workbook.sheetnames
+
+        for sheet_name in config.excel_config.get('required_sheets', []):
+            if sheet_name not in sheet_names:
+                raise ExcelOperationError(f"处理必需的工作表 {sheet_name} 失败: 工作表不存在")
+
+        # 如果没有找到任何需要保留的工作表，保留第一个工作表
+        if not any(name in sheets_to_keep for name in sheet_names):
+            self.logger.warning(f"未找到配置的工作表，已处理第一个工作表: {sheet_names[0]}")
+            sheets_to_keep = [sheet_names[0]]
+
+        for sheet_name in sheet_names:
+            if sheet_name in sheets_to_keep:
+                self.logger.info(f"已处理工作表: {sheet_name}")
+            else:
+                workbook.remove(workbook[sheet_name])
+                self.logger.debug(f"已删除工作表: {sheet_name}")
\ No newline at end of file
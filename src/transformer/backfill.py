@@ -0,0 +1,75 @@
+"""多个处理日期的回填模块"""
+
+from datetime import date, timedelta
+from typing import Dict, Iterator, Tuple
+import logging
+import pandas as pd
+from src.core.config import config
+from src.core.exceptions import ConfigurationError
+from src.transformer.horizon import HORIZON_DAYS, day_columns
+from src.transformer.reconciliation import reconcile
+from src.utils.trace import emit_table
+
+logger = logging.getLogger(__name__)
+
+def backfill_frames(
+    transformer,
+    merger,
+    sheets: Dict[str, pd.DataFrame],
+    start: date,
+    end: date
+) -> Iterator[Tuple[date, pd.DataFrame]]:
+    """
+    为 start..end 的每个处理日期生成合并后的结果
+
+    工作表只整理、累加和合并一次（在调用时完成）：以start为起点累加覆盖整个日期范围的
+    SKU × 天 宽表，每个处理日期的 day1..day60 是宽表中的一段连续列，迭代时依次切出。
+    对同一组工作表，结果与逐日转换和合并一致；工作表中由TODAY()计算的值不随处理日期变化。
+    宽表与源工作表的数量核对只做一次，结果保存在 transformer.reconciliation。
+
+    Args:
+        transformer: DeliveryPlanTransformer
+        merger: SKUMerger
+        sheets: read_sheets 读取的工作表
+        start: 第一个处理日期
+        end: 最后一个处理日期（包含）
+
+    Returns:
+        依次生成 (处理日期, 与 SKUMerger.merge_frame 结果一致的DataFrame) 的迭代器
+
+    Raises:
+        ConfigurationError: 结束日期早于开始日期时抛出
+    """
+    span = (end - start).days
+    if span < 0:
+        raise ConfigurationError(f"回填结束日期 {end} 早于开始日期 {start}")
+
+    skus = transformer.extract_sheet_skus(sheets)
+    codebook, meta, long_df = transformer.collect_sheets(sheets, skus)
+    wide_df = merger.merge_frame(
+        transformer.build_frame(codebook, meta, long_df, start, span + HORIZON_DAYS)
+    )
+
+    # 每个窗口都是宽表的一段，核对覆盖整个日期范围的宽表即可
+    transformer.reconciliation = reconcile(sheets, wide_df, start, skus)
+    transformer.reconciliation.log(logger)
+    emit_table('sku_totals', lambda: transformer.reconciliation.table.reset_index())
+    return horizon_windows(wide_df, start, end)
+
+def horizon_windows(wide_df: pd.DataFrame, start: date, end: date) -> Iterator[Tuple[date, pd.DataFrame]]:
+    """
+    从以start为day1的宽表中依次切出每个处理日期的 day1..day60
+
+    每个窗口是宽表数量数组的一段连续列，只在生成该日期的结果时复制。
+    """
+    wide_cols = day_columns((end - start).days + HORIZON_DAYS)
+    values = wide_df[wide_cols].to_numpy(dtype=float)
+    head = wide_df[[col for col in wide_df.columns if col not in wide_cols and col != 'dt']]
+    output_format = config.get('date.output_format', '%Y-%m-%d')
+
+    for offset in range((end - start).days + 1):
+        as_of = start + timedelta(days=offset)
+        window = pd.DataFrame(values[:, offset:offset + HORIZON_DAYS], columns=day_columns(), copy=False)
+        frame = pd.concat([head.reset_index(drop=True), window], axis=1)
+        frame['dt'] = (as_of - timedelta(days=1)).strftime(output_format)
+        yield as_of, frame
\ No newline at end of file
@@ -1,26 +1,45 @@
 import logging
 from pathlib import Path
+import numpy as np
 import pandas as pd
-import openpyxl
-from openpyxl.styles import PatternFill
 from src.core.config import config
 from src.core.exceptions import FileOperationError, DataTransformError
 from src.utils.excel_utils import generate_output_path
-from datetime import datetime, timedelta, time
-import re
+from src.utils.xlsx_writer import write_xlsx
+from src.utils.workbook_reader import WorkbookReader
+from src.utils.sku_utils import normalize_skus, SkuCodebook
+from src.utils.spec_parser import parse_specs
+from src.utils.date_parser import parse_dates
+from src.utils.sheet_schema import (
+    REGULAR_SCHEMA, S_LEVEL_SCHEMA, SKU_COLUMNS, SheetPlan, find_column
+)
+from src.transformer.horizon import HORIZON_DAYS, HorizonAccumulator
+from src.transformer.reconciliation import REPORT_LIMIT, reconcile
+from src.utils.trace import emit_table
+from datetime import date, datetime, timedelta
+
+SHEET_NAMES = {'regular': '常规产品', 's_level': 'S级产品'}
+SHEET_SCHEMAS = {'regular': REGULAR_SCHEMA, 's_level': S_LEVEL_SCHEMA}
 
 class DeliveryPlanTransformer:
     """到货计划转换器"""
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
+        # 最近一次转换的输入/输出行数
+        self.rows_in = None
+        self.rows_out = None
+        # 最近一次转换的数量核对结果，见 reconciliation
+        self.reconciliation = None
         
-    def transform(self, input_file: Path) -> Path:
+    def transform(self, input_file: Path, source_key: str = None, as_of: date = None) -> Path:
         """
         转换到货计划
         
         Args:
             input_file: 输入文件路径
+            source_key: 工作表缓存的内容键，见 WorkbookReader
+            as_of: 处理日期（day1），默认为当天
             
         Returns:
             转换后的文件路径
@@ -30,15 +49,7 @@ class DeliveryPlanTransformer:
             DataTransformError: 数据转换失败时抛出
         """
         try:
-            # 检查文件是否存在
-            if not input_file.exists():
-                raise FileOperationError(f"输入文件不存在: {input_file}")
-                
-            # 读取数据
-            sheets = self._read_sheets(input_file)
-            
-            # 转换格式
-            transformed_df = self._transform_format(sheets)
+            transformed_df = self.transform_dataframe(input_file, source_key, as_of)
             
             # 保存结果
             output_path = generate_output_path(
@@ -56,277 +67,77 @@ class DeliveryPlanTransformer:
                 raise
             raise DataTransformError(f"转换失败: {str(e)}")
             
-    def _read_sheets(self, input_file: Path) -> dict:
-        """读取所有工作表"""
-        try:
-            # 读取常规产品和S级产品工作表
-            sheets_data = {}
-            sheets_data['regular'] = pd.read_excel(input_file, sheet_name='常规产品')
-            sheets_data['s_level'] = pd.read_excel(input_file, sheet_name='S级产品')
-            return sheets_data
-            
-        except Exception as e:
-            raise DataTransformError(f"读取工作表失败: {str(e)}")
+    def transform_dataframe(self, input_file: Path, source_key: str = None, as_of: date = None) -> pd.DataFrame:
+        """
+        转换到货计划，直接返回DataFrame而不写中间文件
         
-    def _transform_format(self, sheets):
-        """转换数据格式"""
-        try:
-            # 合并SKU
-            regular_df = sheets['regular']
-            s_level_df = sheets['s_level']
-            
-            # 打印原始数据信息
-            regular_total = 0
-            self.logger.info("常规产品数据:")
-            for i in range(1, 6):
-                date_col = f'到货批次-{i}'
-                qty_col = f'到货数量-{i}'
-                if date_col in regular_df.columns and qty_col in regular_df.columns:
-                    total_qty = regular_df[qty_col].sum()
-                    regular_total += total_qty
-                    self.logger.info(f"{qty_col}总和: {total_qty}")
-            self.logger.info(f"常规产品总和: {regular_total}")
-                    
-            s_level_total = 0
-            self.logger.info("S级产品数据:")
-            for col in s_level_df.columns:
-                try:
-                    if isinstance(col, datetime) or pd.to_datetime(col, errors='coerce') is not pd.NaT:
-                        total_qty = s_level_df[col].sum()
-                        s_level_total += total_qty
-                        self.logger.info(f"{col}总和: {total_qty}")
-                except (ValueError, TypeError):
-                    continue
-            self.logger.info(f"S级产品总和: {s_level_total}")
-            self.logger.info(f"理论总和: {regular_total + s_level_total}")
-            
-            # 处理常规产品数据
-            regular_data = {}
-            for _, row in regular_df.iterrows():
-                # 尝试不同的列名
-                sku = None
-                for col_name in ['sku编码', 'SKU编码', 'sku_no']:
-                    if col_name in row.index:
-                        sku = str(row[col_name]).strip()
-                        break
-                
-                if not sku or pd.isna(sku) or sku == '0' or sku == '':
-                    continue
-                    
-                if sku not in regular_data:
-                    regular_data[sku] = {
-                        'color': None,
-                        'size': None,
-                        'dates': {}
-                    }
-                    
-                # 从规格提取颜色和尺码
-                spec_col = None
-                for col_name in ['规格', '商品规格']:
-                    if col_name in row.index:
-                        spec_col = col_name
-                        break
-                
-                if spec_col and pd.notna(row[spec_col]):
-                    color_match = re.search(r'颜色[:：\s]*([^,，\s]+)', str(row[spec_col]))
-                    size_match = re.search(r'尺码[:：\s]*([^,，\s]+)', str(row[spec_col]))
-                    regular_data[sku]['color'] = color_match.group(1) if color_match else ''
-                    regular_data[sku]['size'] = size_match.group(1) if size_match else ''
-                
-                # 处理日期和数量
-                for i in range(1, 6):
-                    date_col = f'到货批次-{i}'
-                    qty_col = f'到货数量-{i}'
-                    if date_col in row.index and qty_col in row.index:
-                        try:
-                            date = row[date_col]
-                            qty = row[qty_col]
-                            if pd.notna(date) and pd.notna(qty):
-                                # 尝试转换日期
-                                try:
-                                    if isinstance(date, datetime):
-                                        date = date.date()
-                                    elif isinstance(date, time):
-                                        # 如果是time类型，跳过这个值
-                                        continue
-                                    elif isinstance(date, str):
-                                        # 尝试多种日期格式
-                                        for fmt in config.get('date.input_formats', ['%Y-%m-%d']):
-                                            try:
-                                                date = datetime.strptime(date, fmt).date()
-                                                break
-                                            except ValueError:
-                                                continue
-                                        else:
-                                            raise ValueError(f"无效的日期格式: {date}")
-                                    else:
-                                        raise ValueError(f"无效的日期类型: {type(date)}")
-                                except Exception as e:
-                                    raise DataTransformError(f"日期转换失败: {str(e)}")
-                                
-                                # 如果日期已存在，累加数量
-                                if date in regular_data[sku]['dates']:
-                                    regular_data[sku]['dates'][date] += float(qty)
-                                else:
-                                    regular_data[sku]['dates'][date] = float(qty)
-                        except (ValueError, TypeError) as e:
-                            self.logger.warning(f"处理常规产品数据时出错: SKU={sku}, 日期={date_col}, 数量={qty_col}, 错误={str(e)}")
-                            continue
-            
-            # 处理S级产品数据
-            s_level_data = {}
-            for _, row in s_level_df.iterrows():
-                # 尝试不同的列名
-                sku = None
-                for col_name in ['sku编码', 'SKU编码', 'sku_no']:
-                    if col_name in row.index:
-                        sku = str(row[col_name]).strip()
-                        break
-                
-                if not sku or pd.isna(sku) or sku == '0' or sku == '':
-                    continue
-                    
-                if sku not in s_level_data:
-                    s_level_data[sku] = {
-                        'color': None,
-                        'size': None,
-                        'dates': {}
-                    }
-                    
-                # 从规格提取颜色和尺码
-                spec_col = None
-                for col_name in ['规格', '商品规格']:
-                    if col_name in row.index:
-                        spec_col = col_name
-                        break
-                
-                if spec_col and pd.notna(row[spec_col]):
-                    color_match = re.search(r'颜色[:：\s]*([^,，\s]+)', str(row[spec_col]))
-                    size_match = re.search(r'尺码[:：\s]*([^,，\s]+)', str(row[spec_col]))
-                    s_level_data[sku]['color'] = color_match.group(1) if color_match else ''
-                    s_level_data[sku]['size'] = size_match.group(1) if size_match else ''
-                
-                # 处理日期和数量
-                for col in s_level_df.columns:
-                    try:
-                        # 尝试转换日期列
-                        try:
-                            if isinstance(col, datetime):
-                                date = col.date()
-                            elif isinstance(col, time):
-                                # 如果是time类型，跳过这个列
-                                continue
-                            elif isinstance(col, str):
-                                # 尝试多种日期格式
-                                for fmt in config.get('date.input_formats', ['%Y-%m-%d']):
-                                    try:
-                                        date = datetime.strptime(col, fmt).date()
-                                        break
-                                    except ValueError:
-                                        continue
-                                else:
-                                    continue  # 不是日期列，跳过
-                            else:
-                                continue  # 不是日期列，跳过
-                        except Exception:
-                            continue  # 日期转换失败，跳过
-                            
-                        qty = row[col]
-                        if pd.notna(qty):
-                            # 如果日期已存在，累加数量
-                            if date in s_level_data[sku]['dates']:
-                                s_level_data[sku]['dates'][date] += float(qty)
-                            else:
-                                s_level_data[sku]['dates'][date] = float(qty)
-                    except (ValueError, TypeError) as e:
-                        self.logger.warning(f"处理S级产品数据时出错: SKU={sku}, 列={col}, 错误={str(e)}")
-                        continue
+        Args:
+            input_file: 输入文件路径
+            source_key: 工作表缓存的内容键，见 WorkbookReader
+            as_of: 处理日期（day1），默认为当天
             
-            # 合并所有数据
-            all_data = {}
-            for sku, data in regular_data.items():
-                if sku not in all_data:
-                    all_data[sku] = {
-                        'color': data['color'],
-                        'size': data['size'],
-                        'dates': data['dates'].copy()
-                    }
-                else:
-                    for date, qty in data['dates'].items():
-                        if date in all_data[sku]['dates']:
-                            all_data[sku]['dates'][date] += qty
-                        else:
-                            all_data[sku]['dates'][date] = qty
-                    
-            for sku, data in s_level_data.items():
-                if sku not in all_data:
-                    all_data[sku] = {
-                        'color': data['color'],
-                        'size': data['size'],
-                        'dates': data['dates'].copy()
-                    }
-                else:
-                    for date, qty in data['dates'].items():
-                        if date in all_data[sku]['dates']:
-                            all_data[sku]['dates'][date] += qty
-                        else:
-                            all_data[sku]['dates'][date] = qty
+        Returns:
+            转换后的DataFrame
             
-            # 创建结果DataFrame
-            today = datetime.now().date()
-            yesterday = today - timedelta(days=1)
+        Raises:
+            FileOperationError: 文件操作失败时抛出
+            DataTransformError: 数据转换失败时抛出
+        """
+        # 检查文件是否存在
+        if not input_file.exists():
+            raise FileOperationError(f"输入文件不存在: {input_file}")
             
-            result_data = []
-            total_qty = 0  # 用于跟踪总数量
+        # 读取数据
+        sheets = self.read_sheets(input_file, source_key)
+        self.rows_in = sum(len(df) for df in sheets.values())
+        
+        # 转换格式
+        result_df = self._transform_format(sheets, as_of)
+        self.rows_out = len(result_df)
+        return result_df
             
-            for sku, data in all_data.items():
-                row = {
-                    'sku_no': sku,
-                    'color': data['color'] or '',
-                    'size': data['size'] or ''
+    def has_cached_sheets(self, input_file: Path, source_key: str) -> bool:
+        """需要的工作表是否都已缓存，可以不解析（也不预处理）工作簿"""
+        sku_dtypes = {col: str for col in SKU_COLUMNS}
+        reader = WorkbookReader(input_file, source_key=source_key)
+        return all(
+            reader.is_cached(SHEET_NAMES[name], usecols=SHEET_SCHEMAS[name], dtype=sku_dtypes)
+            for name in SHEET_NAMES
+        )
+        
+    def read_sheets(self, input_file: Path, source_key: str = None) -> dict:
+        """
+        读取常规产品和S级产品工作表，返回 {'regular': DataFrame, 's_level': DataFrame}
+        
+        只解析列结构（见 sheet_schema）中的列，商品名称、备注等其他列不解析。
+        """
+        try:
+            # 读取常规产品和S级产品工作表，SKU列按文本读取，避免长数字丢失位数
+            sku_dtypes = {col: str for col in SKU_COLUMNS}
+            with WorkbookReader(input_file, source_key=source_key) as reader:
+                return {
+                    name: reader.read_sheet(sheet_name, usecols=SHEET_SCHEMAS[name], dtype=sku_dtypes)
+                    for name, sheet_name in SHEET_NAMES.items()
                 }
-                
-                # 添加60天的数据
-                sku_total = 0  # 用于跟踪每个SKU的总数量
-                for i in range(1, 61):
-                    target_date = today + timedelta(days=i-1)
-                    qty = float(data['dates'].get(target_date, 0))
-                    row[f'day{i}'] = qty
-                    sku_total += qty
-                
-                # 在最后添加dt列
-                row['dt'] = yesterday.strftime(config.get('date.output_format', '%Y-%m-%d'))
-                
-                total_qty += sku_total  # 累加到总数量
-                self.logger.debug(f"SKU {sku} 总数量: {sku_total}")
-                result_data.append(row)
-            
-            # 如果没有数据，创建一个空的DataFrame
-            if not result_data:
-                columns = ['sku_no', 'color', 'size'] + [f'day{i}' for i in range(1, 61)] + ['dt']
-                result_df = pd.DataFrame(columns=columns)
-            else:
-                result_df = pd.DataFrame(result_data)
             
-            # 确保所有数值列为float类型
-            date_cols = [f'day{i}' for i in range(1, 61)]
-            for col in date_cols:
-                if col not in result_df.columns:
-                    result_df[col] = 0.0
-                else:
-                    result_df[col] = pd.to_numeric(result_df[col], errors='coerce').fillna(0.0)
+        except Exception as e:
+            raise DataTransformError(f"读取工作表失败: {str(e)}")
+        
+    def _transform_format(self, sheets, today: date = None):
+        """转换数据格式"""
+        try:
+            today = today or datetime.now().date()
+            skus = self.extract_sheet_skus(sheets)
+            result_df = self.transform_sheets(sheets, today, skus)
             
-            # 打印数据总和
-            total_sum = result_df[date_cols].sum().sum()
+            # 按SKU核对源工作表与结果的数量，复用转换时提取的SKU
+            self.reconciliation = reconcile(sheets, result_df, today, skus)
+            self.reconciliation.log(self.logger)
             day1_sum = result_df['day1'].sum() if 'day1' in result_df.columns else 0
-            self.logger.info(f"转换后数据总和: {total_sum}")
             self.logger.info(f"转换后day1总和: {day1_sum}")
             
-            # 打印每个SKU的数据
-            for _, row in result_df.iterrows():
-                sku = row['sku_no']
-                sku_sum = sum(row[col] for col in date_cols if col in row)
-                self.logger.debug(f"SKU {sku} 转换后总和: {sku_sum}")
+            # 每个SKU的源数量和转换后数量，只在启用跟踪时输出
+            emit_table('sku_totals', lambda: self.reconciliation.table.reset_index())
             
             return result_df
             
@@ -336,22 +147,241 @@ class DeliveryPlanTransformer:
                 raise
             raise DataTransformError(f"转换格式失败: {str(e)}")
     
-    def _save_result(self, df: pd.DataFrame, output_path: Path) -> None:
-        """保存结果"""
-        try:
-            # 保存Excel文件
-            df.to_excel(output_path, sheet_name='汇总', index=False)
+    def transform_sheets(self, sheets: dict, today=None, skus: dict = None) -> pd.DataFrame:
+        """
+        将工作表转换为 SKU × day1..day60 的结果表
+        
+        每个SKU的结果只取决于它在两个工作表中的行（按出现顺序）、表头和处理日期。
+        
+        Args:
+            sheets: {'regular': 常规产品DataFrame, 's_level': S级产品DataFrame}
+            today: day1 对应的日期，默认为当天
+            skus: extract_sheet_skus 的结果，为None时重新提取
+            
+        Returns:
+            按SKU首次出现顺序排列的结果表
+        """
+        return self.build_frame(*self.collect_sheets(sheets, skus), today)
+        
+    def collect_sheets(self, sheets: dict, skus: dict = None):
+        """
+        将两个工作表整理为SKU字典、规格表和长表，与处理日期无关
+        
+        Args:
+            skus: extract_sheet_skus 的结果，为None时重新提取
+        
+        Returns:
+            (SKU字典, 按SKU编码排列的规格表, 长表[sku编码, date, qty])；
+            长表中常规产品的记录在前，同一工作表内每个 (SKU, 日期) 一条
+        """
+        # SKU字典编码：常规产品的SKU先编码，输出顺序即编码顺序
+        codebook = SkuCodebook()
+        skus = skus or {}
+        
+        # 处理常规产品数据
+        regular_specs, regular_long = self._collect_regular(sheets['regular'], codebook, skus.get('regular'))
+        regular_count = len(codebook)
+        
+        # 处理S级产品数据
+        s_level_specs, s_level_long = self._collect_s_level(sheets['s_level'], codebook, skus.get('s_level'))
+        
+        # 合并所有数据：颜色尺码以常规产品为准，只在常规产品中没有的SKU使用S级产品的规格
+        meta = pd.concat([
+            regular_specs.reindex(range(regular_count)),
+            s_level_specs.reindex(range(regular_count, len(codebook)))
+        ])
+        long_df = pd.concat([regular_long, s_level_long], ignore_index=True)
+        return codebook, meta, long_df
+        
+    def build_frame(self, codebook: SkuCodebook, meta: pd.DataFrame, long_df: pd.DataFrame,
+                    today=None, days: int = HORIZON_DAYS) -> pd.DataFrame:
+        """
+        按处理日期将 collect_sheets 的结果累加为 day1..dayN 结果表
+        
+        Args:
+            today: day1 对应的日期，默认为当天
+            days: 天数；回填多个处理日期时使用覆盖整个日期范围的宽表
+        """
+        # 创建结果DataFrame
+        today = today or datetime.now().date()
+        yesterday = today - timedelta(days=1)
+        
+        accumulator = HorizonAccumulator(codebook.categories, today, days)
+        accumulator.add_rows(long_df['sku'], long_df['date'], long_df['qty'])
+        
+        result_df = accumulator.to_frame()
+        result_df.insert(0, 'sku_no', codebook.categorical(np.arange(len(codebook))))
+        result_df.insert(1, 'color', meta['color'].fillna('').to_numpy(dtype=object))
+        result_df.insert(2, 'size', meta['size'].fillna('').to_numpy(dtype=object))
+        result_df['dt'] = yesterday.strftime(config.get('date.output_format', '%Y-%m-%d'))
+        return result_df
+        
+    def extract_skus(self, df: pd.DataFrame, plan: SheetPlan = None) -> pd.Series:
+        """
+        提取每行的SKU编码，无效SKU返回None
+        
+        Args:
+            plan: 工作表已解析的列结构，为None时按 SKU_COLUMNS 查找SKU列
+        """
+        sku_col = plan.sku if plan is not None else find_column(df.columns, SKU_COLUMNS)
+        if sku_col is None:
+            return pd.Series(None, index=df.index, dtype=object)
+        
+        skus = normalize_skus(df[sku_col], sku_col)
+        skus = skus[(skus != '') & (skus != '0')]
+        return skus.reindex(df.index)
+        
+    def extract_sheet_skus(self, sheets: dict) -> dict:
+        """
+        提取各工作表每行的SKU编码，供转换和数量核对共用，避免重复规范化
+        
+        Returns:
+            {工作表类型: extract_skus 的结果}
+        """
+        return {name: self.extract_skus(df) for name, df in sheets.items()}
+        
+    def _extract_specs(self, df: pd.DataFrame, plan: SheetPlan, codes: np.ndarray) -> pd.DataFrame:
+        """
+        按SKU提取颜色和尺码，同一SKU以最后一条有规格的记录为准，规格布局见 parse_specs
+        
+        Args:
+            plan: 工作表已解析的列结构
+            codes: 每行的SKU编码，无效SKU为-1
+        
+        Returns:
+            以SKU编码为索引，包含color和size列的DataFrame
+        """
+        spec_col = plan.spec
+        if spec_col is None:
+            return pd.DataFrame(columns=['color', 'size'])
+        
+        mask = (codes >= 0) & df[spec_col].notna().to_numpy()
+        specs = parse_specs(df.loc[mask, spec_col])
+        result = pd.DataFrame({
+            'sku': codes[mask],
+            'color': specs['color'].to_numpy(),
+            'size': specs['size'].to_numpy(),
+        })
+        return result.drop_duplicates(subset='sku', keep='last').set_index('sku')
+        
+    def _collect_regular(self, regular_df: pd.DataFrame, codebook: SkuCodebook, skus: pd.Series = None):
+        """
+        将常规产品的到货批次/到货数量列堆叠为长表
+        
+        Args:
+            codebook: SKU字典，本表中的新SKU按出现顺序追加
+            skus: 每行的SKU编码（extract_skus 的结果），为None时重新提取
+        
+        Returns:
+            (以SKU编码为索引的规格表, 长表[sku编码, date, qty])
+        """
+        plan = REGULAR_SCHEMA.resolve(regular_df.columns)
+        if skus is None:
+            skus = self.extract_skus(regular_df, plan)
+        codes = codebook.encode(skus)
+        valid = pd.Series(codes >= 0, index=regular_df.index)
+        date_formats = config.get('date.input_formats', ['%Y-%m-%d'])
+        
+        frames, invalid = [], []
+        for date_col, qty_col in plan.batches:
+            dates = regular_df[date_col]
+            qtys = regular_df[qty_col]
+            mask = valid & dates.notna() & qtys.notna()
+            if not mask.any():
+                continue
             
-            # 设置单元格格式
-            wb = openpyxl.load_workbook(output_path)
-            ws = wb['汇总']
+            # 整列解析，只有时刻的值解析为NaT并跳过
+            parsed = parse_dates(dates[mask], date_formats)
+            mask &= parsed.reindex(regular_df.index).notna()
             
-            # 设置表头样式
-            header_fill = PatternFill(start_color='1F6B3B', end_color='1F6B3B', fill_type='solid')
-            for cell in ws[1]:
-                cell.fill = header_fill
+            qty_values = pd.to_numeric(qtys[mask], errors='coerce')
+            bad = qty_values.index[qty_values.isna()]
+            if len(bad):
+                invalid.append(pd.DataFrame({'SKU': skus[bad], '列': qty_col, '数量': qtys[bad]}))
+            qty_values = qty_values.dropna()
             
-            wb.save(output_path)
+            frames.append(pd.DataFrame({
+                'sku': codes[regular_df.index.get_indexer(qty_values.index)],
+                'date': parsed[qty_values.index],
+                'qty': qty_values.astype(float),
+            }))
+        
+        if frames:
+            long_df = pd.concat(frames, ignore_index=True)
+            long_df = long_df.groupby(['sku', 'date'], sort=False, as_index=False)['qty'].sum()
+        else:
+            long_df = pd.DataFrame(columns=['sku', 'date', 'qty'])
+        if invalid:
+            self._report_invalid('regular', pd.concat(invalid, ignore_index=True))
+        
+        return self._extract_specs(regular_df, plan, codes), long_df
+        
+    def _collect_s_level(self, s_level_df: pd.DataFrame, codebook: SkuCodebook, skus: pd.Series = None):
+        """
+        将S级产品的日期列数量矩阵展开为长表
+        
+        Args:
+            codebook: SKU字典，本表中的新SKU按出现顺序追加
+            skus: 每行的SKU编码（extract_skus 的结果），为None时重新提取
+        
+        Returns:
+            (以SKU编码为索引的规格表, 长表[sku编码, date, qty])
+        """
+        plan = S_LEVEL_SCHEMA.resolve(s_level_df.columns)
+        if skus is None:
+            skus = self.extract_skus(s_level_df, plan)
+        codes = codebook.encode(skus)
+        valid = pd.Series(codes >= 0, index=s_level_df.index)
+        
+        date_headers = plan.dates
+        date_cols = list(date_headers)
+        
+        block = s_level_df.loc[valid, date_cols]
+        numeric = block.apply(pd.to_numeric, errors='coerce')
+        invalid = block.notna() & numeric.isna()
+        if invalid.any().any():
+            row_pos, col_pos = np.nonzero(invalid.to_numpy())
+            self._report_invalid('s_level', pd.DataFrame({
+                'SKU': skus[valid].to_numpy(dtype=object)[row_pos],
+                '列': np.array(date_cols, dtype=object)[col_pos],
+                '数量': block.to_numpy(dtype=object)[row_pos, col_pos],
+            }))
+        
+        values = numeric.to_numpy(dtype=float)
+        row_pos, col_pos = np.nonzero(~np.isnan(values))
+        long_df = pd.DataFrame({
+            'sku': codes[valid.to_numpy()][row_pos],
+            'date': np.array([date_headers[col] for col in date_cols], dtype=object)[col_pos],
+            'qty': values[row_pos, col_pos],
+        })
+        long_df = long_df.groupby(['sku', 'date'], sort=False, as_index=False)['qty'].sum()
+        
+        return self._extract_specs(s_level_df, plan, codes), long_df
+        
+    def _report_invalid(self, name: str, invalid: pd.DataFrame) -> None:
+        """
+        无效的数量只记录一条警告（列出前几条），全部明细在启用跟踪时输出
+        
+        Args:
+            name: 工作表，见 SHEET_NAMES
+            invalid: 无效数量的明细[SKU, 列, 数量]
+        """
+        head = invalid.head(REPORT_LIMIT)
+        samples = ', '.join(
+            f"SKU={sku} {col}={value}" for sku, col, value in zip(head['SKU'], head['列'], head['数量'])
+        )
+        self.logger.warning(f"处理{SHEET_NAMES[name]}数据时有 {len(invalid)} 个无效的数量，已跳过: {samples}")
+        emit_table(f'invalid_qty_{name}', lambda: invalid)
+        
+    def _save_result(self, df: pd.DataFrame, output_path: Path) -> None:
+        """保存结果"""
+        try:
+            write_xlsx(
+                df,
+                output_path,
+                sheet_name='汇总',
+                header_color=config.get('styles.header.green', '1F6B3B')
+            )
             
             self.logger.info(f"已保存转换结果: {output_path}")
             
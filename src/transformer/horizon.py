@@ -0,0 +1,89 @@
+"""SKU × 天 的稠密数量累加器"""
+
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+
+HORIZON_DAYS = 60
+
+def day_columns(days: int = HORIZON_DAYS) -> list:
+    """返回 day1..dayN 列名"""
+    return [f'day{i}' for i in range(1, days + 1)]
+
+class HorizonAccumulator:
+    """
+    按 (SKU序号, 距起始日天数) 累加到货数量
+
+    数量保存在一块预分配的连续float数组中，day1..dayN 的DataFrame直接引用该数组，不做复制。
+    """
+
+    def __init__(self, skus, start_date: date, days: int = HORIZON_DAYS):
+        """
+        Args:
+            skus: 按输出顺序排列的SKU编码
+            start_date: day1 对应的日期
+            days: 天数
+        """
+        self.skus = pd.Index(skus)
+        self.start_date = start_date
+        self.days = days
+        self.values = np.zeros((len(self.skus), days), dtype=float)
+
+    @classmethod
+    def from_values(cls, skus, start_date: date, values: np.ndarray) -> 'HorizonAccumulator':
+        """由已有的 SKU × 天 数量矩阵创建，矩阵不复制"""
+        accumulator = cls(skus, start_date, values.shape[1])
+        accumulator.values = values
+        return accumulator
+
+    def shift(self, days: int) -> None:
+        """
+        将起始日向后移动若干天：各列左移，移出窗口的数量丢弃，末尾新增的天数为0
+
+        Args:
+            days: 移动的天数，不小于0
+        """
+        if days < 0:
+            raise ValueError(f"只能向后移动: {days}")
+        kept = max(self.days - days, 0)
+        self.values[:, :kept] = self.values[:, self.days - kept:]
+        self.values[:, kept:] = 0.0
+        self.start_date = self.start_date + timedelta(days=days)
+
+    def add(self, skus, dates, quantities) -> None:
+        """
+        将长表数据累加到数组中，不在SKU列表或时间范围内的记录会被忽略
+
+        Args:
+            skus: 每条记录的SKU编码
+            dates: 每条记录的日期
+            quantities: 每条记录的数量
+        """
+        self.add_rows(self.skus.get_indexer(skus), dates, quantities)
+
+    def add_rows(self, rows, dates, quantities) -> None:
+        """
+        按行号累加，行号为SKU在skus中的位置（如SKU字典编码），负数行号被忽略
+
+        Args:
+            rows: 每条记录的行号
+            dates: 每条记录的日期
+            quantities: 每条记录的数量
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        offsets = self.offsets(dates)
+        mask = (rows >= 0) & (rows < len(self.skus)) & (offsets >= 0) & (offsets < self.days)
+        np.add.at(
+            self.values,
+            (rows[mask], offsets[mask]),
+            np.asarray(quantities, dtype=float)[mask]
+        )
+
+    def offsets(self, dates) -> np.ndarray:
+        """计算日期距起始日的天数"""
+        dates = np.asarray(dates, dtype='datetime64[D]')
+        return (dates - np.datetime64(self.start_date, 'D')).astype(np.int64)
+
+    def to_frame(self) -> pd.DataFrame:
+        """返回以 day1..dayN 为列、直接引用累加数组的DataFrame"""
+        return pd.DataFrame(self.values, columns=day_columns(self.days), copy=False)
@@ -0,0 +1,317 @@
+"""增量处理模块"""
+
+import hashlib
+import logging
+import os
+import pickle
+import re
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Optional
+import numpy as np
+import pandas as pd
+from src.core.config import config
+from src.transformer.horizon import HORIZON_DAYS, HorizonAccumulator, day_columns
+from src.transformer.reconciliation import reconcile
+from src.utils.trace import emit_table
+from src.utils.sku_utils import FLOAT_EXACT_LIMIT
+
+# 状态格式或转换逻辑变化时递增，使旧状态失效
+STATE_VERSION = 4
+
+# 读取结果中同一种值可能表示为不同的类型，按相同的类型名参与哈希
+_TYPE_NAMES = {pd.Timestamp: 'datetime', datetime: 'datetime', np.str_: 'str'}
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """
+    计算每行内容的64位哈希
+
+    每个非空单元格的哈希与列名一起再哈希后按位异或，与列的顺序无关；新增或删除
+    某行为空的列（如S级产品每天滚动的日期列）不改变该行的哈希。
+    哈希与列的dtype无关：整列因空值变为float、文本列的缺失值为NaN或None时，其他单元格的哈希不变。
+    """
+    hashed = np.zeros(len(df), dtype=np.uint64)
+    for position in range(df.shape[1]):
+        values = df.iloc[:, position]
+        label = repr(df.columns[position]).encode('utf-8')
+        salt = np.uint64(int.from_bytes(hashlib.sha256(label).digest()[:8], 'little'))
+        cells = pd.util.hash_array(_cell_hashes(values) ^ salt)
+        hashed ^= np.where(values.isna().to_numpy(), np.uint64(0), cells)
+    return hashed
+
+def _cell_hashes(values: pd.Series) -> np.ndarray:
+    """
+    计算列中每个单元格的值哈希
+
+    数值按float参与哈希（超出float精度的整数除外）；其他值按文本参与哈希，
+    同时加入值的类型，使 2.5 与 '2.5' 这类值可以区分。
+    """
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        if pd.api.types.is_integer_dtype(values) and not values.abs().lt(FLOAT_EXACT_LIMIT).all():
+            return pd.util.hash_array(values.to_numpy())
+        return pd.util.hash_array(values.to_numpy(dtype=float))
+
+    objects = values.to_numpy(dtype=object)
+    types = [_TYPE_NAMES.get(type(value), type(value).__name__) for value in objects]
+    return pd.util.hash_pandas_object(
+        pd.DataFrame({'value': objects, 'type': types}), index=False
+    ).to_numpy()
+
+def sku_fingerprints(df: pd.DataFrame, skus: pd.Series) -> pd.Series:
+    """
+    按SKU汇总行哈希
+
+    同一SKU的每行哈希与该行在SKU内的序号一起再哈希后按位异或，行内容、行数或
+    行的先后顺序（决定以哪条规格为准）变化时指纹都会变化。
+
+    Args:
+        df: 工作表
+        skus: 每行规范化后的SKU，无效SKU为None
+
+    Returns:
+        以SKU为索引的uint64指纹
+    """
+    valid = skus.notna().to_numpy()
+    if not valid.any():
+        return pd.Series([], index=pd.Index([], dtype=object), dtype=np.uint64)
+
+    keys = skus[valid].to_numpy(dtype=object)
+    codes, uniques = pd.factorize(keys)
+    ranks = pd.Series(codes).groupby(codes).cumcount().to_numpy()
+    salted = pd.util.hash_pandas_object(
+        pd.DataFrame({'hash': row_hashes(df[valid]), 'rank': ranks}),
+        index=False
+    ).to_numpy()
+
+    order = np.argsort(codes, kind='stable')
+    starts = np.flatnonzero(np.r_[True, np.diff(codes[order]) != 0])
+    return pd.Series(
+        np.bitwise_xor.reduceat(salted[order], starts),
+        index=pd.Index(uniques[codes[order][starts]], dtype=object),
+        dtype=np.uint64
+    )
+
+def changed_skus(previous: pd.Series, current: pd.Series) -> pd.Index:
+    """返回新增、删除或指纹不同的SKU"""
+    common = current.index.intersection(previous.index)
+    differs = current[common].to_numpy() != previous[common].to_numpy()
+    return (
+        current.index.difference(previous.index)
+        .union(previous.index.difference(current.index))
+        .union(common[differs])
+    )
+
+class IncrementalProcessor:
+    """
+    增量处理到货计划
+
+    状态文件保存上次运行的处理日期、两个工作表中每个SKU的行指纹、合并后的结果，
+    以及超出 day1..day60 窗口的未来到货记录（长表）。再次处理同一计划时：
+
+    - 处理日期后移时，将上次的结果矩阵左移相应天数，末尾新进入窗口的天数由保存的长表补齐；
+    - 只重新转换指纹变化（含新增、删除）的SKU，替换结果中的对应行，其余SKU直接沿用。
+
+    处理日期早于上次、相关配置或状态版本变化时完整重新计算。结果与完整计算一致。
+    """
+
+    def __init__(self, transformer, merger, state_dir: Path):
+        """
+        Args:
+            transformer: DeliveryPlanTransformer
+            merger: SKUMerger
+            state_dir: 状态文件目录
+        """
+        self.transformer = transformer
+        self.merger = merger
+        self.state_dir = Path(state_dir)
+        self.logger = logging.getLogger(__name__)
+        # 最近一次处理的输入行数、窗口移动的天数和重新计算的SKU数（完整计算时均为None）
+        self.rows_in = None
+        self.shifted_days = None
+        self.recomputed = None
+        # 最近一次处理结果与源工作表的数量核对，见 reconciliation
+        self.reconciliation = None
+
+    @classmethod
+    def from_config(cls, transformer, merger, config: Dict) -> 'IncrementalProcessor':
+        """根据配置中的incremental节创建"""
+        incremental_config = config.get('incremental') or {}
+        return cls(transformer, merger, incremental_config.get('state_dir', '.cache/incremental'))
+
+    def state_path(self, plan_id: str) -> Path:
+        """计划对应的状态文件路径"""
+        safe_name = re.sub(r'[^\w.-]', '_', plan_id)[:64]
+        digest = hashlib.sha256(plan_id.encode('utf-8')).hexdigest()[:12]
+        return self.state_dir / f'{safe_name}_{digest}.pkl'
+
+    def process(
+        self,
+        input_file: Path,
+        plan_id: str,
+        params: Dict,
+        source_key: str = None,
+        today: date = None
+    ) -> pd.DataFrame:
+        """
+        处理到货计划，返回合并后的结果
+
+        Args:
+            input_file: 预处理后的工作簿
+            plan_id: 计划标识，同一计划的各次运行共享状态
+            params: 影响转换结果的配置（如date节），变化时完整重新计算
+            source_key: 工作表缓存的内容键，见 WorkbookReader
+            today: day1 对应的日期，默认为当天
+
+        Returns:
+            与 SKUMerger.merge_frame 结果一致的DataFrame
+        """
+        today = today or date.today()
+        sheets = self.transformer.read_sheets(input_file, source_key)
+        self.rows_in = sum(len(df) for df in sheets.values())
+
+        skus = {name: self.transformer.extract_skus(df) for name, df in sheets.items()}
+        state = {
+            'version': STATE_VERSION,
+            'as_of': today.isoformat(),
+            'params': params,
+            'fingerprints': {name: sku_fingerprints(sheets[name], skus[name]) for name in sheets},
+        }
+
+        path = self.state_path(plan_id)
+        previous = self._load(path)
+        reason = self._full_reason(previous, state)
+        if reason:
+            self.logger.info(f"增量处理：{reason}，完整计算")
+            self.shifted_days = self.recomputed = None
+            codebook, meta, long_df = self.transformer.collect_sheets(sheets, skus)
+            merged_df = self.merger.merge_frame(self.transformer.build_frame(codebook, meta, long_df, today))
+            tail = _future_records(codebook.categories, long_df, today)
+        else:
+            merged_df, tail = previous['result'], previous['tail']
+            self.shifted_days = (today - date.fromisoformat(previous['as_of'])).days
+            if self.shifted_days:
+                merged_df, tail = self._shift(merged_df, tail, self.shifted_days, today)
+
+            affected = pd.Index([], dtype=object)
+            for name in sheets:
+                affected = affected.union(
+                    changed_skus(previous['fingerprints'][name], state['fingerprints'][name])
+                )
+            self.recomputed = len(affected)
+            self.logger.info(
+                f"增量处理：窗口后移 {self.shifted_days} 天，{len(affected)} 个SKU有变化，其余沿用上次结果"
+            )
+            merged_df, tail = self._patch(merged_df, tail, sheets, skus, affected, today)
+
+        # 沿用和移动的结果同样与源工作表核对
+        self.reconciliation = reconcile(sheets, merged_df, today, skus)
+        self.reconciliation.log(self.logger)
+        emit_table('sku_totals', lambda: self.reconciliation.table.reset_index())
+
+        state['result'] = merged_df
+        state['tail'] = tail
+        self._save(path, state)
+        return merged_df
+
+    def _full_reason(self, previous: Optional[Dict], state: Dict) -> Optional[str]:
+        """需要完整计算的原因，可以增量处理时返回None"""
+        if previous is None:
+            return "没有上次的状态"
+        for field, description in (('version', '状态版本'), ('params', '配置')):
+            if previous.get(field) != state[field]:
+                return f"{description}已变化"
+        if previous['as_of'] > state['as_of']:
+            return "处理日期早于上次"
+        return None
+
+    def _shift(self, result: pd.DataFrame, tail: pd.DataFrame, days: int, today: date):
+        """将上次的结果窗口移动到新的处理日期，末尾新进入窗口的天数由保存的长表补齐"""
+        date_cols = day_columns()
+        accumulator = HorizonAccumulator.from_values(
+            result['sku_no'].to_numpy(dtype=object),
+            today - timedelta(days=days),
+            result[date_cols].to_numpy(dtype=float, copy=True)
+        )
+        accumulator.shift(days)
+        accumulator.add(tail['sku'], tail['date'], tail['qty'])
+
+        result = result.copy()
+        result[date_cols] = accumulator.values
+        result['dt'] = (today - timedelta(days=1)).strftime(config.get('date.output_format', '%Y-%m-%d'))
+        return result, tail[accumulator.offsets(tail['date']) >= HORIZON_DAYS]
+
+    def _patch(
+        self,
+        result: pd.DataFrame,
+        tail: pd.DataFrame,
+        sheets: Dict[str, pd.DataFrame],
+        skus: Dict[str, pd.Series],
+        affected: pd.Index,
+        today: date
+    ):
+        """重新计算受影响的SKU并替换结果和长表中的对应记录"""
+        if not len(affected):
+            return result, tail
+
+        result_skus = result['sku_no'].astype(object)
+        frames = [result[~result_skus.isin(affected).to_numpy()].astype({'sku_no': object})]
+        tails = [tail[~tail['sku'].isin(affected).to_numpy()]]
+
+        # 只转换受影响SKU的行；只有被删除的SKU时没有需要转换的行
+        masks = {name: skus[name].isin(affected).to_numpy() for name in sheets}
+        subset = {name: df[masks[name]] for name, df in sheets.items()}
+        if any(len(df) for df in subset.values()):
+            subset_skus = {name: skus[name][masks[name]] for name in sheets}
+            codebook, meta, long_df = self.transformer.collect_sheets(subset, subset_skus)
+            recomputed = self.merger.merge_frame(self.transformer.build_frame(codebook, meta, long_df, today))
+            frames.append(recomputed.astype({'sku_no': object}))
+            tails.append(_future_records(codebook.categories, long_df, today))
+
+        # 与完整计算一致：按SKU文本排序，类别为出现的SKU
+        merged_df = pd.concat(frames, ignore_index=True)
+        merged_df = merged_df.sort_values('sku_no', kind='stable', ignore_index=True)
+        categories = pd.Index(merged_df['sku_no'].to_numpy(dtype=object))
+        merged_df['sku_no'] = pd.Categorical(merged_df['sku_no'], categories=categories)
+        self.merger.rows_out = len(merged_df)
+        return merged_df, pd.concat(tails, ignore_index=True)
+
+    def _load(self, path: Path) -> Optional[Dict]:
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        except Exception as e:
+            self.logger.warning(f"读取增量状态失败，完整计算: {path} ({str(e)})")
+            return None
+
+    def _save(self, path: Path, state: Dict) -> None:
+        tmp_path = path.with_suffix('.tmp')
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            self.logger.warning(f"写入增量状态失败: {str(e)}")
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+def _future_records(categories: pd.Index, long_df: pd.DataFrame, today: date) -> pd.DataFrame:
+    """
+    取出长表中超出 day1..day60 窗口的记录，窗口后移时用于补齐新进入窗口的天数
+
+    保持长表中的记录顺序，补齐时的累加顺序与完整计算相同，数量逐位一致。
+
+    Returns:
+        长表[sku文本, date, qty]
+    """
+    dates = np.asarray(long_df['date'], dtype='datetime64[D]')
+    offsets = (dates - np.datetime64(today, 'D')).astype(np.int64)
+    mask = offsets >= HORIZON_DAYS
+    codes = np.asarray(long_df['sku'], dtype=np.int64)[mask]
+    return pd.DataFrame({
+        'sku': categories.to_numpy(dtype=object)[codes],
+        'date': dates[mask],
+        'qty': np.asarray(long_df['qty'], dtype=float)[mask],
+    })
\ No newline at end of file
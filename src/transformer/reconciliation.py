@@ -0,0 +1,158 @@
+"""源工作表与转换结果的数量核对模块"""
+
+from datetime import date
+from typing import Dict, Optional
+import numpy as np
+import pandas as pd
+from src.utils.date_parser import parse_dates
+from src.utils.sheet_schema import REGULAR_SCHEMA, S_LEVEL_SCHEMA, SUMMARY_SCHEMA
+from src.utils.sku_utils import normalize_skus
+
+# 数量差异超过该值的SKU视为不一致（浮点误差以内的差异忽略）
+TOLERANCE = 0.01
+
+# 日志中最多列出的不一致SKU数
+REPORT_LIMIT = 10
+
+class Reconciliation:
+    """
+    核对结果
+
+    Attributes:
+        totals: 数量合计，regular/s_level 为两个工作表中全部数量（即理论总和的两部分），
+            window 为其中有SKU且日期落在结果窗口内的部分，output 为结果中的数量
+        table: 以SKU为索引的核对表，列为 regular、s_level（窗口内的源数量）、
+            expected（两者之和）、actual（结果中的数量）和 diff（actual - expected）
+        mismatches: table 中差异超过容差的行
+    """
+
+    def __init__(self, totals: Dict[str, float], table: pd.DataFrame, tolerance: float):
+        self.totals = totals
+        self.table = table
+        self.mismatches = table[table['diff'].abs() > tolerance]
+
+    @property
+    def ok(self) -> bool:
+        return self.mismatches.empty
+
+    def log(self, logger) -> None:
+        """记录合计，有不一致的SKU时记录警告"""
+        totals = self.totals
+        logger.info(f"常规产品总和: {totals['regular']}")
+        logger.info(f"S级产品总和: {totals['s_level']}")
+        logger.info(f"理论总和: {totals['regular'] + totals['s_level']}")
+        logger.info(f"窗口内总和: {totals['window']}")
+        logger.info(f"转换后数据总和: {totals['output']}")
+        if not self.ok:
+            logger.warning(
+                f"{len(self.mismatches)} 个SKU转换前后数量不一致:\n"
+                f"{self.mismatches.head(REPORT_LIMIT).to_string()}"
+            )
+
+def reconcile(
+    sheets: Dict[str, pd.DataFrame],
+    result_df: pd.DataFrame,
+    today: date,
+    skus: Optional[Dict[str, pd.Series]] = None,
+    tolerance: float = TOLERANCE
+) -> Reconciliation:
+    """
+    按SKU核对源工作表与转换结果的数量
+
+    源数量按列整体计算后按SKU分组汇总，不逐行处理：常规产品取到货批次落在窗口内的到货数量，
+    S级产品取表头日期落在窗口内的列。无法识别为数字的数量、没有SKU的行不计入窗口内数量，
+    与转换时的规则一致。
+
+    Args:
+        sheets: {'regular': 常规产品DataFrame, 's_level': S级产品DataFrame}
+        result_df: 转换或合并后的结果（sku_no 和 day1..dayN 列）
+        today: 结果中 day1 对应的日期
+        skus: 各工作表每行的SKU编码（见 DeliveryPlanTransformer.extract_skus），为None时重新提取
+        tolerance: 允许的差异
+
+    Returns:
+        Reconciliation
+    """
+    days = SUMMARY_SCHEMA.resolve(result_df.columns).days
+    start = np.datetime64(today, 'D')
+    skus = skus or {}
+
+    regular_skus, regular_qtys, regular_total = _regular_totals(
+        sheets['regular'], skus.get('regular'), start, len(days)
+    )
+    s_level_skus, s_level_qtys, s_level_total = _s_level_totals(
+        sheets['s_level'], skus.get('s_level'), start, len(days)
+    )
+    values = result_df[days].to_numpy(dtype=float)
+    output_qtys = np.where(np.isnan(values), 0.0, values).sum(axis=1)
+    output_skus = result_df['sku_no'].to_numpy(dtype=object)
+
+    # 三部分的SKU一起编码一次，按编码累加，SKU按首次出现的顺序排列
+    parts = [(regular_skus, regular_qtys), (s_level_skus, s_level_qtys), (output_skus, output_qtys)]
+    codes, uniques = pd.factorize(np.concatenate([keys for keys, _ in parts]))
+    bounds = np.cumsum([0] + [len(keys) for keys, _ in parts])
+    sums = [
+        np.bincount(codes[bounds[i]:bounds[i + 1]], weights=qtys, minlength=len(uniques))
+        for i, (_, qtys) in enumerate(parts)
+    ]
+
+    table = pd.DataFrame({
+        'regular': sums[0],
+        's_level': sums[1],
+        'expected': sums[0] + sums[1],
+        'actual': sums[2],
+    }, index=pd.Index(uniques, name='sku'))
+    table['diff'] = table['actual'] - table['expected']
+
+    totals = {
+        'regular': regular_total,
+        's_level': s_level_total,
+        'window': float(sums[0].sum() + sums[1].sum()),
+        'output': float(output_qtys.sum()),
+    }
+    return Reconciliation(totals, table, tolerance)
+
+def _sheet_skus(df: pd.DataFrame, sku_col, skus: Optional[pd.Series]) -> pd.Series:
+    """每行的SKU编码，无效SKU为None"""
+    if skus is not None:
+        return skus
+    if sku_col is None:
+        return pd.Series(None, index=df.index, dtype=object)
+    skus = normalize_skus(df[sku_col], sku_col)
+    return skus.where((skus != '') & (skus != '0'))
+
+def _regular_totals(df: pd.DataFrame, skus: Optional[pd.Series], start: np.datetime64, days: int):
+    """常规产品：(窗口内记录的SKU, 数量, 全部到货数量合计)"""
+    plan = REGULAR_SCHEMA.resolve(df.columns)
+    skus = _sheet_skus(df, plan.sku, skus)
+    total = 0.0
+    sku_parts, qty_parts = [np.array([], dtype=object)], [np.array([], dtype=float)]
+    for date_col, qty_col in plan.batches:
+        qtys = pd.to_numeric(df[qty_col], errors='coerce')
+        total += float(qtys.sum())
+
+        mask = skus.notna() & qtys.notna() & df[date_col].notna()
+        if not mask.any():
+            continue
+        offsets = (parse_dates(df.loc[mask, date_col]).to_numpy(dtype='datetime64[D]') - start).astype(np.int64)
+        in_window = (offsets >= 0) & (offsets < days)
+        sku_parts.append(skus[mask].to_numpy(dtype=object)[in_window])
+        qty_parts.append(qtys[mask].to_numpy(dtype=float)[in_window])
+    return np.concatenate(sku_parts), np.concatenate(qty_parts), total
+
+def _s_level_totals(df: pd.DataFrame, skus: Optional[pd.Series], start: np.datetime64, days: int):
+    """S级产品：(每行的SKU, 每行窗口内的数量, 全部日期列数量合计)"""
+    plan = S_LEVEL_SCHEMA.resolve(df.columns)
+    skus = _sheet_skus(df, plan.sku, skus)
+    valid = skus.notna().to_numpy()
+    date_cols = list(plan.dates)
+    if not date_cols:
+        return skus[valid].to_numpy(dtype=object), np.zeros(valid.sum()), 0.0
+
+    block = df[date_cols]
+    if not all(pd.api.types.is_numeric_dtype(dtype) for dtype in block.dtypes):
+        block = block.apply(pd.to_numeric, errors='coerce')
+    values = np.nan_to_num(block.to_numpy(dtype=float))
+    offsets = (np.array(list(plan.dates.values()), dtype='datetime64[D]') - start).astype(np.int64)
+    in_window = (offsets >= 0) & (offsets < days)
+    return skus[valid].to_numpy(dtype=object), values[:, in_window].sum(axis=1)[valid], float(values.sum())
\ No newline at end of file
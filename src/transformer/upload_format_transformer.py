@@ -1,100 +1,149 @@
 import logging
 from pathlib import Path
+from typing import Dict
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import date, datetime, time, timedelta
+from src.core.exceptions import ConfigurationError, DataTransformError
+from src.transformer.horizon import HORIZON_DAYS, day_columns
 from src.utils.excel_utils import generate_output_path
+from src.utils.sheet_schema import SKU_COLUMNS, UPLOAD_SCHEMA
+from src.utils.spec_parser import parse_specs
+from src.utils.table_writer import write_table
+from src.utils.workbook_reader import WorkbookReader
 
 class UploadFormatTransformer:
     """将合并后的到货计划转换为上传格式"""
     
-    def __init__(self):
+    def __init__(self, formats=None):
+        """
+        Args:
+            formats: 输出格式（见 table_writer.resolve_formats），为None时使用配置 output.formats
+        """
         self.logger = logging.getLogger(__name__)
+        self.formats = formats
+        # 最近一次转换写出的 {格式: 文件路径}
+        self.output_files = {}
         
-    def transform(self, input_file: Path) -> Path:
+    def transform(self, input_file: Path, as_of: date = None) -> Path:
         """
         转换到货计划为上传格式
         
         Args:
             input_file: 输入文件路径（合并后的Excel文件）
+            as_of: 处理日期，day1为其次日；默认为当天，dt列为当前时刻，
+                指定时dt列为该日期的0点，结果可复现
             
         Returns:
-            转换后的文件路径
+            主格式（第一个输出格式）的文件路径，全部文件见 output_files
         """
         try:
-            # 读取合并后的数据
-            df = pd.read_excel(input_file, sheet_name='汇总')
+            df, rows, plan = self._read(input_file)
             
-            # 获取所有日期列
-            date_cols = [col for col in df.columns if pd.notna(pd.to_datetime(col, errors='coerce'))]
-            date_cols.sort()  # 确保日期按顺序排列
+            now = datetime.now() if as_of is None else datetime.combine(as_of, time())
+            days = self._fill_days(rows, plan, now.date(), HORIZON_DAYS)
+            result_df = self._build_result(rows, plan, days, now)
             
-            # 创建60天的日期列
-            today = datetime.now()
-            day_cols = [f'day{i+1}' for i in range(60)]
+            # 保存结果
+            output_path = generate_output_path(input_file, Path("output"), "上传格式")
+            self.output_files = write_table(result_df, output_path, self.formats, sheet_name='Sheet1')
             
-            # 创建结果DataFrame
-            result_rows = []
+            self._log_results(df, result_df)
+            return next(iter(self.output_files.values()))
             
-            # 处理每个SKU
-            for _, row in df.iterrows():
-                sku = row['sku编码']
-                if pd.isna(sku):
-                    continue
-                    
-                # 从规格中提取颜色和尺码
-                spec = str(row['规格']) if pd.notna(row['规格']) else ''
-                color = ''
-                size = ''
-                if '/' in spec:
-                    parts = spec.split('/')
-                    if len(parts) >= 2:
-                        color = parts[0].strip()
-                        size = parts[1].strip()
-                
-                # 创建新行
-                result_row = {
-                    'sku_no': sku,
-                    'color': color,
-                    'size': size
-                }
-                
-                # 初始化所有天数为0
-                for day_col in day_cols:
-                    result_row[day_col] = 0
-                    
-                # 填充实际数据
-                for date in date_cols:
-                    qty = row[date]
-                    if pd.notna(qty) and qty > 0:
-                        # 计算这个日期是第几天
-                        date_diff = (pd.to_datetime(date) - today).days
-                        if 0 <= date_diff < 60:  # 只处理60天内的数据
-                            day_col = f'day{date_diff + 1}'
-                            result_row[day_col] = int(qty)
-                
-                # 添加dt字段（当前时间戳）
-                result_row['dt'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                
-                result_rows.append(result_row)
+        except Exception as e:
+            self.logger.error(f"转换失败: {str(e)}", exc_info=True)
+            raise
             
-            # 创建结果DataFrame
-            result_df = pd.DataFrame(result_rows)
+    def backfill(self, input_file: Path, start: date, end: date) -> Dict[date, Path]:
+        """
+        为 start..end 的每个处理日期生成上传格式文件
+        
+        工作表只读取和解析一次，数量填入覆盖整个日期范围的 SKU × 天 数组，
+        每个处理日期的 day1..day60 是其中的一段连续列，结果与逐日调用 transform(as_of=...) 一致。
+        
+        Args:
+            input_file: 输入文件路径（合并后的Excel文件）
+            start: 第一个处理日期
+            end: 最后一个处理日期（包含）
             
-            # 确保所有列都存在并按正确顺序排列
-            all_cols = ['sku_no', 'color', 'size'] + day_cols + ['dt']
-            result_df = result_df.reindex(columns=all_cols)
+        Returns:
+            {处理日期: 主格式的文件路径}
             
-            # 保存结果
-            output_path = generate_output_path(input_file, Path("output"), "上传格式")
-            result_df.to_excel(output_path, index=False, sheet_name='Sheet1')
+        Raises:
+            ConfigurationError: 结束日期早于开始日期时抛出
+        """
+        span = (end - start).days
+        if span < 0:
+            raise ConfigurationError(f"回填结束日期 {end} 早于开始日期 {start}")
+        
+        try:
+            df, rows, plan = self._read(input_file)
+            wide = self._fill_days(rows, plan, start, span + HORIZON_DAYS)
             
-            self._log_results(df, result_df)
-            return output_path
+            files = {}
+            for offset in range(span + 1):
+                as_of = start + timedelta(days=offset)
+                result_df = self._build_result(
+                    rows, plan, wide[:, offset:offset + HORIZON_DAYS], datetime.combine(as_of, time())
+                )
+                output_path = generate_output_path(input_file, Path("output"), f"上传格式_{as_of:%Y%m%d}")
+                self.output_files = write_table(result_df, output_path, self.formats, sheet_name='Sheet1')
+                files[as_of] = next(iter(self.output_files.values()))
+            
+            self.logger.info(f"上传格式回填完成: {start} ~ {end}，共 {len(files)} 个处理日期")
+            return files
             
         except Exception as e:
-            self.logger.error(f"转换失败: {str(e)}", exc_info=True)
+            self.logger.error(f"回填失败: {str(e)}", exc_info=True)
             raise
             
+    def _read(self, input_file: Path):
+        """读取合并后的数据，返回 (汇总表, 有SKU的行, 列结构)"""
+        # 只解析SKU、规格和日期列，SKU列读入时即按字典编码（category）
+        with WorkbookReader(input_file) as reader:
+            df = reader.read_sheet('汇总', usecols=UPLOAD_SCHEMA, dtype={col: str for col in SKU_COLUMNS})
+        plan = UPLOAD_SCHEMA.resolve(df.columns)
+        if plan.sku is None:
+            raise DataTransformError(f"缺少SKU列: {SKU_COLUMNS}")
+        df[plan.sku] = df[plan.sku].astype('category')
+        
+        # 跳过没有SKU的行
+        rows = df[df[plan.sku].notna()].reset_index(drop=True)
+        return df, rows, plan
+        
+    def _fill_days(self, rows: pd.DataFrame, plan, as_of: date, width: int) -> np.ndarray:
+        """
+        按日期列填充数量数组，第j列为 as_of 之后第j+1天
+        
+        处理日期当天及之前的日期、超出宽度的日期以及非正数量不计入。
+        """
+        days = np.zeros((len(rows), width), dtype=np.int64)
+        for date_col in sorted(plan.dates):  # 确保日期按顺序排列
+            date_diff = (plan.dates[date_col] - as_of).days - 1
+            if not 0 <= date_diff < width:
+                continue
+            qty = pd.to_numeric(rows[date_col], errors='coerce')
+            mask = (qty > 0).to_numpy()
+            days[mask, date_diff] = qty[mask].astype(np.int64).to_numpy()
+        return days
+        
+    def _build_result(self, rows: pd.DataFrame, plan, days: np.ndarray, now: datetime) -> pd.DataFrame:
+        """由 day1..day60 数量数组生成上传格式的结果表，dt为处理时刻"""
+        # 从规格中提取颜色和尺码
+        if plan.spec is not None:
+            specs = parse_specs(rows[plan.spec])
+        else:
+            specs = pd.DataFrame({'color': '', 'size': ''}, index=rows.index)
+        
+        # 创建结果DataFrame，SKU在写出时才还原为文本
+        result_df = pd.DataFrame(days, columns=day_columns())
+        result_df.insert(0, 'sku_no', rows[plan.sku].array)
+        result_df.insert(1, 'color', specs['color'].to_numpy(dtype=object))
+        result_df.insert(2, 'size', specs['size'].to_numpy(dtype=object))
+        result_df['dt'] = now.strftime('%Y-%m-%d %H:%M:%S')
+        return result_df
+            
     def _log_results(self, original_df, result_df):
         """记录处理结果"""
         self.logger.info(f"原始SKU数: {len(original_df)}")
@@ -0,0 +1,104 @@
+"""日期列解析模块"""
+
+from datetime import date, datetime, time
+from numbers import Number
+from typing import Dict, Optional, Tuple
+import numpy as np
+import pandas as pd
+from src.core.config import config
+from src.core.exceptions import DataTransformError
+
+# Excel日期序列号的起点（1900日期系统，已包含1900-02-29的偏差）和有效范围（至9999-12-31）
+EXCEL_EPOCH = np.datetime64('1899-12-30', 'D')
+EXCEL_SERIAL_MAX = 2958465
+
+# 进程内缓存的日期文本数量上限，超出后清空重新缓存
+CACHE_LIMIT = 100000
+
+# (日期文本, 日期格式) -> 解析结果，无法识别为NaT
+_date_cache: Dict[Tuple[str, tuple], np.datetime64] = {}
+
+def clear_date_cache() -> None:
+    """清空已解析日期文本的缓存"""
+    _date_cache.clear()
+
+def parse_dates(values: pd.Series, date_formats: Optional[list] = None) -> pd.Series:
+    """
+    解析日期列
+
+    同一列中可以混合以下值：
+    - datetime/date：取日期部分；
+    - 文本：按 date_formats 依次解析，每个格式只对尚未解析的文本做一次向量化转换；
+    - 数字：Excel日期序列号，小数部分（时刻）忽略；
+    - time（只有时刻的单元格）和缺失值：解析为NaT，由调用方跳过。
+
+    同一个值只解析一次，文本的解析结果跨调用缓存，耗时与不同值的数量而不是行数成正比。
+
+    Args:
+        values: 日期列
+        date_formats: 文本的日期格式，默认为配置 date.input_formats
+
+    Returns:
+        索引与输入一致、只含日期（0点）的datetime64列
+
+    Raises:
+        DataTransformError: 文本无法按任何格式识别，或值的类型不是日期时抛出，
+            信息中包含第一个无法识别的值
+    """
+    formats = tuple(date_formats or config.get('date.input_formats', ['%Y-%m-%d']))
+    if pd.api.types.is_datetime64_any_dtype(values.dtype):
+        return values.dt.tz_localize(None).dt.normalize() if values.dt.tz else values.dt.normalize()
+
+    codes, uniques = pd.factorize(values.to_numpy(dtype=object))
+    parsed = np.full(len(uniques) + 1, np.datetime64('NaT'), dtype='datetime64[ns]')
+
+    texts, serials = [], []
+    for position, value in enumerate(uniques):
+        if isinstance(value, str):
+            texts.append(position)
+        elif isinstance(value, (datetime, date)):
+            parsed[position] = np.datetime64(pd.Timestamp(value).date(), 'D')
+        elif isinstance(value, Number) and not isinstance(value, (bool, np.bool_)):
+            serials.append(position)
+        elif not isinstance(value, time):
+            raise DataTransformError(f"日期转换失败: 无效的日期类型: {type(value)}")
+
+    if serials:
+        parsed[serials] = _parse_serials(uniques[serials])
+    if texts:
+        parsed[texts] = _parse_texts([uniques[position] for position in texts], formats)
+
+    # 末尾的NaT对应缺失值（编码-1）
+    return pd.Series(parsed[codes], index=values.index)
+
+def _parse_serials(serials: np.ndarray) -> np.ndarray:
+    """将Excel日期序列号转换为日期"""
+    numbers = np.asarray(serials, dtype=float)
+    invalid = ~((numbers >= 1) & (numbers <= EXCEL_SERIAL_MAX))
+    if invalid.any():
+        raise DataTransformError(f"日期转换失败: 无效的日期序列号: {serials[np.argmax(invalid)]}")
+    days = np.floor(numbers).astype(np.int64)
+    return (EXCEL_EPOCH + days.astype('timedelta64[D]')).astype('datetime64[ns]')
+
+def _parse_texts(texts: list, formats: tuple) -> np.ndarray:
+    """按格式依次解析不重复的日期文本，已解析过的文本直接取缓存"""
+    missing = [text for text in texts if (text, formats) not in _date_cache]
+    if missing:
+        if len(_date_cache) + len(missing) > CACHE_LIMIT:
+            _date_cache.clear()
+        result = np.full(len(missing), np.datetime64('NaT'), dtype='datetime64[ns]')
+        remainder = pd.Series(missing, dtype=object)
+        for fmt in formats:
+            if remainder.empty:
+                break
+            converted = pd.to_datetime(remainder, format=fmt, errors='coerce')
+            hit = converted.notna().to_numpy()
+            result[remainder.index[hit]] = converted[hit].dt.normalize().to_numpy()
+            remainder = remainder[~hit]
+        _date_cache.update(zip([(text, formats) for text in missing], result))
+
+    parsed = np.array([_date_cache[(text, formats)] for text in texts], dtype='datetime64[ns]')
+    invalid = np.isnat(parsed)
+    if invalid.any():
+        raise DataTransformError(f"日期转换失败: 无效的日期格式: {texts[np.argmax(invalid)]}")
+    return parsed
\ No newline at end of file
@@ -2,11 +2,19 @@
 
 import logging
 from typing import Optional
-import win32com.client
 from contextlib import contextmanager
 from src.core.exceptions import ExcelOperationError
 from pathlib import Path
-import pythoncom
+
+# Excel COM仅在安装了pywin32的Windows环境中可用
+try:
+    import win32com.client
+    import pythoncom
+except ImportError:
+    win32com = None
+    pythoncom = None
+
+COM_AVAILABLE = win32com is not None
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +33,9 @@ def excel_context(visible: bool = False, display_alerts: bool = False):
     Raises:
         ExcelOperationError: Excel操作失败时抛出
     """
+    if not COM_AVAILABLE:
+        raise ExcelOperationError("当前环境不支持Excel COM（未安装pywin32）")
+    
     excel = None
     try:
         # 初始化COM
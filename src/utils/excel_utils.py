@@ -1,4 +1,7 @@
+import hashlib
 import logging
+import re
+import zipfile
 from pathlib import Path
 from datetime import datetime
 import pandas as pd
@@ -48,6 +51,55 @@ def generate_output_path(input_file: Path, output_dir: Path, suffix: str) -> Pat
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     return output_dir / f"{input_file.stem}_{suffix}_{timestamp}.xlsx"
 
+def file_sha256(file_path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """
+    计算文件内容的SHA-256
+    
+    Args:
+        file_path: 文件路径
+        chunk_size: 每次读取的字节数
+    
+    Returns:
+        str: 十六进制摘要
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+_TODAY_PATTERN = re.compile(rb'\bTODAY\s*\(', re.IGNORECASE)
+
+def uses_today(file_path: Path, chunk_size: int = 1024 * 1024) -> bool:
+    """
+    工作簿的公式或定义名称中是否调用了TODAY()
+    
+    逐块扫描xlsx中工作表和工作簿的XML，不解析工作簿。
+    
+    Args:
+        file_path: 工作簿路径
+        chunk_size: 每次读取的字节数
+    
+    Returns:
+        bool: 找到TODAY()调用时返回True，文件不是xlsx时返回False
+    """
+    try:
+        with zipfile.ZipFile(file_path) as archive:
+            for name in archive.namelist():
+                if not (name.startswith('xl/worksheets/') or name == 'xl/workbook.xml'):
+                    continue
+                with archive.open(name) as f:
+                    # 保留上一块的末尾，避免调用被分块截断
+                    tail = b''
+                    for chunk in iter(lambda: f.read(chunk_size), b''):
+                        window = tail + chunk
+                        if _TODAY_PATTERN.search(window):
+                            return True
+                        tail = window[-16:]
+    except zipfile.BadZipFile:
+        return False
+    return False
+
 def format_sku(x):
     """格式化SKU编码"""
     if pd.isna(x):
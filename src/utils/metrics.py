@@ -0,0 +1,131 @@
+"""处理阶段性能指标模块"""
+
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, Optional, Union
+
+try:
+    import resource
+except ImportError:  # Windows没有resource模块
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+def peak_rss_bytes() -> Optional[int]:
+    """
+    进程启动以来的常驻内存峰值（字节）
+
+    使用 resource.getrusage，Windows上在安装psutil时使用其峰值工作集，否则返回None。
+    只读取操作系统的统计值，没有额外开销。
+    """
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # macOS以字节为单位，其他系统以KB为单位
+        return peak if sys.platform == 'darwin' else peak * 1024
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss)
+    return None
+
+class StageMetrics:
+    """单个处理阶段的指标"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.wall_seconds: float = 0.0
+        self.cpu_seconds: float = 0.0
+        self.peak_memory_bytes: Optional[int] = None
+        self.peak_rss_bytes: Optional[int] = None
+        self.rows_in: Optional[int] = None
+        self.rows_out: Optional[int] = None
+        self.sku_count: Optional[int] = None
+        self.bytes_written: Optional[int] = None
+
+    def add_written_file(self, file_path: Optional[Union[str, Path]]) -> None:
+        """累加阶段写出的文件大小"""
+        if file_path and Path(file_path).exists():
+            self.bytes_written = (self.bytes_written or 0) + Path(file_path).stat().st_size
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'wall_seconds': round(self.wall_seconds, 4),
+            'cpu_seconds': round(self.cpu_seconds, 4),
+            'peak_memory_bytes': self.peak_memory_bytes,
+            'peak_rss_bytes': self.peak_rss_bytes,
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'sku_count': self.sku_count,
+            'bytes_written': self.bytes_written,
+        }
+
+class PipelineMetrics:
+    """
+    收集整个处理流程各阶段的耗时、CPU时间、Python内存峰值和数据量
+
+    每个阶段结束时记录进程的常驻内存峰值（peak_rss_bytes，见 peak_rss_bytes 函数），始终统计；
+    peak_memory_bytes 通过tracemalloc统计，为阶段内相对阶段开始时新增的Python内存峰值，
+    tracemalloc会明显拖慢分配密集的阶段，默认不统计，需显式开启 track_memory。
+    """
+
+    def __init__(self, track_memory: bool = False):
+        self.track_memory = track_memory
+        self.stages: Dict[str, StageMetrics] = {}
+        self._started_tracing = False
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        统计一个阶段的指标
+
+        Yields:
+            StageMetrics: 供阶段内填写行数、SKU数、写出字节数
+        """
+        metrics = StageMetrics(name)
+        self.stages[name] = metrics
+
+        if self.track_memory:
+            self._reset_memory_peak()
+            memory_base = tracemalloc.get_traced_memory()[0]
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield metrics
+        finally:
+            metrics.wall_seconds = time.perf_counter() - wall_start
+            metrics.cpu_seconds = time.process_time() - cpu_start
+            metrics.peak_rss_bytes = peak_rss_bytes()
+            if self.track_memory:
+                metrics.peak_memory_bytes = max(0, tracemalloc.get_traced_memory()[1] - memory_base)
+
+    def _reset_memory_peak(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        elif hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        elif self._started_tracing:
+            # Python 3.8没有reset_peak，重新开始跟踪以清除峰值
+            tracemalloc.stop()
+            tracemalloc.start()
+
+    def close(self) -> None:
+        """停止由本对象启动的内存跟踪"""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'stages': {name: metrics.to_dict() for name, metrics in self.stages.items()},
+            'total': {
+                'wall_seconds': round(sum(m.wall_seconds for m in self.stages.values()), 4),
+                'cpu_seconds': round(sum(m.cpu_seconds for m in self.stages.values()), 4),
+                'peak_rss_bytes': peak_rss_bytes(),
+            },
+        }
@@ -0,0 +1,166 @@
+"""处理结果缓存模块"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional
+from src.utils.excel_utils import file_sha256
+
+# 处理逻辑变化导致结果不同时递增，使旧缓存失效
+CACHE_VERSION = 2
+
+# 源代码根目录，其中的代码变化时旧缓存失效
+SOURCE_ROOT = Path(__file__).resolve().parent.parent
+
+MANIFEST_NAME = 'manifest.json'
+
+@lru_cache(maxsize=1)
+def code_fingerprint() -> str:
+    """
+    处理代码（src下全部.py文件）的摘要，升级代码后旧缓存自动失效
+
+    每个进程只计算一次。
+    """
+    digest = hashlib.sha256()
+    for path in sorted(SOURCE_ROOT.rglob('*.py')):
+        digest.update(path.relative_to(SOURCE_ROOT).as_posix().encode('utf-8'))
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+class ResultCache:
+    """
+    按输入文件内容、有效配置和处理日期缓存处理结果
+
+    每个缓存项是缓存目录下以键命名的子目录，包含各阶段产物和manifest.json。
+    命中时更新manifest的修改时间，超出容量时按最近最少使用淘汰。
+    """
+
+    def __init__(self, cache_dir: Path, max_size_mb: float = 512):
+        self.cache_dir = Path(cache_dir)
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        self.logger = logging.getLogger(__name__)
+
+    @classmethod
+    def from_config(cls, config: Dict) -> 'ResultCache':
+        """根据配置中的cache节创建缓存"""
+        cache_config = config.get('cache') or {}
+        return cls(
+            cache_config.get('directory', '.cache/results'),
+            cache_config.get('max_size_mb', 512)
+        )
+
+    @staticmethod
+    def make_key(input_file: Path, config: Dict, **params) -> str:
+        """
+        生成缓存键
+
+        Args:
+            input_file: 输入文件路径
+            config: 有效配置
+            **params: 其他影响结果的参数（如处理日期）
+        """
+        payload = json.dumps({
+            'version': CACHE_VERSION,
+            'code': code_fingerprint(),
+            'input': file_sha256(input_file),
+            'config': config,
+            'params': params,
+        }, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Optional[Path]]]:
+        """
+        查询缓存
+
+        Returns:
+            {产物名称: 缓存中的文件路径}，未命中或缓存文件缺失时返回None
+        """
+        entry_dir = self.cache_dir / key
+        manifest_path = entry_dir / MANIFEST_NAME
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        artifacts = {}
+        try:
+            for name, file_name in manifest['artifacts'].items():
+                if file_name is None:
+                    artifacts[name] = None
+                    continue
+                path = entry_dir / file_name
+                if not path.exists():
+                    self.logger.warning(f"缓存文件缺失，忽略缓存: {path}")
+                    return None
+                artifacts[name] = path
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            self.logger.warning(f"缓存清单无效，忽略缓存: {manifest_path} ({str(e)})")
+            return None
+
+        # 更新最近使用时间
+        os.utime(manifest_path)
+        return artifacts
+
+    def put(self, key: str, artifacts: Dict[str, Optional[str]]) -> None:
+        """
+        保存处理结果到缓存
+
+        Args:
+            key: 缓存键
+            artifacts: {产物名称: 文件路径}，路径为None的产物只记录名称
+        """
+        entry_dir = self.cache_dir / key
+        tmp_dir = self.cache_dir / f'{key}.tmp'
+        try:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            tmp_dir.mkdir(parents=True)
+
+            manifest = {'created': time.time(), 'artifacts': {}}
+            for name, file_path in artifacts.items():
+                if not file_path:
+                    manifest['artifacts'][name] = None
+                    continue
+                file_name = Path(file_path).name
+                shutil.copy2(file_path, tmp_dir / file_name)
+                manifest['artifacts'][name] = file_name
+
+            with open(tmp_dir / MANIFEST_NAME, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, ensure_ascii=False)
+
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            tmp_dir.rename(entry_dir)
+        except OSError as e:
+            self.logger.warning(f"写入结果缓存失败: {str(e)}")
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return
+
+        try:
+            self._evict()
+        except OSError as e:
+            # 批量处理时其他进程可能正在删除同一缓存项
+            self.logger.warning(f"淘汰结果缓存失败: {str(e)}")
+
+    def _evict(self) -> None:
+        """按最近使用时间淘汰缓存项，直到总大小不超过上限"""
+        entries = []
+        total_size = 0
+        for entry_dir in self.cache_dir.iterdir():
+            manifest_path = entry_dir / MANIFEST_NAME
+            if not manifest_path.exists():
+                continue
+            size = sum(f.stat().st_size for f in entry_dir.iterdir() if f.is_file())
+            entries.append((manifest_path.stat().st_mtime, size, entry_dir))
+            total_size += size
+
+        for _, size, entry_dir in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total_size -= size
+            self.logger.debug(f"已淘汰结果缓存: {entry_dir.name}")
@@ -0,0 +1,181 @@
+"""工作表列结构模块"""
+
+import re
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+import pandas as pd
+from src.core.config import config
+
+# 列结构有变化时递增，使按列结构缓存的工作表失效
+SCHEMA_VERSION = 1
+
+# 列别名，按优先级排列
+SKU_COLUMNS = ['sku编码', 'SKU编码', 'sku_no']
+SPEC_COLUMNS = ['规格', '商品规格']
+
+# 常规产品的到货批次/到货数量列数
+BATCH_COUNT = 5
+
+DAY_PATTERN = re.compile(r'^day\d+$')
+
+def find_column(columns, candidates: list):
+    """返回候选列名中第一个存在于表头的列"""
+    for col_name in candidates:
+        if col_name in columns:
+            return col_name
+    return None
+
+def parse_date_header(label, date_formats: list) -> Optional[date]:
+    """按日期格式解析一个表头，不是日期时返回None"""
+    if isinstance(label, datetime):
+        return label.date()
+    if isinstance(label, str):
+        for fmt in date_formats:
+            try:
+                return datetime.strptime(label, fmt).date()
+            except ValueError:
+                continue
+    return None
+
+def resolve_date_headers(columns, date_formats: list) -> dict:
+    """
+    解析表头中的日期列
+
+    Returns:
+        {列名: date对象}，只包含能识别为日期的列，保持原有列顺序
+    """
+    date_headers = {}
+    for col in columns:
+        parsed = parse_date_header(col, date_formats)
+        if parsed is not None:
+            date_headers[col] = parsed
+    return date_headers
+
+def _parse_any_date(label) -> Optional[date]:
+    """pandas能识别的任意日期表头"""
+    try:
+        parsed = pd.to_datetime(label, errors='coerce')
+    except (ValueError, TypeError):
+        return None
+    return None if pd.isna(parsed) else parsed.date()
+
+class SheetPlan:
+    """
+    列结构在一个工作表表头上的解析结果
+
+    Attributes:
+        sku: SKU列名，没有时为None
+        spec: 规格列名，没有时为None
+        batches: [(到货批次列, 到货数量列)]，只包含两列都存在的批次
+        dates: {日期列名: date对象}，保持原有列顺序
+        days: day1..dayN 列名，保持原有列顺序
+        extra: 结构中其他存在的列
+    """
+
+    def __init__(self, sku, spec, batches: List[Tuple], dates: Dict, days: List[str], extra: List):
+        self.sku = sku
+        self.spec = spec
+        self.batches = batches
+        self.dates = dates
+        self.days = days
+        self.extra = extra
+
+class SheetSchema:
+    """
+    一种工作表的列结构
+
+    在读取时作为 usecols 只解析结构中的列（WorkbookReader 按 cache_key 缓存解析结果），
+    读取后用 resolve 对表头解析一次得到 SheetPlan，之后只按 SheetPlan 中的列名取数。
+    """
+
+    def __init__(self, name: str, sku: bool = True, spec: bool = True, batches: int = 0,
+                 dates: Optional[str] = None, days: bool = False, extra: tuple = ()):
+        """
+        Args:
+            name: 结构名
+            sku: 是否包含SKU列（别名见 SKU_COLUMNS）
+            spec: 是否包含规格列（别名见 SPEC_COLUMNS）
+            batches: 到货批次-i/到货数量-i 的批次数
+            dates: 日期列的识别方式，'formats' 按配置 date.input_formats 识别，
+                'any' 为pandas能识别的任意日期，None 不包含日期列
+            days: 是否包含 day1..dayN 列
+            extra: 其他需要的列名
+        """
+        self.name = name
+        self.sku_columns = SKU_COLUMNS if sku else []
+        self.spec_columns = SPEC_COLUMNS if spec else []
+        self.batch_columns = [(f'到货批次-{i}', f'到货数量-{i}') for i in range(1, batches + 1)]
+        self.dates = dates
+        self.days = days
+        self.extra = list(extra)
+        self._fixed = set(self.sku_columns) | set(self.spec_columns) | set(self.extra)
+        self._fixed.update(col for pair in self.batch_columns for col in pair)
+        self._last_plan = None
+
+    @property
+    def date_formats(self) -> list:
+        return config.get('date.input_formats', ['%Y-%m-%d'])
+
+    @property
+    def cache_key(self) -> tuple:
+        """与表头无关的缓存键：同一结构和日期格式选出的列相同"""
+        formats = tuple(self.date_formats) if self.dates == 'formats' else ()
+        return (f'schema:{self.name}', SCHEMA_VERSION) + formats
+
+    def __repr__(self) -> str:
+        return f'SheetSchema({self.name!r})'
+
+    def __call__(self, label) -> bool:
+        """usecols：表头是否属于该结构"""
+        if isinstance(label, str) and (label in self._fixed or self.days and DAY_PATTERN.match(label)):
+            return True
+        return self._parse_date(label, self.date_formats) is not None
+
+    def resolve(self, columns) -> SheetPlan:
+        """
+        解析表头，同一表头和日期格式只解析一次
+
+        Args:
+            columns: 工作表的列名
+        """
+        date_formats = self.date_formats
+        key = (tuple(columns), tuple(date_formats))
+        if self._last_plan is not None and self._last_plan[0] == key:
+            return self._last_plan[1]
+
+        present = set(col for col in columns if isinstance(col, str))
+        dates = {}
+        if self.dates is not None:
+            for col in columns:
+                if isinstance(col, str) and col in self._fixed:
+                    continue
+                parsed = self._parse_date(col, date_formats)
+                if parsed is not None:
+                    dates[col] = parsed
+        plan = SheetPlan(
+            sku=find_column(present, self.sku_columns),
+            spec=find_column(present, self.spec_columns),
+            batches=[pair for pair in self.batch_columns if pair[0] in present and pair[1] in present],
+            dates=dates,
+            days=[col for col in columns if self.days and isinstance(col, str) and DAY_PATTERN.match(col)],
+            extra=[col for col in self.extra if col in present],
+        )
+        self._last_plan = (key, plan)
+        return plan
+
+    def _parse_date(self, label, date_formats: list) -> Optional[date]:
+        if self.dates == 'formats':
+            return parse_date_header(label, date_formats)
+        if self.dates == 'any':
+            return _parse_any_date(label)
+        return None
+
+# 到货计划的常规产品和S级产品工作表
+REGULAR_SCHEMA = SheetSchema('常规产品', batches=BATCH_COUNT)
+S_LEVEL_SCHEMA = SheetSchema('S级产品', dates='formats')
+
+# 转换结果（SKU × day1..dayN）
+SUMMARY_SCHEMA = SheetSchema('汇总', spec=False, days=True, extra=('color', 'size', 'dt'))
+
+# 上传格式的输入：SKU、规格和任意格式的日期列
+UPLOAD_SCHEMA = SheetSchema('上传格式', dates='any')
\ No newline at end of file
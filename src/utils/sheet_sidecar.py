@@ -0,0 +1,318 @@
+"""已解析工作表的列式缓存模块"""
+
+import datetime
+import hashlib
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, Optional
+import numpy as np
+import pandas as pd
+from src.utils.excel_utils import file_sha256
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pa = feather = None
+    PYARROW_AVAILABLE = False
+
+# 编码方式变化时递增，使旧文件失效
+SIDECAR_VERSION = 2
+
+METADATA_KEY = b'sheet_sidecar'
+
+# object列中各Python类型的标记；每种类型单独存为一列Arrow数组，读取时按标记还原
+_OBJECT_TYPES = {
+    type(None): 'n',
+    str: 's',
+    float: 'f',
+    int: 'i',
+    bool: 'b',
+    datetime.datetime: 'd',
+    datetime.date: 'D',
+    datetime.time: 'h',
+    pd.Timestamp: 'T',
+}
+
+_TAG_CODES = {tag: code for code, tag in enumerate(_OBJECT_TYPES.values())}
+
+def _arrow_types() -> Dict[str, 'pa.DataType']:
+    return {
+        's': pa.string(),
+        'f': pa.float64(),
+        'i': pa.int64(),
+        'b': pa.bool_(),
+        'd': pa.timestamp('us'),
+        'D': pa.date32(),
+        'h': pa.time64('us'),
+        'T': pa.timestamp('ns'),
+    }
+
+class UnsupportedSheet(Exception):
+    """工作表包含无法无损保存的值"""
+
+class SheetSidecar:
+    """
+    以Arrow IPC文件保存已解析的工作表
+
+    每个工作簿（按内容键区分）对应缓存目录下的一个子目录，其中每个工作表一个文件。
+    文件不压缩，读取时以内存映射方式加载，不再解析xlsx。
+    只含文本和缺失值的object列保存为Arrow字典列，读取时整列转换；
+    混合类型的object列按值的类型拆分保存，读取后值和类型与read_excel的结果一致。
+    超出容量时按最近使用时间淘汰整个工作簿的文件。
+    """
+
+    def __init__(self, directory: Path, max_size_mb: float = 1024):
+        self.directory = Path(directory)
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        self.logger = logging.getLogger(__name__)
+
+    @classmethod
+    def from_config(cls, config) -> Optional['SheetSidecar']:
+        """
+        根据配置中的 reader.sidecar 节创建缓存
+
+        Args:
+            config: 配置字典或配置管理器（支持get方法）
+
+        Returns:
+            未启用或未安装pyarrow时返回None
+        """
+        sidecar_config = (config.get('reader') or {}).get('sidecar') or {}
+        if not sidecar_config.get('enabled', False):
+            return None
+        if not PYARROW_AVAILABLE:
+            logging.getLogger(__name__).debug("未安装pyarrow，不使用工作表缓存")
+            return None
+        return cls(
+            sidecar_config.get('directory', '.cache/sheets'),
+            sidecar_config.get('max_size_mb', 1024)
+        )
+
+    @staticmethod
+    def make_key(input_file: Path, config: Dict, **params) -> str:
+        """
+        生成源工作簿的内容键
+
+        Args:
+            input_file: 源工作簿路径
+            config: 影响解析结果的配置（如预处理相关的excel、date节）
+            **params: 其他影响解析结果的参数（如处理日期）
+        """
+        payload = json.dumps({
+            'version': SIDECAR_VERSION,
+            'input': file_sha256(input_file),
+            'config': config,
+            'params': params,
+        }, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str, name: str) -> Path:
+        digest = hashlib.sha256(name.encode('utf-8')).hexdigest()[:16]
+        return self.directory / key / f'{digest}.arrow'
+
+    def contains(self, key: str, name: str) -> bool:
+        return self._path(key, name).exists()
+
+    def get(self, key: str, name: str) -> Optional[pd.DataFrame]:
+        """
+        读取缓存的工作表
+
+        Args:
+            key: 工作簿内容键
+            name: 工作表及解析参数的标识
+
+        Returns:
+            未命中或文件损坏时返回None
+        """
+        path = self._path(key, name)
+        if not path.exists():
+            return None
+        try:
+            df = _decode(feather.read_table(path, memory_map=True))
+        except Exception as e:
+            self.logger.warning(f"读取工作表缓存失败，重新解析: {path} ({str(e)})")
+            return None
+        # 更新最近使用时间
+        os.utime(path.parent)
+        return df
+
+    def put(self, key: str, name: str, df: pd.DataFrame) -> None:
+        """保存工作表，包含无法无损保存的值时跳过"""
+        path = self._path(key, name)
+        tmp_path = path.with_suffix('.tmp')
+        try:
+            table = _encode(df)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            feather.write_feather(table, tmp_path, compression='uncompressed')
+            os.replace(tmp_path, path)
+        except UnsupportedSheet as e:
+            self.logger.debug(f"工作表无法缓存: {str(e)}")
+            return
+        except (OSError, pa.ArrowException) as e:
+            self.logger.warning(f"写入工作表缓存失败: {str(e)}")
+            if tmp_path.exists():
+                tmp_path.unlink()
+            return
+
+        try:
+            self._evict()
+        except OSError as e:
+            # 并行处理时其他进程可能正在删除同一目录
+            self.logger.warning(f"淘汰工作表缓存失败: {str(e)}")
+
+    def _evict(self) -> None:
+        """按最近使用时间淘汰工作簿，直到总大小不超过上限"""
+        entries = []
+        total_size = 0
+        for entry_dir in self.directory.iterdir():
+            if not entry_dir.is_dir():
+                continue
+            size = sum(f.stat().st_size for f in entry_dir.iterdir() if f.is_file())
+            entries.append((entry_dir.stat().st_mtime, size, entry_dir))
+            total_size += size
+
+        for _, size, entry_dir in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total_size -= size
+            self.logger.debug(f"已淘汰工作表缓存: {entry_dir.name}")
+
+def _encode_label(label) -> list:
+    for tag, label_type in (('s', str), ('i', int), ('f', float)):
+        if type(label) is label_type:
+            return [tag, label]
+    if type(label) is datetime.datetime:
+        return ['d', label.isoformat()]
+    if type(label) is pd.Timestamp:
+        return ['T', label.isoformat()]
+    if type(label) is datetime.date:
+        return ['D', label.isoformat()]
+    raise UnsupportedSheet(f"列名类型 {type(label).__name__}")
+
+def _decode_label(item: list):
+    tag, value = item
+    if tag == 'd':
+        return datetime.datetime.fromisoformat(value)
+    if tag == 'T':
+        return pd.Timestamp(value)
+    if tag == 'D':
+        return datetime.date.fromisoformat(value)
+    return value
+
+def _string_missing(values: np.ndarray, codes: np.ndarray) -> Optional[str]:
+    """
+    object列是否只含文本和一种缺失值
+
+    Returns:
+        缺失值全部为None时返回'none'，全部为NaN（或没有缺失值）时返回'nan'，否则返回None
+    """
+    missing = values[codes != _TAG_CODES['s']]
+    if all(value is None for value in missing):
+        return 'none' if len(missing) else 'nan'
+    if all(type(value) is float and value != value for value in missing):
+        return 'nan'
+    return None
+
+def _encode(df: pd.DataFrame) -> 'pa.Table':
+    """将DataFrame转换为Arrow表，列按位置命名，原列名和object列的类型标记保存在元数据中"""
+    if not (isinstance(df.index, pd.RangeIndex) and df.index.start == 0 and df.index.step == 1):
+        raise UnsupportedSheet("索引不是默认的RangeIndex")
+
+    arrow_types = _arrow_types()
+    columns = {}
+    object_columns = {}
+    string_columns = {}
+    for position in range(df.shape[1]):
+        name = f'c{position}'
+        values = df.iloc[:, position]
+        if values.dtype != object:
+            columns[name] = values
+            continue
+
+        values = values.to_numpy()
+        codes = np.fromiter(
+            (_TAG_CODES.get(_OBJECT_TYPES.get(type(value)), -1) for value in values),
+            dtype=np.int8,
+            count=len(values)
+        )
+        if (codes < 0).any():
+            bad = values[codes < 0][0]
+            raise UnsupportedSheet(f"列 {df.columns[position]} 包含 {type(bad).__name__} 类型的值")
+
+        missing = _string_missing(values, codes)
+        if missing is not None:
+            piece = np.where(codes == _TAG_CODES['s'], values, None)
+            columns[name] = pa.array(piece, type=pa.string(), from_pandas=False).dictionary_encode()
+            string_columns[name] = missing
+            continue
+
+        columns[name] = codes
+        tags = []
+        for tag, code in _TAG_CODES.items():
+            mask = codes == code
+            if tag == 'n' or not mask.any():
+                continue
+            piece = np.full(len(values), None, dtype=object)
+            piece[mask] = values[mask]
+            if tag in ('d', 'T') and any(value.tzinfo is not None for value in values[mask]):
+                raise UnsupportedSheet(f"列 {df.columns[position]} 包含带时区的时间")
+            columns[f'{name}.{tag}'] = pa.array(piece, type=arrow_types[tag], from_pandas=False)
+            tags.append(tag)
+        object_columns[name] = tags
+
+    plain = {name: column for name, column in columns.items() if not isinstance(column, pa.Array)}
+    table = pa.Table.from_pandas(pd.DataFrame(plain, index=df.index), preserve_index=False)
+    for name, column in columns.items():
+        if isinstance(column, pa.Array):
+            table = table.append_column(name, column)
+
+    metadata = dict(table.schema.metadata or {})
+    metadata[METADATA_KEY] = json.dumps({
+        'version': SIDECAR_VERSION,
+        'columns': [_encode_label(label) for label in df.columns],
+        'objects': object_columns,
+        'strings': string_columns,
+    }, ensure_ascii=False).encode('utf-8')
+    return table.replace_schema_metadata(metadata)
+
+def _decode(table: 'pa.Table') -> pd.DataFrame:
+    """还原 _encode 保存的DataFrame"""
+    meta = json.loads(table.schema.metadata[METADATA_KEY])
+    if meta['version'] != SIDECAR_VERSION:
+        raise ValueError(f"缓存版本 {meta['version']} 已过期")
+
+    piece_names = [name for name in table.column_names if '.' in name]
+    frame = table.drop_columns(piece_names).to_pandas()
+    data = {}
+    for position in range(len(meta['columns'])):
+        name = f'c{position}'
+        if name in meta['strings']:
+            # 字典列转换为Categorical，转回object时缺失值为NaN
+            values = frame[name].to_numpy(dtype=object)
+            if meta['strings'][name] == 'none':
+                values[pd.isna(values)] = None
+            data[position] = pd.Series(values, dtype=object)
+            continue
+        if name not in meta['objects']:
+            data[position] = frame[name]
+            continue
+
+        codes = frame[name].to_numpy()
+        values = np.full(len(codes), None, dtype=object)
+        for tag in meta['objects'][name]:
+            indices = np.flatnonzero(codes == _TAG_CODES[tag])
+            decoded = table.column(f'{name}.{tag}').take(pa.array(indices)).to_pylist()
+            if tag == 'T':
+                decoded = [pd.Timestamp(value) for value in decoded]
+            values[indices] = decoded
+        data[position] = pd.Series(values, dtype=object)
+
+    df = pd.DataFrame(data, index=pd.RangeIndex(table.num_rows))
+    df.columns = pd.Index([_decode_label(item) for item in meta['columns']])
+    return df
@@ -0,0 +1,150 @@
+"""SKU编码处理模块"""
+
+import logging
+from decimal import Decimal, InvalidOperation
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Excel将长数字显示或保存为科学计数法（如 1.23457E+17）后，超出精度的位数已经丢失
+SCIENTIFIC_PATTERN = r'^[+-]?\d+(?:\.\d+)?[eE][+-]?\d+$'
+
+# 超过该值的数字无法由float精确表示，读取为数字的SKU可能已经丢失位数
+FLOAT_EXACT_LIMIT = 2 ** 53
+
+# 报告中最多列出的受损SKU数
+REPORT_LIMIT = 10
+
+class SkuCodebook:
+    """
+    SKU字典编码
+
+    在读入数据时为每个SKU分配一次整数编码（按首次出现顺序），之后的分组、去重和关联
+    都基于编码进行，只在写出文件时还原为文本。
+    """
+
+    def __init__(self):
+        self.categories = pd.Index([], dtype=object)
+
+    def __len__(self) -> int:
+        return len(self.categories)
+
+    def encode(self, skus: pd.Series) -> np.ndarray:
+        """
+        编码SKU列，新的SKU按首次出现顺序追加到字典
+
+        Returns:
+            与输入等长的int64编码数组，缺失值为-1
+        """
+        valid = skus[skus.notna()]
+        uniques = pd.Index(pd.unique(valid.to_numpy(dtype=object)))
+        new = uniques[~uniques.isin(self.categories)]
+        if len(new):
+            self.categories = self.categories.append(new)
+        codes = np.full(len(skus), -1, dtype=np.int64)
+        codes[skus.notna().to_numpy()] = self.categories.get_indexer(valid.to_numpy(dtype=object))
+        return codes
+
+    def categorical(self, codes) -> pd.Categorical:
+        """由编码构造以本字典为类别的Categorical，写出时自动还原为文本"""
+        return pd.Categorical.from_codes(codes, categories=self.categories)
+
+def normalize_categorical_skus(values: pd.Series, column: str = 'SKU') -> pd.Series:
+    """
+    规范化SKU列并返回category类型
+
+    category类型的输入只规范化类别（每个不同的SKU一次），规范化后相同的类别合并为同一编码；
+    其他输入先按 normalize_skus 规范化再编码。
+    """
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        return normalize_skus(values, column).astype('category')
+
+    categories = normalize_skus(pd.Series(values.cat.categories, dtype=object), column)
+    uniques = pd.Index(pd.unique(categories.to_numpy(dtype=object)))
+    remap = uniques.get_indexer(categories.to_numpy(dtype=object))
+    codes = values.cat.codes.to_numpy()
+    # 缺失值按 normalize_skus 的规则编码为空字符串
+    if (codes < 0).any():
+        if '' not in uniques:
+            uniques = uniques.append(pd.Index(['']))
+        empty = uniques.get_loc('')
+        remap = np.append(remap, empty)
+    return pd.Series(
+        pd.Categorical.from_codes(remap[codes], categories=uniques),
+        index=values.index,
+        name=values.name
+    )
+
+def normalize_skus(values: pd.Series, column: str = 'SKU') -> pd.Series:
+    """
+    按列规范化SKU编码
+
+    SKU应以文本读取（read_excel的dtype=str），本函数在整列上一次完成：
+    去除首尾空白、将 '123.0' 还原为 '123'、缺失值转换为空字符串。
+    以数字读取的列同样支持，但超出float精度的数字无法还原。
+
+    科学计数法形式（或超出float精度）的SKU视为已被Excel损坏，
+    仍按原有规则展开为整数文本以保持与历史结果一致，并记录警告。
+
+    Args:
+        values: SKU列
+        column: 用于日志的列名
+
+    Returns:
+        规范化后的字符串列，索引与输入一致
+    """
+    missing = values.isna()
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        return _normalize_numeric(values, missing, column)
+
+    text = values.astype(str).str.strip()
+
+    # 正则只作用于含小数点或指数符号的少量候选值，整列只做字面量查找
+    dotted = text.str.contains('.', regex=False)
+    if dotted.any():
+        text[dotted] = text[dotted].str.replace(r'^([+-]?\d+)\.0*$', r'\1', regex=True)
+
+    damaged = _scientific_mask(text) & ~missing
+    if damaged.any():
+        _report_damage(values[damaged], column)
+        text[damaged] = text[damaged].map(_expand_scientific)
+
+    text[missing] = ''
+    return text
+
+def find_damaged_skus(values: pd.Series) -> pd.Series:
+    """返回SKU列中科学计数法形式（已损坏）的掩码"""
+    return _scientific_mask(values.astype(str).str.strip()) & values.notna()
+
+def _scientific_mask(text: pd.Series) -> pd.Series:
+    mask = text.str.contains('e', regex=False) | text.str.contains('E', regex=False)
+    if mask.any():
+        mask[mask] = text[mask].str.match(SCIENTIFIC_PATTERN)
+    return mask
+
+def _normalize_numeric(values: pd.Series, missing: pd.Series, column: str) -> pd.Series:
+    """以数字读取的SKU列：截断为整数后转换为文本"""
+    damaged = values.abs().ge(FLOAT_EXACT_LIMIT) & ~missing
+    exact = ~missing & ~damaged
+
+    text = pd.Series('', index=values.index, dtype=object)
+    text[exact] = values[exact].astype('int64').astype(str)
+    if damaged.any():
+        _report_damage(values[damaged], column)
+        text[damaged] = values[damaged].map(lambda value: str(int(value)))
+    return text
+
+def _expand_scientific(value: str) -> str:
+    """将科学计数法文本展开为整数文本"""
+    try:
+        return str(int(Decimal(value)))
+    except (InvalidOperation, ValueError):
+        return value
+
+def _report_damage(damaged: pd.Series, column: str) -> None:
+    samples = ', '.join(str(value) for value in damaged.head(REPORT_LIMIT))
+    logger.warning(
+        f"{column} 列中有 {len(damaged)} 个SKU为科学计数法或超出数字精度，"
+        f"可能已被Excel截断，请在源表中将该列设置为文本: {samples}"
+    )
\ No newline at end of file
@@ -0,0 +1,73 @@
+"""商品规格解析模块"""
+
+from typing import Dict, Tuple
+import numpy as np
+import pandas as pd
+
+# 键值布局：颜色:红色,尺码:L（冒号可为全角或省略，各项以逗号或空白分隔）
+COLOR_PATTERN = r'颜色[:：\s]*([^,，\s]+)'
+SIZE_PATTERN = r'尺码[:：\s]*([^,，\s]+)'
+KEY_PATTERN = r'颜色|尺码'
+
+# 斜杠布局：红色/L
+SLASH = '/'
+
+# 进程内缓存的规格文本数量上限，超出后清空重新缓存
+CACHE_LIMIT = 100000
+
+# 规格文本 -> (颜色, 尺码)
+_spec_cache: Dict[str, Tuple[str, str]] = {}
+
+def clear_spec_cache() -> None:
+    """清空已解析规格的缓存"""
+    _spec_cache.clear()
+
+def parse_specs(values: pd.Series) -> pd.DataFrame:
+    """
+    解析规格列中的颜色和尺码
+
+    识别两种布局：
+    - 键值布局 '颜色:红色,尺码:L'：分别取“颜色”“尺码”之后的值，缺少的一项为空字符串；
+    - 斜杠布局 '红色/L'：第一段为颜色，第二段为尺码，去除首尾空白。
+    含有“颜色”或“尺码”的按键值布局解析，否则含有“/”的按斜杠布局解析，其他为空。
+
+    同一个规格文本只解析一次（跨调用缓存），未缓存的不同文本在一次向量化操作中解析，
+    耗时与不同规格的数量而不是行数成正比。
+
+    Args:
+        values: 规格列，非文本值按str()解析，缺失值解析为空字符串
+
+    Returns:
+        索引与输入一致、包含color和size列的DataFrame
+    """
+    codes, uniques = pd.factorize(values.to_numpy(dtype=object))
+    texts = [str(value) for value in uniques]
+
+    missing = list(dict.fromkeys(text for text in texts if text not in _spec_cache))
+    if missing:
+        if len(_spec_cache) + len(missing) > CACHE_LIMIT:
+            _spec_cache.clear()
+        parsed = _parse_unique(pd.Series(missing, dtype=object))
+        _spec_cache.update(zip(missing, zip(parsed['color'], parsed['size'])))
+
+    # 末尾追加缺失值（编码-1）对应的空规格
+    pairs = [_spec_cache[text] for text in texts] + [('', '')]
+    colors = np.array([pair[0] for pair in pairs], dtype=object)
+    sizes = np.array([pair[1] for pair in pairs], dtype=object)
+    return pd.DataFrame({'color': colors[codes], 'size': sizes[codes]}, index=values.index)
+
+def _parse_unique(texts: pd.Series) -> pd.DataFrame:
+    """在不重复的规格文本上向量化解析两种布局"""
+    keyed = texts.str.contains(KEY_PATTERN)
+    slashed = ~keyed & texts.str.contains(SLASH, regex=False)
+
+    color = pd.Series('', index=texts.index, dtype=object)
+    size = pd.Series('', index=texts.index, dtype=object)
+    if keyed.any():
+        color[keyed] = texts[keyed].str.extract(COLOR_PATTERN, expand=False).fillna('')
+        size[keyed] = texts[keyed].str.extract(SIZE_PATTERN, expand=False).fillna('')
+    if slashed.any():
+        parts = texts[slashed].str.split(SLASH)
+        color[slashed] = parts.str[0].str.strip()
+        size[slashed] = parts.str[1].str.strip()
+    return pd.DataFrame({'color': color, 'size': size})
\ No newline at end of file
@@ -0,0 +1,101 @@
+"""多格式表格输出模块"""
+
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+import pandas as pd
+from src.core.config import config
+from src.core.exceptions import ConfigurationError
+from src.utils.xlsx_writer import CHUNK_ROWS, write_xlsx
+
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+OUTPUT_FORMATS = ('xlsx', 'parquet', 'arrow', 'csv')
+
+FORMAT_SUFFIXES = {
+    'xlsx': '.xlsx',
+    'parquet': '.parquet',
+    'arrow': '.arrow',
+    'csv': '.csv',
+}
+
+def resolve_formats(formats: Optional[Union[str, Sequence[str]]] = None) -> List[str]:
+    """
+    解析输出格式
+
+    Args:
+        formats: 格式列表或逗号分隔的字符串，为None时使用配置 output.formats
+
+    Returns:
+        去重后的格式列表，第一个为主格式
+
+    Raises:
+        ConfigurationError: 格式无效或缺少对应依赖时抛出
+    """
+    if formats is None:
+        formats = config.get('output.formats', ['xlsx'])
+    if isinstance(formats, str):
+        formats = formats.split(',')
+
+    resolved = []
+    for fmt in formats:
+        fmt = fmt.strip().lower()
+        if not fmt or fmt in resolved:
+            continue
+        if fmt not in OUTPUT_FORMATS:
+            raise ConfigurationError(f"无效的输出格式: {fmt}，可选: {', '.join(OUTPUT_FORMATS)}")
+        if fmt in ('parquet', 'arrow') and not PYARROW_AVAILABLE:
+            raise ConfigurationError(f"输出格式{fmt}需要安装pyarrow")
+        resolved.append(fmt)
+
+    if not resolved:
+        raise ConfigurationError("至少需要一种输出格式")
+    return resolved
+
+def write_table(
+    df: pd.DataFrame,
+    output_path: Path,
+    formats: Optional[Union[str, Sequence[str]]] = None,
+    sheet_name: str = 'Sheet1',
+    header_color: Optional[str] = None
+) -> Dict[str, Path]:
+    """
+    按各输出格式写出表格
+
+    xlsx以外的格式保留SKU的字典编码：Parquet和Arrow中为dictionary类型，
+    Arrow文件不压缩，下游可以内存映射读取。CSV按块追加写出。
+
+    Args:
+        df: 要写入的数据
+        output_path: 输出文件路径，后缀替换为各格式的扩展名
+        formats: 输出格式，见 resolve_formats
+        sheet_name: xlsx工作表名称
+        header_color: xlsx表头填充颜色
+
+    Returns:
+        {格式: 文件路径}，按formats的顺序
+    """
+    output_path = Path(output_path)
+    written = {}
+    for fmt in resolve_formats(formats):
+        path = output_path.with_suffix(FORMAT_SUFFIXES[fmt])
+        if fmt == 'xlsx':
+            write_xlsx(df, path, sheet_name=sheet_name, header_color=header_color)
+        elif fmt == 'parquet':
+            df.to_parquet(path, index=False)
+        elif fmt == 'arrow':
+            df.reset_index(drop=True).to_feather(path, compression='uncompressed')
+        else:
+            _write_csv(df, path)
+        written[fmt] = path
+    return written
+
+def _write_csv(df: pd.DataFrame, path: Path) -> None:
+    """按块写出CSV，避免一次性生成整个文件的文本"""
+    encoding = config.get('output.csv_encoding', 'utf-8')
+    with open(path, 'w', encoding=encoding, newline='') as f:
+        for start in range(0, max(len(df), 1), CHUNK_ROWS):
+            df.iloc[start:start + CHUNK_ROWS].to_csv(f, index=False, header=start == 0)
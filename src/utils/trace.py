@@ -0,0 +1,43 @@
+"""调试跟踪模块"""
+
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+import pandas as pd
+from src.core.config import config
+
+logger = logging.getLogger(__name__)
+
+def trace_enabled() -> bool:
+    """是否输出跟踪表（配置 trace.enabled）"""
+    return bool(config.get('trace.enabled', False))
+
+def emit_table(name: str, build: Callable[[], pd.DataFrame]) -> Optional[Path]:
+    """
+    输出一张跟踪表
+
+    未启用跟踪时直接返回，不调用build，调用方不产生任何计算或格式化开销；
+    启用时整张表写为 trace.directory 下的一个CSV文件，只记录一条日志。
+
+    Args:
+        name: 表名，用于文件名
+        build: 生成跟踪表的函数
+
+    Returns:
+        写出的文件路径，未启用或写出失败时返回None
+    """
+    if not trace_enabled():
+        return None
+
+    try:
+        table = build()
+        directory = Path(config.get('trace.directory', 'logs/trace'))
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{datetime.now():%Y%m%d_%H%M%S_%f}_{name}.csv"
+        table.to_csv(path, index=False, encoding='utf-8-sig')
+        logger.info(f"跟踪表 {name}: {len(table)} 行 -> {path}")
+        return path
+    except Exception as e:
+        logger.warning(f"写入跟踪表失败: {name} ({str(e)})")
+        return None
\ No newline at end of file
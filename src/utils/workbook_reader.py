@@ -0,0 +1,348 @@
+"""工作簿读取模块"""
+
+import json
+import logging
+import os
+import tempfile
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+import numpy as np
+import pandas as pd
+from src.core.config import config
+from src.core.exceptions import ConfigurationError, ExcelOperationError
+from src.utils.excel_utils import file_sha256
+from src.utils.sheet_sidecar import SheetSidecar
+from src.utils.xlsx_writer import write_xlsx
+
+try:
+    import python_calamine  # noqa: F401
+    # pandas 2.2起才支持calamine引擎
+    CALAMINE_AVAILABLE = 'calamine' in getattr(pd.ExcelFile, '_engines', {})
+except ImportError:
+    CALAMINE_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# 基准测试工作簿每MB大约包含的行数（20列数字和文本混合）
+BENCHMARK_ROWS_PER_MB = 10000
+BENCHMARK_COLUMNS = 20
+
+# 未配置 reader.benchmark_file 时基准测试结果的文件名，保存在用户缓存目录
+BENCHMARK_FILE_NAME = 'reader_benchmark.json'
+
+class ReaderBackend:
+    """
+    读取后端接口
+
+    open返回已打开的工作簿，提供sheet_names、parse(sheet_name, usecols, dtype)和close()，
+    各后端解析得到的DataFrame一致。
+    """
+
+    name = ''
+    available = True
+
+    def open(self, file_path: Path) -> pd.ExcelFile:
+        return pd.ExcelFile(file_path, engine=self.name)
+
+class OpenpyxlBackend(ReaderBackend):
+    """openpyxl引擎，纯Python实现，始终可用"""
+
+    name = 'openpyxl'
+
+class CalamineBackend(ReaderBackend):
+    """calamine引擎（Rust实现），解析速度为openpyxl的数倍，需要安装python-calamine"""
+
+    name = 'calamine'
+    available = CALAMINE_AVAILABLE
+
+READER_BACKENDS: Dict[str, ReaderBackend] = {
+    backend.name: backend for backend in (CalamineBackend(), OpenpyxlBackend())
+}
+
+READER_ENGINES = ('auto',) + tuple(READER_BACKENDS)
+
+# 自动选择时各文件大小区间的基准测试结果：区间序号 -> 引擎名
+_bucket_choices: Dict[int, str] = {}
+
+def available_backends() -> List[str]:
+    """当前环境可用的读取引擎"""
+    return [name for name, backend in READER_BACKENDS.items() if backend.available]
+
+def get_backend(file_path: Path, engine: Optional[str] = None) -> ReaderBackend:
+    """
+    选择读取后端
+
+    Args:
+        file_path: 要读取的文件，auto模式按其大小选择
+        engine: auto/calamine/openpyxl，为None时使用配置 reader.engine。
+            auto在多个引擎可用时使用该文件大小区间内基准测试最快的引擎
+
+    Raises:
+        ConfigurationError: 引擎名称无效时抛出
+        ExcelOperationError: 指定的引擎在当前环境不可用时抛出
+    """
+    engine = engine or config.get('reader.engine', 'auto')
+    if engine not in READER_ENGINES:
+        raise ConfigurationError(f"无效的读取引擎: {engine}，可选: {', '.join(READER_ENGINES)}")
+
+    if engine != 'auto':
+        backend = READER_BACKENDS[engine]
+        if not backend.available:
+            raise ExcelOperationError(f"读取引擎为{engine}，但当前环境未安装python-{engine}")
+        return backend
+
+    names = available_backends()
+    if len(names) == 1:
+        return READER_BACKENDS[names[0]]
+    return READER_BACKENDS[_choose_for_bucket(size_bucket(Path(file_path).stat().st_size))]
+
+def size_bucket(size_bytes: int) -> int:
+    """文件大小所在的区间序号，区间分界由 reader.size_buckets_mb 配置"""
+    bounds = _bucket_bounds()
+    return bisect_right(bounds, size_bytes / 1024 / 1024)
+
+def benchmark_backends(rows: int, repeat: int = 1) -> Dict[str, float]:
+    """
+    在临时生成的工作簿上测量各可用引擎的解析耗时
+
+    Args:
+        rows: 基准工作簿的行数
+        repeat: 每个引擎重复次数，取最短耗时
+
+    Returns:
+        {引擎名: 秒}
+    """
+    rng = np.random.default_rng(0)
+    half = BENCHMARK_COLUMNS // 2
+    data = {f'n{i}': rng.integers(0, 1000, rows) for i in range(half)}
+    data.update({f's{i}': rng.integers(0, 10 ** 12, rows).astype(str) for i in range(BENCHMARK_COLUMNS - half)})
+
+    timings = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / 'benchmark.xlsx'
+        write_xlsx(pd.DataFrame(data), path)
+        for name in available_backends():
+            best = None
+            for _ in range(max(repeat, 1)):
+                start = time.perf_counter()
+                with READER_BACKENDS[name].open(path) as xls:
+                    xls.parse(xls.sheet_names[0])
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            timings[name] = best
+    return timings
+
+def _bucket_bounds() -> List[float]:
+    return sorted(config.get('reader.size_buckets_mb', [1, 10]))
+
+def _benchmark_rows(bucket: int) -> int:
+    """区间的代表行数：取区间下界（第一个区间取上界的十分之一）对应的行数"""
+    bounds = _bucket_bounds()
+    size_mb = bounds[bucket - 1] if bucket > 0 else (bounds[0] if bounds else 1) / 10
+    max_rows = config.get('reader.benchmark_max_rows', 5000)
+    return max(100, min(int(size_mb * BENCHMARK_ROWS_PER_MB), max_rows))
+
+def _benchmark_enabled() -> bool:
+    """是否允许基准测试（配置 reader.benchmark）"""
+    return bool(config.get('reader.benchmark', True))
+
+def _user_cache_dir() -> Path:
+    """当前用户的缓存目录（Windows为 %LOCALAPPDATA%，其他系统为 $XDG_CACHE_HOME 或 ~/.cache）"""
+    base = os.environ.get('LOCALAPPDATA') or os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(base) / 'delivery-plan-processor'
+
+def _benchmark_file() -> Path:
+    return Path(config.get('reader.benchmark_file') or _user_cache_dir() / BENCHMARK_FILE_NAME)
+
+def _choose_for_bucket(bucket: int) -> str:
+    """
+    返回区间内最快的引擎，结果在进程内缓存并保存到 reader.benchmark_file（默认在用户缓存目录）
+
+    不允许基准测试且没有保存的结果时，直接使用 available_backends 中的第一个引擎。
+    """
+    if bucket in _bucket_choices:
+        return _bucket_choices[bucket]
+
+    benchmark_file = _benchmark_file()
+    signature = {'engines': available_backends(), 'size_buckets_mb': _bucket_bounds()}
+    stored = _load_benchmarks(benchmark_file, signature)
+    if str(bucket) in stored:
+        _bucket_choices[bucket] = stored[str(bucket)]
+        return _bucket_choices[bucket]
+    if not _benchmark_enabled():
+        _bucket_choices[bucket] = available_backends()[0]
+        return _bucket_choices[bucket]
+
+    timings = benchmark_backends(_benchmark_rows(bucket))
+    choice = min(timings, key=timings.get)
+    logger.info(
+        f"读取引擎基准测试（区间 {bucket}）: "
+        + ', '.join(f"{name} {seconds:.3f}s" for name, seconds in timings.items())
+        + f"，选用 {choice}"
+    )
+    _bucket_choices[bucket] = choice
+    stored[str(bucket)] = choice
+    _save_benchmarks(benchmark_file, signature, stored)
+    return choice
+
+def _load_benchmarks(benchmark_file: Path, signature: Dict) -> Dict[str, str]:
+    """读取保存的基准测试结果，可用引擎或区间配置变化时视为无效"""
+    try:
+        with open(benchmark_file, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if saved.get('signature') != signature:
+        return {}
+    return {key: name for key, name in saved.get('choices', {}).items() if name in READER_BACKENDS}
+
+def _save_benchmarks(benchmark_file: Path, signature: Dict, choices: Dict[str, str]) -> None:
+    try:
+        benchmark_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(benchmark_file, 'w', encoding='utf-8') as f:
+            json.dump({'signature': signature, 'choices': choices}, f, ensure_ascii=False, indent=2)
+    except OSError as e:
+        logger.warning(f"保存读取引擎基准测试结果失败: {str(e)}")
+
+# 已解析工作表的进程内缓存：(内容键, 工作表, 列, 类型) -> DataFrame
+_sheet_cache: 'OrderedDict[tuple, pd.DataFrame]' = OrderedDict()
+
+def clear_sheet_cache() -> None:
+    """清空已解析工作表的缓存"""
+    _sheet_cache.clear()
+
+def _freeze(value) -> Optional[tuple]:
+    """将usecols/dtype参数转换为可哈希的缓存键"""
+    if value is None:
+        return None
+    if callable(value):
+        return tuple(value.cache_key)
+    if isinstance(value, dict):
+        return tuple(sorted((str(key), str(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(value)
+    return (str(value),)
+
+class WorkbookReader:
+    """
+    工作簿读取器
+
+    同一文件只打开一次，按需解析工作表；已解析的工作表按内容键、
+    工作表名、列和类型缓存在进程内，并在启用 reader.sidecar 时保存为Arrow文件，
+    同一内容再次读取时不再解析（也不打开工作簿）。
+    各引擎解析结果一致，因此缓存不区分引擎。
+    """
+
+    def __init__(self, file_path: Union[str, Path], engine: Optional[str] = None,
+                 source_key: Optional[str] = None):
+        """
+        Args:
+            file_path: 工作簿路径
+            engine: 读取引擎，见 get_backend
+            source_key: 缓存使用的内容键，默认为文件内容哈希。
+                由源工作簿生成的中间文件可以使用源工作簿的键，使重新生成的文件也能命中缓存
+        """
+        self.file_path = Path(file_path)
+        self.engine = engine
+        self.source_key = source_key
+        self.backend_name = None
+        self._excel_file = None
+        self._file_hash = None
+
+    def __enter__(self) -> 'WorkbookReader':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def file_hash(self) -> str:
+        """文件内容的SHA-256"""
+        if self._file_hash is None:
+            self._file_hash = file_sha256(self.file_path)
+        return self._file_hash
+
+    @property
+    def content_key(self) -> str:
+        return self.source_key or self.file_hash
+
+    @property
+    def excel_file(self) -> pd.ExcelFile:
+        """首次访问时打开工作簿"""
+        if self._excel_file is None:
+            backend = get_backend(self.file_path, self.engine)
+            self._excel_file = backend.open(self.file_path)
+            self.backend_name = backend.name
+            logger.debug(f"使用{backend.name}引擎读取: {self.file_path.name}")
+        return self._excel_file
+
+    @property
+    def sheet_names(self) -> List[str]:
+        return self.excel_file.sheet_names
+
+    def read_sheet(self, sheet_name: str,
+                   usecols: Optional[Union[List, Callable]] = None,
+                   dtype: Optional[Dict] = None) -> pd.DataFrame:
+        """
+        读取工作表
+
+        Args:
+            sheet_name: 工作表名
+            usecols: 只解析的列，参数含义同read_excel；
+                可调用对象只有提供 cache_key（如 SheetSchema）时才缓存
+            dtype: 列类型，参数含义同read_excel
+
+        Returns:
+            工作表数据的副本，调用方可以直接修改
+        """
+        # 没有cache_key的可调用usecols无法作为缓存键，直接解析
+        if callable(usecols) and getattr(usecols, 'cache_key', None) is None:
+            return self.excel_file.parse(sheet_name, usecols=usecols, dtype=dtype)
+
+        key = (self.content_key, sheet_name, _freeze(usecols), _freeze(dtype))
+        df = _sheet_cache.get(key)
+        if df is not None:
+            _sheet_cache.move_to_end(key)
+            logger.debug(f"工作表缓存命中: {self.file_path.name}/{sheet_name}")
+            return df.copy()
+
+        sidecar = SheetSidecar.from_config(config)
+        if sidecar is not None:
+            df = sidecar.get(key[0], repr(key[1:]))
+            if df is not None:
+                logger.debug(f"工作表文件缓存命中: {self.file_path.name}/{sheet_name}")
+
+        if df is None:
+            df = self.excel_file.parse(sheet_name, usecols=usecols, dtype=dtype)
+            if sidecar is not None:
+                sidecar.put(key[0], repr(key[1:]), df)
+        self._remember(key, df)
+        return df.copy()
+
+    def is_cached(self, sheet_name: str, usecols: Optional[Union[List, Callable]] = None,
+                  dtype: Optional[Dict] = None) -> bool:
+        """工作表是否可以不解析工作簿直接读取"""
+        if callable(usecols) and getattr(usecols, 'cache_key', None) is None:
+            return False
+        key = (self.content_key, sheet_name, _freeze(usecols), _freeze(dtype))
+        if key in _sheet_cache:
+            return True
+        sidecar = SheetSidecar.from_config(config)
+        return sidecar is not None and sidecar.contains(key[0], repr(key[1:]))
+
+    def close(self) -> None:
+        if self._excel_file is not None:
+            self._excel_file.close()
+            self._excel_file = None
+
+    @staticmethod
+    def _remember(key: tuple, df: pd.DataFrame) -> None:
+        max_entries = config.get('reader.cache_entries', 8)
+        if max_entries <= 0:
+            return
+        _sheet_cache[key] = df
+        while len(_sheet_cache) > max_entries:
+            _sheet_cache.popitem(last=False)
\ No newline at end of file
@@ -0,0 +1,277 @@
+"""流式Excel写入模块"""
+
+import datetime
+import decimal
+import numbers
+import zipfile
+from pathlib import Path
+from typing import Iterable, Optional, Sequence
+from xml.sax.saxutils import escape, quoteattr
+import numpy as np
+import pandas as pd
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.utils import get_column_letter
+from openpyxl.utils.datetime import to_excel
+from openpyxl.utils.exceptions import IllegalCharacterError
+
+# 每次转换为Python对象的行数，控制写入过程中的内存占用
+CHUNK_ROWS = 10000
+
+# 累积多少行的XML后写入文件
+FLUSH_ROWS = 1000
+
+_MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_PKG_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+_XML_HEADER = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+# 日期时间的数字格式，与openpyxl写入时的默认格式一致
+_NUMBER_FORMATS = {
+    'datetime': (164, 'yyyy-mm-dd h:mm:ss'),
+    'date': (165, 'yyyy-mm-dd'),
+    'time': (166, 'h:mm:ss'),
+}
+
+# 单元格样式序号：(值类型, 是否表头)。表头样式与pandas.to_excel默认一致（加粗、细边框、居中）
+_STYLES = [(kind, header) for header in (False, True) for kind in ('general', 'datetime', 'date', 'time')]
+_STYLE_INDEX = {style: index for index, style in enumerate(_STYLES)}
+
+class XlsxStreamWriter:
+    """
+    流式xlsx写入器
+
+    直接生成工作表XML并写入zip，数据块在产生时即写出（可多次append），
+    内存占用与行数无关，也不创建openpyxl的单元格对象。
+    字符串以内联字符串写入，日期时间按openpyxl的规则转换为Excel序列值。
+
+    Example:
+        with XlsxStreamWriter(path, sheet_name='汇总') as writer:
+            for chunk in chunks:
+                writer.append(chunk)
+    """
+
+    def __init__(self, output_path: Path, sheet_name: str = 'Sheet1', header_color: Optional[str] = None):
+        """
+        Args:
+            output_path: 输出文件路径
+            sheet_name: 工作表名称
+            header_color: 表头填充颜色（如 '1F6B3B'），为None时不填充
+        """
+        self.output_path = Path(output_path)
+        self.sheet_name = sheet_name
+        self.header_color = header_color
+        self.rows_written = 0
+        self._letters = []
+        self._header_written = False
+        self._zip = zipfile.ZipFile(self.output_path, 'w', zipfile.ZIP_DEFLATED)
+        # 工作表大小事先未知，写入时就使用ZIP64，超过2GB时不会在关闭时报错
+        self._sheet = self._zip.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True)
+        self._sheet.write(f'{_XML_HEADER}<worksheet xmlns="{_MAIN_NS}"><sheetData>'.encode('utf-8'))
+
+    def __enter__(self) -> 'XlsxStreamWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write_header(self, columns: Sequence) -> None:
+        """写入表头行，必须在数据行之前调用"""
+        if self._header_written or self.rows_written:
+            raise ValueError("表头必须在数据行之前写入，且只能写入一次")
+        self._header_written = True
+        self._write_rows([list(columns)], header=True)
+
+    def append(self, df: pd.DataFrame) -> None:
+        """追加一个数据块，首次追加时写入其列名作为表头"""
+        if not self._header_written and not self.rows_written:
+            self.write_header(df.columns)
+        for start in range(0, len(df), CHUNK_ROWS):
+            self._write_rows(_to_rows(df.iloc[start:start + CHUNK_ROWS]))
+
+    def append_rows(self, rows: Iterable[Sequence]) -> None:
+        """追加Python值的行，None为空单元格"""
+        self._write_rows(rows)
+
+    def close(self) -> None:
+        """写出工作簿的其余部分并关闭文件"""
+        if self._zip is None:
+            return
+        self._sheet.write(b'</sheetData></worksheet>')
+        self._sheet.close()
+        for name, content in self._package_parts().items():
+            self._zip.writestr(name, content)
+        self._zip.close()
+        self._zip = None
+
+    def abort(self) -> None:
+        """放弃写入并删除不完整的文件"""
+        if self._zip is None:
+            return
+        self._sheet.close()
+        self._zip.close()
+        self._zip = None
+        self.output_path.unlink(missing_ok=True)
+
+    def _write_rows(self, rows: Iterable[Sequence], header: bool = False) -> None:
+        lines = []
+        row_number = self.rows_written + self._header_written + (0 if header else 1)
+        for row in rows:
+            if len(row) > len(self._letters):
+                self._letters.extend(get_column_letter(i + 1) for i in range(len(self._letters), len(row)))
+            cells = ''.join([
+                _cell(f'{letter}{row_number}', value, header)
+                for letter, value in zip(self._letters, row)
+            ])
+            lines.append(f'<row r="{row_number}">{cells}</row>')
+            row_number += 1
+            if not header:
+                self.rows_written += 1
+            if len(lines) >= FLUSH_ROWS:
+                self._sheet.write(''.join(lines).encode('utf-8'))
+                lines = []
+        if lines:
+            self._sheet.write(''.join(lines).encode('utf-8'))
+
+    def _package_parts(self) -> dict:
+        fill = ''
+        if self.header_color:
+            fill = f'<fill><patternFill patternType="solid"><fgColor rgb="00{self.header_color}"/><bgColor rgb="00{self.header_color}"/></patternFill></fill>'
+        fill_count = 3 if self.header_color else 2
+
+        num_fmts = ''.join(f'<numFmt numFmtId="{fmt_id}" formatCode={quoteattr(code)}/>'
+                           for fmt_id, code in _NUMBER_FORMATS.values())
+        xfs = []
+        for kind, header in _STYLES:
+            fmt_id = _NUMBER_FORMATS[kind][0] if kind in _NUMBER_FORMATS else 0
+            attrs = f'numFmtId="{fmt_id}" fontId="0" fillId="0" borderId="0"'
+            if fmt_id:
+                attrs += ' applyNumberFormat="1"'
+            if not header:
+                xfs.append(f'<xf {attrs} xfId="0"/>')
+                continue
+            attrs = attrs.replace('fontId="0"', 'fontId="1"').replace('borderId="0"', 'borderId="1"')
+            if self.header_color:
+                attrs = attrs.replace('fillId="0"', 'fillId="2"') + ' applyFill="1"'
+            xfs.append(f'<xf {attrs} xfId="0" applyFont="1" applyBorder="1" applyAlignment="1">'
+                       f'<alignment horizontal="center" vertical="top"/></xf>')
+
+        thin = '<{0} style="thin"/>'
+        styles = (
+            f'{_XML_HEADER}<styleSheet xmlns="{_MAIN_NS}">'
+            f'<numFmts count="{len(_NUMBER_FORMATS)}">{num_fmts}</numFmts>'
+            '<fonts count="2"><font><sz val="11"/><name val="Calibri"/><family val="2"/></font>'
+            '<font><b/></font></fonts>'
+            f'<fills count="{fill_count}"><fill><patternFill patternType="none"/></fill>'
+            f'<fill><patternFill patternType="gray125"/></fill>{fill}</fills>'
+            '<borders count="2"><border><left/><right/><top/><bottom/><diagonal/></border>'
+            f'<border>{"".join(thin.format(side) for side in ("left", "right", "top", "bottom"))}<diagonal/></border></borders>'
+            '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+            f'<cellXfs count="{len(xfs)}">{"".join(xfs)}</cellXfs>'
+            '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+            '</styleSheet>'
+        )
+        return {
+            '[Content_Types].xml': (
+                f'{_XML_HEADER}<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                '<Default Extension="xml" ContentType="application/xml"/>'
+                '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+                '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+                '</Types>'
+            ),
+            '_rels/.rels': (
+                f'{_XML_HEADER}<Relationships xmlns="{_PKG_REL_NS}">'
+                f'<Relationship Id="rId1" Type="{_REL_NS}/officeDocument" Target="xl/workbook.xml"/>'
+                '</Relationships>'
+            ),
+            'xl/workbook.xml': (
+                f'{_XML_HEADER}<workbook xmlns="{_MAIN_NS}" xmlns:r="{_REL_NS}">'
+                f'<sheets><sheet name={quoteattr(self.sheet_name)} sheetId="1" r:id="rId1"/></sheets>'
+                '</workbook>'
+            ),
+            'xl/_rels/workbook.xml.rels': (
+                f'{_XML_HEADER}<Relationships xmlns="{_PKG_REL_NS}">'
+                f'<Relationship Id="rId1" Type="{_REL_NS}/worksheet" Target="worksheets/sheet1.xml"/>'
+                f'<Relationship Id="rId2" Type="{_REL_NS}/styles" Target="styles.xml"/>'
+                '</Relationships>'
+            ),
+            'xl/styles.xml': styles,
+        }
+
+def write_xlsx(
+    df: pd.DataFrame,
+    output_path: Path,
+    sheet_name: str = 'Sheet1',
+    header_color: Optional[str] = None
+) -> None:
+    """
+    一次写入数据和表头样式
+
+    按块流式写出，内存占用与行数无关，
+    也不需要保存后再重新打开文件设置样式。
+
+    Args:
+        df: 要写入的数据
+        output_path: 输出文件路径
+        sheet_name: 工作表名称
+        header_color: 表头填充颜色（如 '1F6B3B'），为None时不填充
+    """
+    with XlsxStreamWriter(output_path, sheet_name, header_color) as writer:
+        writer.write_header(df.columns)
+        writer.append(df)
+
+def _to_rows(df: pd.DataFrame):
+    """将数据块转换为Python值的行，缺失值转换为None"""
+    values = df.astype(object).where(df.notna(), None)
+    return values.itertuples(index=False, name=None)
+
+def _cell(ref: str, value, header: bool) -> str:
+    """单个单元格的XML，空值返回空字符串"""
+    value_type = type(value)
+    if value is None:
+        return ''
+    if value_type is str:
+        return _string_cell(ref, value, header)
+    if value_type is bool:
+        return f'<c r="{ref}" t="b"{_style_attr("general", header)}><v>{int(value)}</v></c>'
+    if value_type is int or value_type is float:
+        if value_type is int:
+            return f'<c r="{ref}"{_style_attr("general", header)}><v>{value}</v></c>'
+        if value != value or value in (float('inf'), float('-inf')):
+            return ''
+        # 与openpyxl一致，浮点数保留16位有效数字
+        return f'<c r="{ref}"{_style_attr("general", header)}><v>{value:.16g}</v></c>'
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is not None:
+            raise TypeError("Excel不支持带时区的时间，请先转换为本地时间")
+        return f'<c r="{ref}"{_style_attr("datetime", header)}><v>{to_excel(value):.16g}</v></c>'
+    if isinstance(value, datetime.date):
+        return f'<c r="{ref}"{_style_attr("date", header)}><v>{to_excel(value):.16g}</v></c>'
+    if isinstance(value, datetime.time):
+        return f'<c r="{ref}"{_style_attr("time", header)}><v>{to_excel(value):.16g}</v></c>'
+    if isinstance(value, datetime.timedelta):
+        return f'<c r="{ref}"{_style_attr("general", header)}><v>{to_excel(value):.16g}</v></c>'
+    # numpy标量、Decimal、str子类等转换为对应的Python类型
+    if isinstance(value, np.generic):
+        return _cell(ref, value.item(), header)
+    if isinstance(value, numbers.Integral):
+        return _cell(ref, int(value), header)
+    if isinstance(value, (numbers.Real, decimal.Decimal)):
+        return _cell(ref, float(value), header)
+    if isinstance(value, str):
+        return _string_cell(ref, str(value), header)
+    raise ValueError(f"无法将 {value!r} 写入Excel")
+
+def _string_cell(ref: str, value: str, header: bool) -> str:
+    if ILLEGAL_CHARACTERS_RE.search(value):
+        raise IllegalCharacterError(f"{value} cannot be used in worksheets.")
+    return (f'<c r="{ref}" t="inlineStr"{_style_attr("general", header)}>'
+            f'<is><t xml:space="preserve">{escape(value)}</t></is></c>')
+
+def _style_attr(kind: str, header: bool) -> str:
+    index = _STYLE_INDEX[(kind, header)]
+    return f' s="{index}"' if index else ''
\ No newline at end of file
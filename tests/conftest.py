@@ -5,7 +5,19 @@ import shutil
 import pytest
 from pathlib import Path
 import pandas as pd
-from src.core.config import ConfigManager
+import yaml
+from src.core.config import config as config_manager
+
+DEFAULT_CONFIG = Path(__file__).parent.parent / 'config' / 'config.yaml'
+
+def merge_config(base, overrides):
+    """将overrides逐层合并到base"""
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            merge_config(base[key], value)
+        else:
+            base[key] = value
+    return base
 
 @pytest.fixture(scope="session")
 def test_data_dir(tmp_path_factory):
@@ -15,10 +27,15 @@ def test_data_dir(tmp_path_factory):
     # 清理测试数据
     shutil.rmtree(test_dir)
 
-@pytest.fixture(scope="session")
+@pytest.fixture
 def test_config(test_data_dir):
-    """创建测试配置"""
-    config = {
+    """
+    创建测试配置
+    
+    在默认配置上覆盖测试设置，输出和缓存目录都位于测试数据目录，
+    加载到全局配置管理器实例中，测试结束后恢复默认配置。
+    """
+    overrides = {
         'excel': {
             'sheets': {
                 'process': [
@@ -47,38 +64,49 @@ def test_config(test_data_dir):
         'date': {
             'input_formats': ['%Y-%m-%d', '%Y/%m/%d'],
             'output_format': '%Y-%m-%d'
-        }
+        },
+        'reader': {
+            'benchmark': False,
+            'benchmark_file': str(test_data_dir / 'cache' / 'reader_benchmark.json'),
+            'sidecar': {'enabled': False, 'directory': str(test_data_dir / 'cache' / 'sheets')}
+        },
+        'incremental': {'enabled': False, 'state_dir': str(test_data_dir / 'cache' / 'incremental')},
+        'cache': {'enabled': False, 'directory': str(test_data_dir / 'cache' / 'results')},
+        'trace': {'enabled': False, 'directory': str(test_data_dir / 'trace')}
     }
+    with open(DEFAULT_CONFIG, 'r', encoding='utf-8') as f:
+        config = merge_config(yaml.safe_load(f), overrides)
     
     config_path = test_data_dir / 'test_settings.yaml'
+    with open(config_path, 'w', encoding='utf-8') as f:
+        yaml.safe_dump(config, f, allow_unicode=True)
     os.makedirs(config['output']['directory'], exist_ok=True)
     
-    # 重置配置管理器
-    ConfigManager._instance = None
-    ConfigManager._config = config
-    
-    return config
+    # 模块中引用的是配置管理器的实例，直接加载到实例上
+    config_manager.load_config(str(config_path))
+    yield config
+    config_manager.reload()
 
 @pytest.fixture
 def sample_excel_file(test_data_dir):
     """创建示例Excel文件"""
     file_path = test_data_dir / 'test.xlsx'
     
-    # 创建示例数据
+    # 创建示例数据：常规产品按到货批次/到货数量列，S级产品按日期表头
     regular_data = pd.DataFrame({
-        '编码': ['R001', 'R002'],
-        '名称': ['常规产品1', '常规产品2'],
-        '规格': ['规格1', '规格2'],
-        '数量': [100, 200],
-        '日期': ['2023-01-01', '2023-01-02']
+        'sku编码': ['R001', 'R002'],
+        '商品名称': ['常规产品1', '常规产品2'],
+        '规格': ['颜色:红色,尺码:L', '颜色:蓝色,尺码:XL'],
+        '到货批次-1': ['2024-01-01', '2024-01-02'],
+        '到货数量-1': [100, 200]
     })
     
     s_level_data = pd.DataFrame({
-        '编码': ['S001', 'S002'],
-        '名称': ['S级产品1', 'S级产品2'],
-        '规格': ['规格1', '规格2'],
-        '数量': [300, 400],
-        '日期': ['2023-01-03', '2023-01-04']
+        'sku编码': ['S001', 'S002'],
+        '商品名称': ['S级产品1', 'S级产品2'],
+        '规格': ['颜色:黑色,尺码:M', '颜色:白色,尺码:S'],
+        '2024-01-03': [300, None],
+        '2024/01/04': [None, 400]
     })
     
     summary_data = pd.DataFrame()
@@ -90,3 +118,37 @@ def sample_excel_file(test_data_dir):
         summary_data.to_excel(writer, sheet_name='汇总', index=False)
     
     return file_path
+
+@pytest.fixture
+def delivery_plan_file(test_data_dir):
+    """创建符合实际格式的到货计划文件"""
+    from datetime import datetime, timedelta
+    
+    file_path = test_data_dir / 'delivery_plan.xlsx'
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    
+    regular_data = pd.DataFrame({
+        'sku编码': ['R001', 'R002', 'R001', None],
+        '商品名称': ['常规产品1', '常规产品2', '常规产品1', '空SKU'],
+        '规格': ['颜色:红色,尺码:L', '颜色:蓝色,尺码:XL', None, None],
+        '到货批次-1': [today, today + timedelta(days=1), today, today],
+        '到货数量-1': [100, 200, 50, 999],
+        '到货批次-2': [(today + timedelta(days=2)).strftime('%Y-%m-%d'), None, None, None],
+        '到货数量-2': [30, None, None, None],
+    })
+    
+    s_level_data = pd.DataFrame({
+        'sku编码': ['S001', 'R002'],
+        '商品名称': ['S级产品1', '常规产品2'],
+        '规格': ['颜色:黑色,尺码:M', '颜色:白色,尺码:S'],
+        today.strftime('%Y-%m-%d'): [10, None],
+        (today + timedelta(days=1)).strftime('%Y/%m/%d'): [20, 5],
+        '备注': ['a', 'b'],
+    })
+    
+    with pd.ExcelWriter(file_path) as writer:
+        regular_data.to_excel(writer, sheet_name='常规产品', index=False)
+        s_level_data.to_excel(writer, sheet_name='S级产品', index=False)
+        pd.DataFrame().to_excel(writer, sheet_name='汇总', index=False)
+    
+    return file_path
@@ -0,0 +1,101 @@
+"""多日期回填测试模块"""
+
+from datetime import date, timedelta
+import openpyxl
+import pandas as pd
+import pytest
+from src.core.exceptions import ConfigurationError
+from src.merger.sku_merger import SKUMerger
+from src.transformer.backfill import backfill_frames
+from src.transformer import upload_format_transformer
+from src.transformer.delivery_plan_transformer import DeliveryPlanTransformer
+from src.transformer.upload_format_transformer import UploadFormatTransformer
+from src.utils.excel_utils import uses_today
+
+def make_sheets():
+    regular = pd.DataFrame({
+        'sku编码': ['A', 'B', 'A'],
+        '规格': ['颜色:红,尺码:L', None, None],
+        '到货批次-1': ['2024-01-01', '2024-01-03', '2024-03-02'],
+        '到货数量-1': [1, 2, 0.1],
+    })
+    s_level = pd.DataFrame({
+        'sku编码': ['A', 'C'],
+        '商品规格': [None, '颜色:白,尺码:S'],
+        '2024-01-02': [0.2, None],
+        '2024-03-03': [None, 3],
+    })
+    return {'regular': regular, 's_level': s_level}
+
+def test_backfill_matches_daily_runs():
+    """测试每个处理日期的窗口与逐日完整处理的结果一致"""
+    sheets = make_sheets()
+    start = date(2024, 1, 1)
+    transformer = DeliveryPlanTransformer()
+    frames = dict(backfill_frames(transformer, SKUMerger(), sheets, start, start + timedelta(days=3)))
+    # 整个日期范围只核对一次，宽表 2024-01-01 ~ 2024-03-03 包含全部数量
+    assert transformer.reconciliation.ok
+    assert transformer.reconciliation.totals['output'] == pytest.approx(6.3)
+
+    assert list(frames) == [start + timedelta(days=i) for i in range(4)]
+    for as_of, frame in frames.items():
+        transformer = DeliveryPlanTransformer()
+        expected = SKUMerger().merge_frame(transformer.transform_sheets(sheets, as_of))
+        pd.testing.assert_frame_equal(frame, expected)
+
+def test_backfill_rejects_reversed_range():
+    """测试结束日期早于开始日期时报错"""
+    with pytest.raises(ConfigurationError):
+        backfill_frames(DeliveryPlanTransformer(), SKUMerger(), make_sheets(), date(2024, 1, 2), date(2024, 1, 1))
+
+def test_detects_today_formula(tmp_path):
+    """测试识别工作簿公式中的TODAY()，回填时据此记录警告"""
+    plain, dated = tmp_path / 'plain.xlsx', tmp_path / 'dated.xlsx'
+    for path, formula in ((plain, '=A1+1'), (dated, '=A1+today()')):
+        workbook = openpyxl.Workbook()
+        workbook.active['A1'] = 1
+        workbook.active['B1'] = formula
+        workbook.save(path)
+
+    assert uses_today(dated)
+    assert uses_today(dated, chunk_size=3)
+    assert not uses_today(plain)
+
+def test_upload_backfill_matches_daily_runs(tmp_path, monkeypatch):
+    """测试上传格式回填只读取一次工作表，每个处理日期的结果与逐日转换一致"""
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / 'merged.xlsx'
+    pd.DataFrame({
+        'sku编码': ['A', 'B', None],
+        '规格': ['颜色:红,尺码:L', None, None],
+        '2024-01-02': [1, 2, 9],
+        '2024/01/03': [3, None, 9],
+        '2024-03-03': [5, 6, 9],
+    }).to_excel(path, sheet_name='汇总', index=False)
+
+    written = {}
+    def capture(df, output_path, formats, sheet_name):
+        written[output_path.name.split('_')[2]] = df
+        return {'xlsx': output_path}
+    monkeypatch.setattr(upload_format_transformer, 'write_table', capture)
+    reads = []
+    original = UploadFormatTransformer._read
+    monkeypatch.setattr(UploadFormatTransformer, '_read', lambda self, f: reads.append(f) or original(self, f))
+
+    transformer = UploadFormatTransformer()
+    start = date(2024, 1, 1)
+    files = transformer.backfill(path, start, start + timedelta(days=2))
+    assert list(files) == [start + timedelta(days=i) for i in range(3)]
+    assert len(reads) == 1
+    backfilled = dict(written)
+
+    for as_of in files:
+        written.clear()
+        transformer.transform(path, as_of)
+        expected = next(iter(written.values()))
+        pd.testing.assert_frame_equal(backfilled[f'{as_of:%Y%m%d}'], expected)
+    assert backfilled['20240101'][['day1', 'day2']].to_numpy().tolist() == [[1, 3], [2, 0]]
+    assert backfilled['20240103']['day60'].tolist() == [5, 6]
+
+    with pytest.raises(ConfigurationError):
+        transformer.backfill(path, start, start - timedelta(days=1))
\ No newline at end of file
@@ -0,0 +1,49 @@
+"""日期解析测试模块"""
+
+from datetime import date, datetime, time
+import pandas as pd
+import pytest
+from src.core.exceptions import DataTransformError
+from src.utils.date_parser import clear_date_cache, parse_dates
+
+FORMATS = ['%Y-%m-%d', '%Y/%m/%d', '%Y年%m月%d日']
+
+def test_parse_mixed_column():
+    """测试同一列中的多种文本格式、datetime、Excel序列号、时刻和缺失值"""
+    values = pd.Series(
+        ['2024-01-02', '2024/1/3', '2024年1月4日', datetime(2024, 1, 5, 13, 30), date(2024, 1, 6),
+         45298, 45299.75, time(8, 0), None],
+        index=list('abcdefghi')
+    )
+    result = parse_dates(values, FORMATS)
+
+    assert list(result.index) == list('abcdefghi')
+    assert result[:7].dt.strftime('%Y-%m-%d').tolist() == [
+        '2024-01-02', '2024-01-03', '2024-01-04', '2024-01-05', '2024-01-06', '2024-01-07', '2024-01-08'
+    ]
+    assert result[7:].isna().all()
+
+def test_invalid_values_raise():
+    """测试无法识别的文本和类型报告第一个无效值"""
+    with pytest.raises(DataTransformError, match='无效的日期格式: 2024.01.02'):
+        parse_dates(pd.Series(['2024-01-01', '2024.01.02', '不是日期']), FORMATS)
+    with pytest.raises(DataTransformError, match='无效的日期类型'):
+        parse_dates(pd.Series([True]), FORMATS)
+
+def test_each_distinct_text_converted_once(monkeypatch):
+    """测试重复的日期文本只转换一次，并在多次调用间复用"""
+    clear_date_cache()
+    converted = []
+    original = pd.to_datetime
+    def counting(values, *args, **kwargs):
+        converted.extend(values)
+        return original(values, *args, **kwargs)
+    monkeypatch.setattr(pd, 'to_datetime', counting)
+
+    parse_dates(pd.Series(['2024-01-02', '2024/01/03'] * 1000), FORMATS)
+    result = parse_dates(pd.Series(['2024/01/03', '2024-01-04']), FORMATS)
+
+    # 第一个格式转换全部新文本，第二个格式只转换剩余的文本
+    assert converted == ['2024-01-02', '2024/01/03', '2024/01/03', '2024-01-04']
+    assert result.dt.day.tolist() == [3, 4]
+    clear_date_cache()
\ No newline at end of file
@@ -0,0 +1,87 @@
+"""公式计算引擎测试模块"""
+
+import pytest
+import openpyxl
+from datetime import date, datetime
+from src.preprocessor.formula_engine import FormulaEngine, read_formulas
+
+def _evaluate(tmp_path, build, sheets=('汇总',), today=date(2024, 3, 15)):
+    """保存由openpyxl创建（不含缓存结果）的工作簿，计算后返回data_only工作簿"""
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+    build(wb)
+    path = tmp_path / 'formulas.xlsx'
+    wb.save(path)
+    
+    values = openpyxl.load_workbook(path, data_only=True)
+    engine = FormulaEngine(values, read_formulas(path), today=today)
+    engine.evaluate(list(sheets))
+    return values
+
+def test_arithmetic_and_aggregates(tmp_path):
+    """测试运算符优先级、百分号、文本连接和汇总函数"""
+    def build(wb):
+        ws = wb.create_sheet('汇总')
+        ws.append([1, 2, 3])
+        ws.append(['=-2^2+A1*10%', '=SUM(A1:C1)/B1', '=A1&"-"&B1', '=IF(C1>2,"大","小")', '=ROUND(2.5,0)'])
+        ws.append(['=1/0', '=IFERROR(A3,0)', '=AVERAGE(A1:C1)', '=MAX(A1:C1)-MIN(A1:C1)', '=COUNTA(A1:C1)'])
+    
+    ws = _evaluate(tmp_path, build)['汇总']
+    assert [c.value for c in ws[2]] == [4.1, 3, '1-2', '大', 3]
+    assert [c.value for c in ws[3]] == ['#DIV/0!', 0, 2, 2, 3]
+
+def test_conditional_sums_and_lookups(tmp_path):
+    """测试SUMIF(S)、COUNTIF和VLOOKUP/INDEX/MATCH"""
+    def build(wb):
+        data = wb.create_sheet('常规产品')
+        for row in [['sku', '仓库', '数量'], ['A', '北京', 5], ['B', '上海', 7], ['a', '上海', 1], ['C', '北京', 9]]:
+            data.append(row)
+        ws = wb.create_sheet('汇总')
+        ws.append(['=SUMIF(常规产品!A:A,"A",常规产品!C:C)', '=SUMIFS(常规产品!C2:C5,常规产品!B2:B5,"上海",常规产品!C2:C5,">1")',
+                   '=COUNTIF(常规产品!C2:C5,">=5")', '=SUMIF(常规产品!A2:A5,"<>B",常规产品!C2:C5)'])
+        ws.append(['=VLOOKUP("c",常规产品!A2:C5,3,FALSE)', '=INDEX(常规产品!C2:C5,MATCH("B",常规产品!A2:A5,0))',
+                   '=VLOOKUP(6,常规产品!C2:C5,1,TRUE)', '=IFERROR(VLOOKUP("Z",常规产品!A2:C5,2,FALSE),"无")',
+                   '=SUM(INDEX(常规产品!A2:C5,0,3))'])
+    
+    ws = _evaluate(tmp_path, build)['汇总']
+    assert [c.value for c in ws[1]][:4] == [6, 7, 3, 15]
+    assert [c.value for c in ws[2]] == [9, 7, 5, '无', 22]
+
+def test_date_functions(tmp_path):
+    """测试日期函数以日期序列号参与计算"""
+    def build(wb):
+        ws = wb.create_sheet('汇总')
+        ws['A1'] = datetime(2024, 1, 31)
+        ws['B1'] = '=EDATE(A1,1)'
+        ws['B1'].number_format = 'yyyy-mm-dd'
+        ws['C1'] = '=YEAR(A1)*10000+MONTH(B1)*100+DAY(B1)'
+        ws['D1'] = '=DATE(2024,14,1)-TODAY()'
+        ws['E1'] = '=WEEKDAY(DATE(2024,3,15),2)'
+        ws['F1'] = '=EOMONTH(A1,1)=B1'
+    
+    ws = _evaluate(tmp_path, build)['汇总']
+    assert ws['C1'].value == 20240229
+    assert ws['D1'].value == (date(2025, 2, 1) - date(2024, 3, 15)).days
+    assert ws['E1'].value == 5
+    assert ws['F1'].value is True
+
+def test_evaluates_only_reachable_cells(tmp_path):
+    """测试跨表依赖按顺序计算，不可达的工作表不计算，循环引用和不支持的函数保持为空"""
+    def build(wb):
+        ws = wb.create_sheet('汇总')
+        ws['A1'] = '=中间!A1*2'
+        ws['B1'] = '=B1+1'
+        ws['C1'] = '=TEXTJOIN(",",TRUE,A1)'
+        middle = wb.create_sheet('中间')
+        middle['A1'] = '=SUM(中间!B1:B2)'
+        middle['B1'] = 2
+        middle['B2'] = '=B1*10'
+        other = wb.create_sheet('其他')
+        other['A1'] = '=1+1'
+    
+    wb = _evaluate(tmp_path, build)
+    assert wb['汇总']['A1'].value == 44
+    assert wb['中间']['A1'].value == 22
+    assert wb['汇总']['B1'].value is None
+    assert wb['汇总']['C1'].value is None
+    assert wb['其他']['A1'].value is None
\ No newline at end of file
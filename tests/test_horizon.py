@@ -0,0 +1,43 @@
+"""SKU×天累加器测试模块"""
+
+import numpy as np
+import pandas as pd
+from datetime import date
+from src.transformer.horizon import HorizonAccumulator, day_columns
+
+def test_accumulate_within_horizon():
+    """测试重复记录累加，超出范围和未知SKU被忽略"""
+    accumulator = HorizonAccumulator(['A', 'B'], date(2024, 1, 1), days=3)
+    accumulator.add(
+        ['A', 'A', 'B', 'B', 'C'],
+        [date(2024, 1, 1), date(2024, 1, 1), date(2024, 1, 3), date(2024, 1, 4), date(2024, 1, 1)],
+        [1, 2, 5, 7, 9]
+    )
+    
+    assert accumulator.values.tolist() == [[3, 0, 0], [0, 0, 5]]
+
+def test_frame_is_view_of_buffer():
+    """测试day列直接引用累加数组"""
+    accumulator = HorizonAccumulator(['A'], date(2024, 1, 1))
+    df = accumulator.to_frame()
+    
+    assert list(df.columns) == day_columns()
+    assert np.shares_memory(df['day1'].to_numpy(), accumulator.values)
+
+
+def test_add_rows_by_code():
+    """测试按行号（SKU编码）累加，负数行号被忽略"""
+    accumulator = HorizonAccumulator(['A', 'B'], date(2024, 1, 1), days=2)
+    accumulator.add_rows([1, -1, 1], [date(2024, 1, 2)] * 3, [1, 5, 2])
+    
+    assert accumulator.values.tolist() == [[0, 0], [0, 3]]
+
+def test_shift_moves_window_forward():
+    """测试向后移动窗口：列左移，末尾补0，之后按新的起始日累加"""
+    values = np.array([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]])
+    accumulator = HorizonAccumulator.from_values(['A', 'B'], date(2024, 1, 1), values)
+    accumulator.shift(2)
+    accumulator.add(['A', 'B'], [date(2024, 1, 5), date(2024, 1, 3)], [7, 1])
+    
+    assert accumulator.start_date == date(2024, 1, 3)
+    assert accumulator.values.tolist() == [[3, 0, 7], [7, 0, 0]]
\ No newline at end of file
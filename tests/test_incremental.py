@@ -0,0 +1,94 @@
+"""增量处理测试模块"""
+
+from datetime import date
+import pandas as pd
+from src.merger.sku_merger import SKUMerger
+from src.transformer.delivery_plan_transformer import DeliveryPlanTransformer
+from src.transformer.incremental import IncrementalProcessor, changed_skus, sku_fingerprints
+
+TODAY = date(2024, 1, 1)
+
+def make_sheets(regular_rows, s_level_rows):
+    regular = pd.DataFrame(regular_rows, columns=['sku编码', '规格', '到货批次-1', '到货数量-1'])
+    s_level = pd.DataFrame(s_level_rows, columns=['sku编码', '商品规格', '2024-01-02', '2024-01-03'])
+    return {'regular': regular, 's_level': s_level}
+
+def run(processor, sheets, today=TODAY):
+    processor.transformer.read_sheets = lambda input_file, source_key=None: sheets
+    return processor.process('plan.xlsx', 'plan', {}, today=today)
+
+def full(sheets, today=TODAY):
+    return SKUMerger().merge_frame(DeliveryPlanTransformer().transform_sheets(sheets, today))
+
+def test_fingerprints_follow_row_order_within_sku():
+    """测试同一SKU的行顺序变化会改变指纹，不同SKU的行交换顺序不影响"""
+    sheets = make_sheets([
+        ['A', '颜色:红,尺码:L', '2024-01-02', 1],
+        ['B', None, '2024-01-02', 2],
+        ['A', '颜色:蓝,尺码:M', '2024-01-03', 3],
+    ], [])
+    df = sheets['regular']
+    transformer = DeliveryPlanTransformer()
+    before = sku_fingerprints(df, transformer.extract_skus(df))
+
+    swapped = df.iloc[[1, 0, 2]].reset_index(drop=True)
+    assert list(changed_skus(before, sku_fingerprints(swapped, transformer.extract_skus(swapped)))) == []
+
+    reordered = df.iloc[[2, 1, 0]].reset_index(drop=True)
+    assert list(changed_skus(before, sku_fingerprints(reordered, transformer.extract_skus(reordered)))) == ['A']
+
+def test_incremental_matches_full_recompute(tmp_path):
+    """测试只重新计算变化的SKU，结果与完整计算一致"""
+    processor = IncrementalProcessor(DeliveryPlanTransformer(), SKUMerger(), tmp_path)
+    regular = [
+        ['A', '颜色:红,尺码:L', '2024-01-02', 1],
+        ['B', '颜色:蓝,尺码:M', '2024-01-03', 2],
+        ['C', None, '2024-01-04', 3],
+    ]
+    s_level = [
+        ['B', None, 5, None],
+        ['D', '颜色:白,尺码:S', None, 7],
+    ]
+    first = run(processor, make_sheets(regular, s_level))
+    assert processor.recomputed is None
+    pd.testing.assert_frame_equal(first, full(make_sheets(regular, s_level)))
+
+    # 修改A的数量和C的规格，删除D，新增E
+    regular[0][3] = 10
+    regular[2][1] = '颜色:黑,尺码:XL'
+    s_level = [['B', None, 5, None], ['E', None, 1, 1]]
+    sheets = make_sheets(regular, s_level)
+    second = run(processor, sheets)
+    assert processor.recomputed == 4
+    pd.testing.assert_frame_equal(second, full(sheets))
+    assert list(second['sku_no'].cat.categories) == ['A', 'B', 'C', 'E']
+
+    run(processor, sheets)
+    assert processor.recomputed == 0
+
+def test_rolling_horizon_shift(tmp_path):
+    """测试处理日期后移时窗口左移并由保存的长表补齐末尾，S级产品新增日期列不触发重新计算"""
+    processor = IncrementalProcessor(DeliveryPlanTransformer(), SKUMerger(), tmp_path)
+    # 2024-03-01、2024-03-02 超出1月1日的窗口，分别在1月2日、1月3日进入day60
+    regular = [
+        ['A', '颜色:红,尺码:L', '2024-01-01', 1],
+        ['A', None, '2024-03-01', 0.1],
+        ['B', None, '2024-03-02', 2],
+    ]
+    sheets = make_sheets(regular, [['A', None, 0.2, None], ['C', None, None, 3]])
+    run(processor, sheets)
+
+    later = date(2024, 1, 3)
+    shifted = run(processor, sheets, today=later)
+    assert (processor.shifted_days, processor.recomputed) == (2, 0)
+    pd.testing.assert_frame_equal(shifted, full(sheets, later))
+    assert shifted.loc[shifted['sku_no'] == 'B', 'day60'].item() == 2
+
+    # 新增一列全部为空的日期
+    sheets['s_level']['2024-01-04'] = None
+    run(processor, sheets, today=later)
+    assert processor.recomputed == 0
+
+    earlier = date(2024, 1, 2)
+    run(processor, sheets, today=earlier)
+    assert processor.recomputed is None
\ No newline at end of file
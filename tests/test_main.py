@@ -1,6 +1,11 @@
 import pytest
+from datetime import date
 from pathlib import Path
+import main
 from main import process_delivery_plan
+from src.transformer.delivery_plan_transformer import DeliveryPlanTransformer
+from src.utils import workbook_reader
+from src.utils.metrics import PipelineMetrics
 
 def test_process_delivery_plan_with_optimization_file():
     """测试处理表优化.xlsx文件的完整流程"""
@@ -25,3 +30,25 @@ def test_process_delivery_plan_with_optimization_file():
     print(f"预处理文件: {result['data']['preprocessed_file']}")
     print(f"转换后文件: {result['data']['transformed_file']}")
     print(f"最终文件: {result['data']['final_file']}")
+
+@pytest.mark.parametrize('uses_today', [False, True])
+def test_sheet_cache_keyed_by_date_only_with_today(test_config, delivery_plan_file, tmp_path, monkeypatch, uses_today):
+    """测试工作簿不含TODAY()时其他日期重新处理也命中工作表缓存，含TODAY()时按日期区分"""
+    pytest.importorskip('pyarrow')
+    monkeypatch.setattr(main, 'uses_today', lambda path: uses_today)
+    config = workbook_reader.config._config
+    monkeypatch.setitem(config['reader'], 'sidecar', {'enabled': True, 'directory': str(tmp_path / 'sheets')})
+    workbook_reader.clear_sheet_cache()
+    transformer = DeliveryPlanTransformer()
+
+    preprocessed, sheets_file, key = main._preprocess(delivery_plan_file, config, transformer,
+                                                      date(2024, 1, 1), PipelineMetrics())
+    assert preprocessed is not None
+    transformer.read_sheets(sheets_file, key)
+    workbook_reader.clear_sheet_cache()
+
+    preprocessed, _, other_key = main._preprocess(delivery_plan_file, config, transformer,
+                                                  date(2024, 1, 2), PipelineMetrics())
+    assert (preprocessed is None) == (not uses_today)
+    assert (other_key == key) == (not uses_today)
+    workbook_reader.clear_sheet_cache()
\ No newline at end of file
@@ -0,0 +1,42 @@
+"""阶段指标测试模块"""
+
+import tracemalloc
+import pytest
+from src.utils import metrics as metrics_module
+from src.utils.metrics import PipelineMetrics
+
+def test_stage_records_time_memory_and_counts(tmp_path):
+    """测试阶段耗时、内存峰值、行数和写出字节数"""
+    metrics = PipelineMetrics(track_memory=True)
+    output = tmp_path / 'out.bin'
+    with metrics.stage('transform') as stage:
+        buffer = bytearray(1024 * 1024)
+        output.write_bytes(b'x' * 100)
+        stage.add_written_file(output)
+        stage.rows_in = 10
+        stage.rows_out = stage.sku_count = 3
+        del buffer
+    metrics.close()
+    
+    result = metrics.to_dict()['stages']['transform']
+    assert result['wall_seconds'] >= 0
+    assert result['peak_memory_bytes'] >= 1024 * 1024
+    assert result['bytes_written'] == 100
+    assert (result['rows_in'], result['rows_out'], result['sku_count']) == (10, 3, 3)
+    assert not tracemalloc.is_tracing()
+
+def test_stage_recorded_on_failure():
+    """测试阶段异常时仍记录指标，默认不统计内存"""
+    metrics = PipelineMetrics()
+    with pytest.raises(ValueError):
+        with metrics.stage('merge'):
+            raise ValueError('boom')
+    
+    result = metrics.to_dict()
+    assert result['stages']['merge']['peak_memory_bytes'] is None
+    assert result['total']['wall_seconds'] >= 0
+    
+    # 不开启tracemalloc时仍记录进程内存峰值
+    if metrics_module.resource is not None or metrics_module.psutil is not None:
+        assert result['stages']['merge']['peak_rss_bytes'] > 0
+        assert result['total']['peak_rss_bytes'] >= result['stages']['merge']['peak_rss_bytes']
\ No newline at end of file
@@ -0,0 +1,87 @@
+"""openpyxl预处理器测试模块"""
+
+import pytest
+import openpyxl
+from pathlib import Path
+from src.preprocessor import create_preprocessor
+from src.preprocessor.openpyxl_preprocessor import OpenpyxlPreprocessor
+from src.core.exceptions import FileOperationError, ExcelOperationError, ConfigurationError
+
+@pytest.fixture(autouse=True)
+def work_dir(tmp_path, monkeypatch):
+    """预处理结果写入配置的输出目录，在临时目录中运行避免污染仓库"""
+    monkeypatch.chdir(tmp_path)
+
+def _make_workbook_with_formula(path: Path) -> None:
+    """创建含公式的工作簿，并写入公式的缓存结果"""
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = '常规产品'
+    ws.append(['SKU编码', '数量', '合计'])
+    ws.append(['A001', 2, '=B2*3'])
+    wb.create_sheet('备注').append(['无关数据'])
+    wb.save(path)
+    
+    # openpyxl不计算公式，直接在XML中补上Excel保存时会写入的缓存值
+    import zipfile
+    with zipfile.ZipFile(path) as zf:
+        files = {name: zf.read(name) for name in zf.namelist()}
+    sheet_xml = files['xl/worksheets/sheet1.xml'].decode('utf-8')
+    files['xl/worksheets/sheet1.xml'] = sheet_xml.replace('<f>B2*3</f><v />', '<f>B2*3</f><v>6</v>').encode('utf-8')
+    with zipfile.ZipFile(path, 'w') as zf:
+        for name, data in files.items():
+            zf.writestr(name, data)
+
+def test_process_freezes_formulas_and_drops_sheets(tmp_path):
+    """测试公式固化为缓存值并删除不需要的工作表"""
+    input_file = tmp_path / 'plan.xlsx'
+    _make_workbook_with_formula(input_file)
+    
+    output_path = OpenpyxlPreprocessor().process(input_file)
+    
+    wb = openpyxl.load_workbook(output_path)
+    assert wb.sheetnames == ['常规产品']
+    assert wb['常规产品']['C2'].value == 6
+
+def test_process_keeps_first_sheet_when_none_configured(tmp_path):
+    """测试没有配置的工作表时保留第一个工作表"""
+    input_file = tmp_path / 'other.xlsx'
+    wb = openpyxl.Workbook()
+    wb.active.title = '第一页'
+    wb.create_sheet('第二页')
+    wb.save(input_file)
+    
+    output_path = OpenpyxlPreprocessor().process(input_file)
+    
+    assert openpyxl.load_workbook(output_path).sheetnames == ['第一页']
+
+def test_process_errors(tmp_path):
+    """测试文件不存在和无效文件"""
+    preprocessor = OpenpyxlPreprocessor()
+    with pytest.raises(FileOperationError):
+        preprocessor.process(tmp_path / 'missing.xlsx')
+    
+    invalid_file = tmp_path / 'invalid.xlsx'
+    invalid_file.write_text('This is not an Excel file')
+    with pytest.raises(ExcelOperationError):
+        preprocessor.process(invalid_file)
+
+def test_create_preprocessor():
+    """测试预处理后端选择"""
+    assert isinstance(create_preprocessor('openpyxl'), OpenpyxlPreprocessor)
+    with pytest.raises(ConfigurationError):
+        create_preprocessor('unknown')
+
+def test_process_evaluates_formulas_without_cached_values(tmp_path):
+    """测试没有缓存结果的公式被计算"""
+    input_file = tmp_path / 'uncached.xlsx'
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = '常规产品'
+    ws.append(['SKU编码', '数量', '合计'])
+    ws.append(['A001', 2, '=B2*3'])
+    wb.save(input_file)
+    
+    output_path = OpenpyxlPreprocessor().process(input_file)
+    
+    assert openpyxl.load_workbook(output_path)['常规产品']['C2'].value == 6
\ No newline at end of file
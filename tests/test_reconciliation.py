@@ -0,0 +1,62 @@
+"""数量核对测试模块"""
+
+from datetime import date
+import pandas as pd
+from src.merger.sku_merger import SKUMerger
+from src.transformer import delivery_plan_transformer, reconciliation
+from src.transformer.delivery_plan_transformer import DeliveryPlanTransformer
+from src.transformer.reconciliation import reconcile
+
+TODAY = date(2024, 1, 1)
+
+def make_sheets():
+    regular = pd.DataFrame({
+        'sku编码': ['A', 'B', 'A', None],
+        '到货批次-1': ['2024-01-01', '2024-01-02', '2023-12-31', '2024-01-01'],
+        '到货数量-1': [10, 20, 5, 99],
+        '到货批次-2': ['2024-03-30', None, None, None],
+        '到货数量-2': [7, None, None, None],
+    })
+    s_level = pd.DataFrame({
+        'sku编码': ['A', 'C', 'C'],
+        '2024-01-02': [1, 2, 3],
+        '2024-01-03': [None, 'x', 4],
+    })
+    return {'regular': regular, 's_level': s_level}
+
+def test_reconcile_matches_transform(test_config):
+    """测试转换和合并的结果与源工作表一致，窗口外和没有SKU的数量只计入理论总和"""
+    sheets = make_sheets()
+    result = SKUMerger().merge_frame(DeliveryPlanTransformer().transform_sheets(sheets, TODAY))
+    reconciliation = reconcile(sheets, result, TODAY)
+
+    assert reconciliation.ok
+    assert reconciliation.totals == {'regular': 141.0, 's_level': 10.0, 'window': 40.0, 'output': 40.0}
+    assert reconciliation.table.loc['A', ['regular', 's_level', 'actual']].tolist() == [10.0, 1.0, 11.0]
+    assert reconciliation.table.loc['C', 'expected'] == 9.0
+
+def test_reconcile_reports_mismatches(test_config):
+    """测试结果中数量不一致或缺少的SKU出现在不一致表中"""
+    sheets = make_sheets()
+    result = DeliveryPlanTransformer().transform_sheets(sheets, TODAY)
+    result.loc[result['sku_no'] == 'B', 'day5'] += 3
+    result = result[result['sku_no'] != 'C']
+
+    mismatches = reconcile(sheets, result, TODAY).mismatches
+    assert mismatches.index.tolist() == ['B', 'C']
+    assert mismatches['diff'].tolist() == [3.0, -9.0]
+
+def test_transform_normalizes_skus_once(test_config, monkeypatch):
+    """测试转换和核对共用同一次提取的SKU，每个工作表只规范化一次"""
+    calls = []
+    original = delivery_plan_transformer.normalize_skus
+    def counting(values, *args, **kwargs):
+        calls.append(values.name)
+        return original(values, *args, **kwargs)
+    monkeypatch.setattr(delivery_plan_transformer, 'normalize_skus', counting)
+    monkeypatch.setattr(reconciliation, 'normalize_skus', counting)
+
+    transformer = DeliveryPlanTransformer()
+    transformer._transform_format(make_sheets(), TODAY)
+    assert calls == ['sku编码', 'sku编码']
+    assert transformer.reconciliation.ok
\ No newline at end of file
@@ -0,0 +1,74 @@
+"""结果缓存测试模块"""
+
+import os
+from src.utils import result_cache
+from src.utils.result_cache import ResultCache
+
+def test_cache_hit_and_lru_eviction(tmp_path):
+    """测试缓存命中及超出容量时淘汰最久未使用的项"""
+    input_file = tmp_path / 'input.xlsx'
+    input_file.write_bytes(b'plan')
+    artifact = tmp_path / 'final.xlsx'
+    artifact.write_bytes(b'x' * 600)
+    
+    cache = ResultCache(tmp_path / 'cache', max_size_mb=1500 / 1024 / 1024)
+    keys = [cache.make_key(input_file, {'n': i}, as_of='2024-01-01') for i in range(3)]
+    assert len(set(keys)) == 3
+    
+    cache.put(keys[0], {'final_file': str(artifact), 'transformed_file': None})
+    cache.put(keys[1], {'final_file': str(artifact)})
+    os.utime(tmp_path / 'cache' / keys[0] / 'manifest.json', (0, 0))
+    os.utime(tmp_path / 'cache' / keys[1] / 'manifest.json', (1, 1))
+    
+    hit = cache.get(keys[0])
+    assert hit['final_file'].read_bytes() == b'x' * 600
+    assert hit['transformed_file'] is None
+    
+    # keys[0]刚被使用，写入第三项后应淘汰keys[1]
+    cache.put(keys[2], {'final_file': str(artifact)})
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[2]) is not None
+
+def test_eviction_race_logged(tmp_path, monkeypatch, caplog):
+    """测试淘汰时其他进程已删除缓存项只记录警告"""
+    input_file = tmp_path / 'input.xlsx'
+    input_file.write_bytes(b'plan')
+    cache = ResultCache(tmp_path / 'cache')
+    key = cache.make_key(input_file, {})
+    def removed():
+        raise FileNotFoundError('removed by another process')
+    monkeypatch.setattr(cache, '_evict', removed)
+    
+    cache.put(key, {'final_file': str(input_file)})
+    assert cache.get(key) is not None
+    assert '淘汰结果缓存失败' in caplog.text
+
+def test_key_changes_with_code(tmp_path, monkeypatch):
+    """测试处理代码变化后缓存键不同，旧结果不再命中"""
+    input_file = tmp_path / 'input.xlsx'
+    input_file.write_bytes(b'plan')
+    source = tmp_path / 'src' / 'transformer.py'
+    source.parent.mkdir()
+    source.write_text('x = 1')
+    monkeypatch.setattr(result_cache, 'SOURCE_ROOT', tmp_path / 'src')
+    
+    result_cache.code_fingerprint.cache_clear()
+    old_key = ResultCache.make_key(input_file, {})
+    source.write_text('x = 2')
+    result_cache.code_fingerprint.cache_clear()
+    assert ResultCache.make_key(input_file, {}) != old_key
+    result_cache.code_fingerprint.cache_clear()
+
+def test_invalid_manifest_is_miss(tmp_path):
+    """测试清单被截断或修改时视为未命中"""
+    input_file = tmp_path / 'input.xlsx'
+    input_file.write_bytes(b'plan')
+    cache = ResultCache(tmp_path / 'cache')
+    key = cache.make_key(input_file, {})
+    cache.put(key, {'final_file': str(input_file)})
+    manifest_path = tmp_path / 'cache' / key / 'manifest.json'
+    
+    for content in ('{"artifacts": ', '{}', '[]', '{"artifacts": {"final_file": 1}}', '{"artifacts": [1]}'):
+        manifest_path.write_text(content, encoding='utf-8')
+        assert cache.get(key) is None
\ No newline at end of file
@@ -0,0 +1,38 @@
+"""工作表列结构测试模块"""
+
+from datetime import date, datetime
+import pandas as pd
+from src.utils import workbook_reader
+from src.utils.sheet_schema import REGULAR_SCHEMA, S_LEVEL_SCHEMA, SUMMARY_SCHEMA, SheetSchema
+from src.utils.workbook_reader import WorkbookReader, clear_sheet_cache
+
+def test_resolve_aliases_batches_and_dates(test_config):
+    """测试别名、成对的批次列和日期表头只在表头上解析"""
+    plan = REGULAR_SCHEMA.resolve(['SKU编码', '商品规格', '到货批次-1', '到货数量-1', '到货批次-2', '备注'])
+    assert (plan.sku, plan.spec) == ('SKU编码', '商品规格')
+    assert plan.batches == [('到货批次-1', '到货数量-1')]  # 缺少到货数量-2的批次跳过
+
+    plan = S_LEVEL_SCHEMA.resolve(['sku编码', '2024-01-02', datetime(2024, 1, 3), '01-04-2024', '备注'])
+    assert plan.spec is None
+    assert plan.dates == {'2024-01-02': date(2024, 1, 2), datetime(2024, 1, 3): date(2024, 1, 3)}
+
+    plan = SUMMARY_SCHEMA.resolve(['sku_no', 'color', 'size', 'day1', 'day2', 'daily', 'dt'])
+    assert plan.days == ['day1', 'day2']
+
+def test_schema_as_cached_usecols(tmp_path, monkeypatch):
+    """测试列结构作为usecols只解析需要的列，并按列结构缓存"""
+    monkeypatch.setattr(workbook_reader.config, 'get', lambda key, default=None: {'reader.cache_entries': 8}.get(key, default))
+    clear_sheet_cache()
+    path = tmp_path / 'plan.xlsx'
+    pd.DataFrame({
+        'sku编码': ['001'], '商品名称': ['x'], '规格': ['红/L'], '2024-01-02': [1], '备注': ['y'],
+    }).to_excel(path, sheet_name='S级产品', index=False)
+
+    schema = SheetSchema('S级产品', dates='formats')
+    with WorkbookReader(path, engine='openpyxl') as reader:
+        df = reader.read_sheet('S级产品', usecols=schema, dtype={'sku编码': str})
+    assert df.columns.tolist() == ['sku编码', '规格', '2024-01-02']
+    assert df['sku编码'].tolist() == ['001']
+    assert WorkbookReader(path).is_cached('S级产品', usecols=schema, dtype={'sku编码': str})
+    assert not WorkbookReader(path).is_cached('S级产品', usecols=lambda col: True)
+    clear_sheet_cache()
\ No newline at end of file
@@ -0,0 +1,78 @@
+"""工作表列式缓存测试模块"""
+
+import datetime
+import pandas as pd
+import pytest
+from src.utils import workbook_reader
+from src.utils.sheet_sidecar import SheetSidecar, _encode
+from src.utils.workbook_reader import WorkbookReader, clear_sheet_cache
+
+pa = pytest.importorskip('pyarrow')
+
+def test_roundtrip_preserves_values_and_types(tmp_path):
+    """测试混合类型列、日期列名和缺失值读回后与原数据一致"""
+    df = pd.DataFrame({
+        'sku编码': pd.Series(['00123', None, '456'], dtype=object),
+        '到货批次-1': [datetime.datetime(2024, 1, 1), '待定', float('nan')],
+        '数量': [1.5, None, 3],
+        '备注': pd.Series(['a', None, 1], dtype=object),
+        '产品名称': pd.Series(['甲', float('nan'), '甲'], dtype=object),
+        datetime.datetime(2024, 1, 2): [1, 2, 3],
+    })
+    sidecar = SheetSidecar(tmp_path)
+    sidecar.put('key', 'sheet', df)
+    loaded = sidecar.get('key', 'sheet')
+
+    pd.testing.assert_frame_equal(loaded, df)
+    assert [type(value) for value in loaded['到货批次-1']] == [datetime.datetime, str, float]
+    assert [type(value) for value in loaded['备注']] == [str, type(None), int]
+    assert [type(value) for value in loaded['sku编码']] == [str, type(None), str]
+    assert [type(value) for value in loaded['产品名称']] == [str, float, str]
+
+    # 纯文本列整列保存为字典列，混合类型列按类型拆分
+    schema = _encode(df).schema
+    assert pa.types.is_dictionary(schema.field('c0').type)
+    assert pa.types.is_dictionary(schema.field('c4').type)
+    assert pa.types.is_integer(schema.field('c3').type)
+    assert sidecar.get('key', 'other') is None
+
+def test_unsupported_values_and_eviction(tmp_path):
+    """测试无法无损保存的工作表被跳过，超出容量时淘汰最久未使用的工作簿"""
+    sidecar = SheetSidecar(tmp_path, max_size_mb=0)
+    sidecar.put('key', 'sheet', pd.DataFrame({'a': [object()]}))
+    assert not sidecar.contains('key', 'sheet')
+
+    sidecar.put('key', 'sheet', pd.DataFrame({'a': [1, 2]}))
+    assert not (tmp_path / 'key').exists()
+
+def test_eviction_race_ignored(tmp_path, monkeypatch):
+    """测试淘汰时其他进程已删除目录不影响写入"""
+    sidecar = SheetSidecar(tmp_path)
+    def removed():
+        raise FileNotFoundError('removed by another process')
+    monkeypatch.setattr(sidecar, '_evict', removed)
+
+    sidecar.put('key', 'sheet', pd.DataFrame({'a': [1, 2]}))
+    assert sidecar.contains('key', 'sheet')
+
+def test_reader_skips_parse_on_sidecar_hit(tmp_path, monkeypatch):
+    """测试使用相同内容键时直接读取缓存文件，不打开工作簿"""
+    settings = {'reader': {'sidecar': {'enabled': True, 'directory': str(tmp_path / 'sheets')}},
+                'reader.benchmark': False}
+    monkeypatch.setattr(workbook_reader.config, 'get',
+                        lambda key, default=None: settings.get(key, default))
+    clear_sheet_cache()
+    path = tmp_path / 'plan.xlsx'
+    pd.DataFrame({'sku': ['001'], 'qty': [1]}).to_excel(path, sheet_name='汇总', index=False)
+
+    with WorkbookReader(path, source_key='source') as reader:
+        expected = reader.read_sheet('汇总', dtype={'sku': str})
+    clear_sheet_cache()
+
+    # 重新生成的文件内容不同，但源工作簿的键相同
+    path.write_bytes(b'not a workbook')
+    reader = WorkbookReader(path, source_key='source')
+    assert reader.is_cached('汇总', dtype={'sku': str})
+    pd.testing.assert_frame_equal(reader.read_sheet('汇总', dtype={'sku': str}), expected)
+    assert reader.backend_name is None
+    clear_sheet_cache()
\ No newline at end of file
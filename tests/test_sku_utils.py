@@ -0,0 +1,49 @@
+"""SKU编码处理测试模块"""
+
+import numpy as np
+import pandas as pd
+from src.utils.sku_utils import normalize_skus, find_damaged_skus, normalize_categorical_skus, SkuCodebook
+
+def test_normalize_text_skus():
+    """测试去除空白、还原小数形式的整数、缺失值转为空字符串"""
+    skus = pd.Series([' A001 ', '123.0', '-5', 'x.0', None, np.nan, '0012345678901234567890'])
+    
+    assert normalize_skus(skus).tolist() == ['A001', '123', '-5', 'x.0', '', '', '0012345678901234567890']
+
+def test_normalize_numeric_skus():
+    """测试以数字读取的SKU列"""
+    skus = pd.Series([123.0, np.nan, 45.0])
+    
+    assert normalize_skus(skus).tolist() == ['123', '', '45']
+    assert normalize_skus(pd.Series([7, 8])).tolist() == ['7', '8']
+
+def test_scientific_notation_is_reported(caplog):
+    """测试科学计数法形式的SKU被识别并记录警告"""
+    skus = pd.Series(['A001', '1.23457E+17', 3e17])
+    
+    result = normalize_skus(skus, 'sku_no')
+    
+    assert result.tolist() == ['A001', '123457000000000000', '300000000000000000']
+    assert find_damaged_skus(skus).tolist() == [False, True, True]
+    assert 'sku_no 列中有 2 个SKU' in caplog.text
+
+def test_codebook_assigns_codes_in_first_appearance_order():
+    """测试字典编码跨多次编码保持稳定，新SKU追加在后"""
+    codebook = SkuCodebook()
+    
+    first = codebook.encode(pd.Series(['B', 'A', None, 'B']))
+    second = codebook.encode(pd.Series(['C', 'A']))
+    
+    assert first.tolist() == [0, 1, -1, 0]
+    assert second.tolist() == [2, 1]
+    assert list(codebook.categorical([2, 0])) == ['C', 'B']
+
+def test_normalize_categorical_merges_equivalent_categories():
+    """测试category类型只规范化类别，规范化后相同的SKU合并为同一编码"""
+    skus = pd.Series(pd.Categorical([' A', 'A', None, '12.0', '12']))
+    
+    result = normalize_categorical_skus(skus)
+    
+    assert isinstance(result.dtype, pd.CategoricalDtype)
+    assert result.tolist() == ['A', 'A', '', '12', '12']
+    assert result.cat.codes[0] == result.cat.codes[1]
\ No newline at end of file
@@ -0,0 +1,34 @@
+"""规格解析测试模块"""
+
+import pandas as pd
+from src.utils import spec_parser
+from src.utils.spec_parser import clear_spec_cache, parse_specs
+
+def test_parse_both_layouts():
+    """测试键值布局、斜杠布局、缺失值和无法识别的规格"""
+    values = pd.Series(
+        ['颜色:红色,尺码:L', '颜色：蓝 尺码：XL', '尺码:M', ' 黑色 / S ', None, '均码', '颜色:白/灰,尺码:L'],
+        index=list('abcdefg')
+    )
+    result = parse_specs(values)
+    
+    assert list(result.index) == list('abcdefg')
+    assert result['color'].tolist() == ['红色', '蓝', '', '黑色', '', '', '白/灰']
+    assert result['size'].tolist() == ['L', 'XL', 'M', 'S', '', '', 'L']
+
+def test_each_distinct_spec_parsed_once(monkeypatch):
+    """测试重复的规格只解析一次，并在多次调用间复用"""
+    clear_spec_cache()
+    parsed = []
+    original = spec_parser._parse_unique
+    def counting(texts):
+        parsed.extend(texts)
+        return original(texts)
+    monkeypatch.setattr(spec_parser, '_parse_unique', counting)
+    
+    parse_specs(pd.Series(['红/L', '颜色:蓝,尺码:M'] * 1000))
+    result = parse_specs(pd.Series(['红/L', '绿/S']))
+    
+    assert sorted(parsed) == sorted(['红/L', '颜色:蓝,尺码:M', '绿/S'])
+    assert result['color'].tolist() == ['红', '绿']
+    clear_spec_cache()
\ No newline at end of file
@@ -0,0 +1,37 @@
+"""多格式表格输出测试模块"""
+
+import pandas as pd
+import pytest
+from src.core.exceptions import ConfigurationError
+from src.utils.table_writer import resolve_formats, write_table
+
+def test_resolve_formats():
+    """测试逗号分隔的格式去重保序，无效格式报错"""
+    assert resolve_formats('xlsx, CSV,xlsx') == ['xlsx', 'csv']
+    with pytest.raises(ConfigurationError):
+        resolve_formats('xls')
+    with pytest.raises(ConfigurationError):
+        resolve_formats([])
+
+def test_write_table_formats(tmp_path):
+    """测试各格式写出的内容一致，SKU在列式格式中保留字典编码"""
+    pytest.importorskip('pyarrow')
+    df = pd.DataFrame({
+        'sku_no': pd.Categorical(['001', '002', '001']),
+        'color': ['红', '', '蓝'],
+        'day1': [1, 0, 3],
+    })
+    written = write_table(df, tmp_path / 'merged.xlsx', ['parquet', 'xlsx', 'arrow', 'csv'], sheet_name='汇总')
+
+    assert list(written) == ['parquet', 'xlsx', 'arrow', 'csv']
+    assert written['parquet'].name == 'merged.parquet'
+    parquet = pd.read_parquet(written['parquet'])
+    assert isinstance(parquet['sku_no'].dtype, pd.CategoricalDtype)
+    pd.testing.assert_frame_equal(parquet, df, check_categorical=False)
+    pd.testing.assert_frame_equal(pd.read_feather(written['arrow']), df, check_categorical=False)
+
+    csv = pd.read_csv(written['csv'], dtype={'sku_no': str}, keep_default_na=False)
+    assert csv['sku_no'].tolist() == ['001', '002', '001']
+    assert csv['color'].tolist() == ['红', '', '蓝']
+    xlsx = pd.read_excel(written['xlsx'], sheet_name='汇总', dtype={'sku_no': str})
+    assert xlsx['day1'].tolist() == [1, 0, 3]
\ No newline at end of file
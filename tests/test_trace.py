@@ -0,0 +1,40 @@
+"""调试跟踪测试模块"""
+
+import logging
+import pandas as pd
+from src.transformer.delivery_plan_transformer import DeliveryPlanTransformer
+from src.utils import trace
+from src.utils.trace import emit_table
+
+def use_settings(monkeypatch, values):
+    original = trace.config.get
+    monkeypatch.setattr(trace.config, 'get', lambda key, default=None: values.get(key, original(key, default)))
+
+def test_disabled_trace_does_not_build(monkeypatch):
+    """测试未启用跟踪时不生成跟踪表"""
+    use_settings(monkeypatch, {'trace.enabled': False})
+    built = []
+    assert emit_table('sku_totals', lambda: built.append(1)) is None
+    assert built == []
+
+def test_invalid_quantities_batched(test_config, tmp_path, monkeypatch, caplog):
+    """测试无效数量只记录一条警告，全部明细写入一张跟踪表"""
+    use_settings(monkeypatch, {'trace.enabled': True, 'trace.directory': str(tmp_path)})
+    regular_df = pd.DataFrame({
+        'sku编码': [f'R{i}' for i in range(15)],
+        '到货批次-1': ['2024-01-01'] * 15,
+        '到货数量-1': ['x'] * 12 + [1, 2, 3],
+    })
+    s_level_df = pd.DataFrame({'sku编码': ['S1'], '2024-01-02': ['y']})
+
+    with caplog.at_level(logging.WARNING):
+        DeliveryPlanTransformer()._transform_format({'regular': regular_df, 's_level': s_level_df})
+
+    warnings = [record.message for record in caplog.records if '无效的数量' in record.message]
+    assert len(warnings) == 2
+    assert '有 12 个无效的数量' in warnings[0] and 'R10' not in warnings[0]
+
+    files = {path.name.split('_', 3)[-1]: path for path in tmp_path.iterdir()}
+    assert sorted(files) == ['invalid_qty_regular.csv', 'invalid_qty_s_level.csv', 'sku_totals.csv']
+    assert len(pd.read_csv(files['invalid_qty_regular.csv'])) == 12
+    assert len(pd.read_csv(files['sku_totals.csv'])) == 16
\ No newline at end of file
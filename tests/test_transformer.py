@@ -2,6 +2,7 @@
 
 import pytest
 import pandas as pd
+from datetime import date
 from pathlib import Path
 from src.transformer.delivery_plan_transformer import DeliveryPlanTransformer
 from src.core.exceptions import FileOperationError, DataTransformError
@@ -9,17 +10,24 @@ from src.core.exceptions import FileOperationError, DataTransformError
 def test_transform_success(test_config, sample_excel_file):
     """测试正常转换流程"""
     transformer = DeliveryPlanTransformer()
-    output_path = transformer.transform(Path(sample_excel_file))
+    output_path = transformer.transform(Path(sample_excel_file), as_of=date(2024, 1, 1))
     
     assert output_path.exists()
+    assert Path(test_config['output']['directory']) == output_path.parent
     
-    # 验证输出文件内容
-    df = pd.read_excel(output_path, sheet_name='汇总')
-    assert len(df) == 4  # 2个常规产品 + 2个S级产品
-    assert all(col in df.columns for col in ['编码', '名称', '规格', '数量', '日期'])
+    # 验证输出文件内容：每个SKU一行，到货数量落在对应的day列
+    df = pd.read_excel(output_path, sheet_name='汇总', dtype={'sku_no': str})
+    assert list(df['sku_no']) == ['R001', 'R002', 'S001', 'S002']  # 2个常规产品 + 2个S级产品
+    assert list(df.columns) == ['sku_no', 'color', 'size'] + [f'day{i}' for i in range(1, 61)] + ['dt']
     
-    # 验证日期格式
-    assert all(pd.to_datetime(df['日期']).dt.strftime('%Y-%m-%d') == df['日期'])
+    df = df.set_index('sku_no')
+    assert (df.loc['R001', 'day1'], df.loc['R002', 'day2']) == (100, 200)
+    assert (df.loc['S001', 'day3'], df.loc['S002', 'day4']) == (300, 400)
+    assert df.loc['R001', 'color'] == '红色'
+    assert df[[f'day{i}' for i in range(1, 61)]].sum().sum() == 1000
+    
+    # 验证日期格式：dt为处理日期的前一天
+    assert (df['dt'] == '2023-12-31').all()
 
 def test_transform_file_not_found(test_config, test_data_dir):
     """测试文件不存在的情况"""
@@ -46,19 +54,16 @@ def test_transform_invalid_date(test_config, test_data_dir):
     file_path = test_data_dir / 'invalid_date.xlsx'
     
     regular_data = pd.DataFrame({
-        '编码': ['R001'],
-        '名称': ['常规产品1'],
-        '规格': ['规格1'],
-        '数量': [100],
-        '日期': ['invalid_date']  # 无效日期
+        'sku编码': ['R001'],
+        '商品名称': ['常规产品1'],
+        '到货批次-1': ['invalid_date'],  # 无效日期
+        '到货数量-1': [100]
     })
     
     s_level_data = pd.DataFrame({
-        '编码': ['S001'],
-        '名称': ['S级产品1'],
-        '规格': ['规格1'],
-        '数量': [200],
-        '日期': ['2023-01-01']
+        'sku编码': ['S001'],
+        '商品名称': ['S级产品1'],
+        '2023-01-01': [200]
     })
     
     with pd.ExcelWriter(file_path) as writer:
@@ -67,5 +72,51 @@ def test_transform_invalid_date(test_config, test_data_dir):
         pd.DataFrame().to_excel(writer, sheet_name='汇总', index=False)
     
     transformer = DeliveryPlanTransformer()
-    with pytest.raises(DataTransformError):
+    with pytest.raises(DataTransformError, match='invalid_date'):
         transformer.transform(file_path)
+
+def test_transform_dataframe_in_memory(test_config, delivery_plan_file):
+    """测试内存模式直接返回DataFrame"""
+    transformer = DeliveryPlanTransformer()
+    df = transformer.transform_dataframe(Path(delivery_plan_file))
+    
+    assert list(df['sku_no']) == ['R001', 'R002', 'S001']  # 空SKU被跳过
+    assert list(df.columns) == ['sku_no', 'color', 'size'] + [f'day{i}' for i in range(1, 61)] + ['dt']
+    
+    df = df.set_index('sku_no')
+    assert df.loc['R001', 'day1'] == 150
+    assert df.loc['R001', 'day3'] == 30
+    assert df.loc['R001', 'color'] == '红色'
+    assert df.loc['R002', 'day2'] == 205
+    assert df.loc['R002', 'size'] == 'XL'  # 常规产品的规格优先
+    assert df.loc['S001', 'day1'] == 10
+
+def test_transform_regular_invalid_batch_date(test_config):
+    """测试常规产品到货批次无法识别时抛出异常"""
+    regular_df = pd.DataFrame({
+        'sku编码': ['R001', 'R002'],
+        '到货批次-1': ['2024-01-01', '不是日期'],
+        '到货数量-1': [10, 20],
+    })
+    s_level_df = pd.DataFrame({'sku编码': []})
+    
+    transformer = DeliveryPlanTransformer()
+    with pytest.raises(DataTransformError, match='不是日期'):
+        transformer._transform_format({'regular': regular_df, 's_level': s_level_df})
+
+def test_s_level_headers_with_same_date_are_summed(test_config):
+    """测试S级产品中不同格式但同一天的表头数量累加"""
+    regular_df = pd.DataFrame({'sku编码': []})
+    today = pd.Timestamp.now().normalize()
+    s_level_df = pd.DataFrame({
+        'sku编码': ['S001', 'S002'],
+        today.strftime('%Y-%m-%d'): [1, 2],
+        today.strftime('%Y/%m/%d'): [10, None],
+        today.to_pydatetime(): [100, 200],
+        '备注': ['x', 'y'],
+    })
+    
+    transformer = DeliveryPlanTransformer()
+    df = transformer._transform_format({'regular': regular_df, 's_level': s_level_df})
+    
+    assert list(df['day1']) == [111, 202]
@@ -0,0 +1,110 @@
+"""工作簿读取测试模块"""
+
+import json
+import pandas as pd
+import pytest
+from src.core.exceptions import ConfigurationError
+from src.utils import workbook_reader
+from src.utils.workbook_reader import WorkbookReader, clear_sheet_cache, get_backend
+
+@pytest.fixture(autouse=True)
+def settings(monkeypatch):
+    """测试使用独立的读取配置，不使用工作表文件缓存，不做基准测试"""
+    values = {'reader.cache_entries': 8, 'reader.benchmark': False}
+    monkeypatch.setattr(workbook_reader.config, 'get', lambda key, default=None: values.get(key, default))
+    clear_sheet_cache()
+    yield values
+    clear_sheet_cache()
+
+def test_read_sheet_parses_once_per_content(tmp_path, monkeypatch):
+    """测试同一内容的工作表只解析一次，返回的副本互不影响"""
+    path = tmp_path / 'plan.xlsx'
+    with pd.ExcelWriter(path) as writer:
+        pd.DataFrame({'sku': ['001', '002'], 'qty': [1, 2]}).to_excel(writer, sheet_name='汇总', index=False)
+        pd.DataFrame({'a': [1]}).to_excel(writer, sheet_name='其他', index=False)
+
+    calls = []
+    parse = pd.ExcelFile.parse
+    monkeypatch.setattr(pd.ExcelFile, 'parse', lambda self, *args, **kwargs: calls.append(args) or parse(self, *args, **kwargs))
+
+    with WorkbookReader(path, engine='openpyxl') as reader:
+        first = reader.read_sheet('汇总', dtype={'sku': str})
+        first.loc[0, 'sku'] = 'changed'
+    # 同一内容的另一个文件也命中缓存，且不需要打开工作簿
+    copy_path = tmp_path / 'copy.xlsx'
+    copy_path.write_bytes(path.read_bytes())
+    reader = WorkbookReader(copy_path, engine='openpyxl')
+    second = reader.read_sheet('汇总', dtype={'sku': str})
+    assert reader._excel_file is None
+    assert second['sku'].tolist() == ['001', '002']
+    assert len(calls) == 1
+
+    # 列或类型不同时重新解析
+    assert reader.read_sheet('汇总', usecols=['qty']).columns.tolist() == ['qty']
+    assert len(calls) == 2
+    reader.close()
+
+def test_cache_entries_limit(tmp_path, settings):
+    """测试超出缓存数量时淘汰最久未使用的工作表"""
+    settings['reader.cache_entries'] = 1
+    path = tmp_path / 'plan.xlsx'
+    with pd.ExcelWriter(path) as writer:
+        pd.DataFrame({'a': [1]}).to_excel(writer, sheet_name='A', index=False)
+        pd.DataFrame({'b': [2]}).to_excel(writer, sheet_name='B', index=False)
+
+    with WorkbookReader(path, engine='openpyxl') as reader:
+        reader.read_sheet('A')
+        reader.read_sheet('B')
+    assert [key[1] for key in workbook_reader._sheet_cache] == ['B']
+
+def test_get_backend(tmp_path, monkeypatch, settings):
+    """测试指定引擎、无效引擎，以及auto模式按区间选用基准测试最快的引擎"""
+    path = tmp_path / 'plan.xlsx'
+    path.write_bytes(b'x' * 2048)
+    assert get_backend(path, 'openpyxl').name == 'openpyxl'
+    with pytest.raises(ConfigurationError):
+        get_backend(path, 'xlrd')
+
+    benchmark_file = tmp_path / 'benchmark.json'
+    settings.update({'reader.benchmark': True, 'reader.benchmark_file': str(benchmark_file),
+                     'reader.size_buckets_mb': [1, 10]})
+    monkeypatch.setattr(workbook_reader, '_bucket_choices', {})
+    monkeypatch.setattr(workbook_reader, 'available_backends', lambda: ['calamine', 'openpyxl'])
+    calls = []
+    monkeypatch.setattr(workbook_reader, 'benchmark_backends',
+                        lambda rows: calls.append(rows) or {'calamine': 0.2, 'openpyxl': 0.1})
+
+    assert get_backend(path, 'auto').name == 'openpyxl'
+    assert get_backend(path, 'auto').name == 'openpyxl'
+    assert len(calls) == 1
+    assert json.loads(benchmark_file.read_text(encoding='utf-8'))['choices'] == {'0': 'openpyxl'}
+
+    # 新进程从保存的结果中读取，不再重复测试
+    monkeypatch.setattr(workbook_reader, '_bucket_choices', {})
+    assert get_backend(path, 'auto').name == 'openpyxl'
+    assert len(calls) == 1
+
+def test_auto_without_benchmark(tmp_path, monkeypatch, settings):
+    """测试关闭 reader.benchmark 时auto模式不做基准测试，默认结果文件位于用户缓存目录"""
+    path = tmp_path / 'plan.xlsx'
+    path.write_bytes(b'x' * 2048)
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+    monkeypatch.delenv('LOCALAPPDATA', raising=False)
+    monkeypatch.setattr(workbook_reader, '_bucket_choices', {})
+    monkeypatch.setattr(workbook_reader, 'available_backends', lambda: ['calamine', 'openpyxl'])
+    monkeypatch.setattr(workbook_reader, 'benchmark_backends', lambda rows: pytest.fail('不应进行基准测试'))
+
+    assert workbook_reader._benchmark_file() == tmp_path / 'cache' / 'delivery-plan-processor' / 'reader_benchmark.json'
+    assert get_backend(path, 'auto').name == 'calamine'
+    assert not (tmp_path / 'cache').exists()
+
+@pytest.mark.parametrize('engine', workbook_reader.available_backends())
+def test_engines_parse_identically(tmp_path, engine):
+    """测试各可用引擎解析结果一致"""
+    path = tmp_path / 'plan.xlsx'
+    expected = pd.DataFrame({'sku': ['00123', '456'], 'qty': [1.5, 2], '日期': pd.to_datetime(['2024-01-01', '2024-01-02'])})
+    expected.to_excel(path, sheet_name='汇总', index=False)
+    with WorkbookReader(path, engine=engine) as reader:
+        df = reader.read_sheet('汇总', dtype={'sku': str})
+        assert reader.backend_name == engine
+    pd.testing.assert_frame_equal(df, expected, check_dtype=False)
\ No newline at end of file
@@ -0,0 +1,68 @@
+"""流式Excel写入测试模块"""
+
+import datetime
+import numpy as np
+import openpyxl
+import pandas as pd
+from src.utils.xlsx_writer import XlsxStreamWriter, write_xlsx
+
+def test_write_xlsx_with_header_style(tmp_path):
+    """测试数据和表头样式一次写入"""
+    output_path = tmp_path / 'styled.xlsx'
+    df = pd.DataFrame({'sku_no': ['A', 'B'], 'day1': [1.5, np.nan], 'dt': ['2024-01-01', None]})
+    
+    write_xlsx(df, output_path, sheet_name='汇总', header_color='1F6B3B')
+    
+    ws = openpyxl.load_workbook(output_path)['汇总']
+    assert [cell.value for cell in ws[1]] == ['sku_no', 'day1', 'dt']
+    assert all(cell.fill.fgColor.rgb.endswith('1F6B3B') and cell.font.b for cell in ws[1])
+    assert [cell.value for cell in ws[2]] == ['A', 1.5, '2024-01-01']
+    assert [cell.value for cell in ws[3]] == ['B', None, None]
+    
+    pd.testing.assert_frame_equal(pd.read_excel(output_path, sheet_name='汇总'), df.fillna(np.nan))
+
+
+def test_stream_writer_appends_chunks(tmp_path):
+    """测试分块追加写出，行号连续；异常退出时删除不完整的文件"""
+    output_path = tmp_path / 'stream.xlsx'
+    with XlsxStreamWriter(output_path, sheet_name='汇总') as writer:
+        writer.append(pd.DataFrame({'sku_no': pd.Categorical(['A', 'B']), 'day1': [1, 2]}))
+        writer.append(pd.DataFrame({'sku_no': ['C'], 'day1': [3]}))
+        writer.append_rows([('D', None)])
+    assert writer.rows_written == 4
+    
+    df = pd.read_excel(output_path, sheet_name='汇总')
+    assert df['sku_no'].tolist() == ['A', 'B', 'C', 'D']
+    assert df['day1'].tolist()[:3] == [1, 2, 3]
+    
+    broken_path = tmp_path / 'broken.xlsx'
+    try:
+        with XlsxStreamWriter(broken_path) as writer:
+            writer.append(pd.DataFrame({'a': [1]}))
+            raise RuntimeError('中断')
+    except RuntimeError:
+        pass
+    assert not broken_path.exists()
+
+def test_roundtrip_cell_types(tmp_path):
+    """测试openpyxl读回的单元格类型：SKU保持文本（保留前导零），数量为数字，日期带日期格式"""
+    output_path = tmp_path / 'types.xlsx'
+    df = pd.DataFrame({
+        'sku_no': ['00123', '4560', '1e5'],
+        'day1': [1, 2.5, np.nan],
+        'flag': [True, False, None],
+        'dt': [datetime.date(2024, 1, 1), datetime.datetime(2024, 1, 2, 8, 30), None],
+    })
+    write_xlsx(df, output_path, sheet_name='汇总')
+    
+    ws = openpyxl.load_workbook(output_path)['汇总']
+    skus = [row[0] for row in ws.iter_rows(min_row=2)]
+    assert [cell.value for cell in skus] == ['00123', '4560', '1e5']
+    assert all(cell.data_type == 's' and cell.number_format == 'General' for cell in skus)
+    
+    assert [(cell.data_type, cell.value) for cell in ws['B'][1:]] == [('n', 1), ('n', 2.5), ('n', None)]
+    assert [cell.value for cell in ws['C'][1:]] == [True, False, None]
+    assert ws['C2'].data_type == 'b'
+    assert ws['D2'].is_date and ws['D2'].value == datetime.datetime(2024, 1, 1)
+    assert ws['D2'].number_format == 'yyyy-mm-dd'
+    assert ws['D3'].is_date and ws['D3'].value == datetime.datetime(2024, 1, 2, 8, 30)
\ No newline at end of file